@@ -1,14 +1,34 @@
 import streamlit as st
-import requests
-from datetime import datetime, timedelta
-from typing import List, Dict, Any
-import os
-import requests
-from bs4 import BeautifulSoup
-import trafilatura
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator
 import json
+import os
 import time
 
+from cache import cache_key, get_llm_cache
+from checkpoints import get_checkpoint_store, new_workflow_id
+from deadlines import DeadlineExceeded, current_degradations, summarize_degradations
+from http_client import get_http_client
+from json_stream import IncrementalJSONParser
+from metrics import registry, start_metrics_server
+from pipeline import (
+    LENGTH_WORD_COUNTS,
+    OpenAIAPIError,
+    generate_article,
+    generate_article_outline,
+    generate_editorial_angles,
+    generate_topic_ideas,
+    parse_article_outline,
+    search_recent_articles,
+)
+from prefetch import Prefetcher, prefetch_stats
+from rate_limiter import get_rate_limiter
+from singleflight import singleflight_stats
+from scrape_cache import get_scrape_cache, scrape_stats
+from streamlit.errors import StreamlitAPIException
+from streamlit.runtime.scriptrunner import RerunData, get_script_run_ctx
+from tasks import DONE, FAILED, RUNNING, Task, get_task_registry, task_stats
+
 # Configuration de la page
 st.set_page_config(
     page_title="Générateur d'Articles IA",
@@ -17,695 +37,378 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-# Styles CSS
-st.markdown("""
-<style>
-    .main-title {
-        font-size: 2.5rem;
-        font-weight: 700;
-        color: #4A4A4A;
-        margin-bottom: 1rem;
-    }
-
-    .subtitle {
-        font-size: 1.8rem;
-        font-weight: 500;
-        color: #6B6B6B;
-        margin-bottom: 1.5rem;
-    }
-
-    .card {
-        background-color: #FFFFFF;
-        border-radius: 10px;
-        padding: 1.5rem;
-        box-shadow: 0 0.15rem 1.75rem 0 rgba(58, 59, 69, 0.15);
-        margin-bottom: 1.5rem;
-    }
-
-    .btn-primary {
-        background-color: #4A7AFF;
-        color: white;
-        border: none;
-        border-radius: 5px;
-        padding: 0.5rem 1rem;
-        font-size: 1rem;
-        font-weight: 500;
-        cursor: pointer;
-    }
-
-    .btn-primary:hover {
-        background-color: #3A6AEF;
-    }
-</style>
-""", unsafe_allow_html=True)
-
-
-# Fonction pour appeler l'API OpenAI
-def call_openai_api(prompt: str, model: str = "gpt-4o-mini", max_tokens: int = 1000) -> Dict[str, Any]:
+
+# Initialisation du processus : exécutée une seule fois, pas à chaque rerun
+@st.cache_resource(show_spinner=False)
+def setup_process() -> str:
     """
-    Envoie une requête à l'API OpenAI et retourne la réponse.
+    Démarre l'endpoint /metrics (si METRICS_PORT est défini), enregistre les collecteurs
+    et charge la feuille de style, une seule fois pour toutes les sessions.
     """
-    api_key = os.environ.get("OPENAI_API_KEY", "")
+    start_metrics_server()
+    registry.register_collector("prefetch", prefetch_stats)
+    registry.register_collector("tasks", task_stats)
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "style.css"), encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
 
-    if not api_key:
-        st.error("Clé API OpenAI non trouvée. Veuillez configurer votre clé API.")
-        st.stop()
 
-    headers = {
-        "Content-Type": "application/json",
-        "Authorization": f"Bearer {api_key}"
-    }
+# Styles CSS
+st.markdown(setup_process(), unsafe_allow_html=True)
 
-    payload = {
-        "model": model,
-        "messages": [{"role": "user", "content": prompt}],
-        "max_tokens": max_tokens,
-        "temperature": 0.7,
-    }
 
+# Exécution des étapes du pipeline avec affichage des erreurs OpenAI
+def run_stage(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Exécute une fonction du pipeline ; en cas d'erreur OpenAI ou de délai dépassé, l'affiche et arrête le script.
+    """
     try:
-        response = requests.post(
-            "https://api.openai.com/v1/chat/completions",
-            headers=headers,
-            data=json.dumps(payload)
-        )
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.HTTPError as e:
-        st.error(f"Erreur HTTP lors de l'appel à l'API OpenAI: {e}")
-        st.error(f"Détails: {response.text}")
-        st.stop()
-    except Exception as e:
-        st.error(f"Erreur lors de l'appel à l'API OpenAI: {e}")
+        return fn(*args, **kwargs)
+    except (OpenAIAPIError, DeadlineExceeded) as e:
+        st.error(str(e))
         st.stop()
 
 
-def extract_keywords(title: str, max_keywords: int = 3) -> List[str]:
+def guard_stream(chunks: Iterator[str]) -> Iterator[str]:
     """
-    Extrait les mots-clés pertinents d'un titre.
-
-    Args:
-        title (str): Titre de l'article
-        max_keywords (int): Nombre maximum de mots-clés à extraire
-
-    Returns:
-        List[str]: Liste des mots-clés extraits
+    Relaie un flux de texte du pipeline ; une erreur OpenAI en cours de flux est affichée.
     """
-    # Charger les stopwords français
-    stop_words = set([
-            'le', 'la', 'les', 'un', 'une', 'des', 'de', 'du', 'à', 'en', 'et',
-            'dans', 'pour', 'par', 'sur', 'qui', 'que', 'quoi', 'dont', 'comment'
-        ])
-
-    # Nettoyer et tokenizer le titre
-    words = title.lower().split()
+    try:
+        yield from chunks
+    except (OpenAIAPIError, DeadlineExceeded) as e:
+        st.error(str(e))
+        st.stop()
 
-    # Filtrer les stopwords et garder uniquement les mots significatifs
-    keywords = [
-        word for word in words
-        if word not in stop_words and len(word) > 2
-    ]
 
-    # Limiter le nombre de mots-clés
-    return keywords[:max_keywords]
+# Suivi des tâches d'arrière-plan : intervalle de rafraîchissement (secondes) et libellés des phases
+TASK_POLL_INTERVAL = 0.25
+TASK_PHASE_LABELS = {
+    "scraping": "Lecture des articles sources",
+    "summarizing": "Résumé des articles sources",
+    "writing": "Rédaction de l'article",
+}
 
 
-def search_recent_articles(selected_topic: str, sector: str, keywords: str, max_age_hours: int = 72,
-                           num_results: int = 5) -> List[Dict[str, str]]:
+def follow_task(task: Task, expected_words: int = 0) -> Any:
     """
-    Recherche d'articles récents basée sur le titre, le secteur et les mots-clés.
+    Affiche la progression d'une tâche d'arrière-plan et son texte au fil de l'eau, jusqu'à sa fin.
+
+    La tâche ne dépend pas du script : si l'utilisateur interagit ou si la connexion est
+    rétablie, le rerun suivant se rattache à la même tâche au lieu de la relancer.
+    En cas d'échec, l'erreur est affichée et le script arrêté.
 
     Args:
-        selected_topic (str): Titre de l'article choisi
-        sector (str): Secteur d'activité
-        keywords (str): Mots-clés initiaux
-        max_age_hours (int): Âge maximum des articles
-        num_results (int): Nombre de résultats
+        task (Task): Tâche à suivre
+        expected_words (int): Longueur attendue du texte, pour estimer l'avancement de la rédaction
 
     Returns:
-        List[Dict[str, str]]: Liste des articles trouvés
+        Any: Résultat de la tâche
     """
-    # Extraire les mots-clés du titre
-    title_keywords = extract_keywords(selected_topic)
-
-    # Combiner les mots-clés du titre, du secteur et initiaux
-    search_terms = (
-            title_keywords +
-            [sector] +
-            [kw.strip() for kw in keywords.split(',') if kw.strip()]
-    )
-
-    # Construire la requête de recherche
-    query = ' '.join(set(search_terms))
-
-    # Calculer la date minimale
-    from_date = (datetime.now() - timedelta(hours=max_age_hours)).strftime("%Y-%m-%d")
-
-    # Récupérer la clé API NewsAPI
-    newsapi_key = os.environ.get("NEWSAPI_KEY", "")
-
-    try:
-        # Appel à l'API NewsAPI
-        url = "https://newsapi.org/v2/everything"
-        params = {
-            "q": query,  # Requête de recherche enrichie
-            "from": from_date,  # Date minimale
-            "sortBy": "relevancy",  # Trier par pertinence
-            "apiKey": newsapi_key,
-            "pageSize": num_results * 2,  # Demander plus pour filtrer
-            "language": "fr"  # Articles en français
-        }
-
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        data = response.json()
-
-        # Traitement des résultats
-        if data.get("status") == "ok" and "articles" in data:
-            articles = []
-            for article in data["articles"]:
-                # Vérifier la pertinence de l'article
-                article_text = (
-                    f"{article.get('title', '')} {article.get('description', '')}"
-                ).lower()
-
-                # Vérifier si les mots-clés sont présents
-                if all(kw.lower() in article_text for kw in search_terms):
-                    articles.append({
-                        "title": article.get("title", "Article sans titre"),
-                        "url": article.get("url", "#"),
-                        "summary": article.get("description", "Pas de description disponible."),
-                        "date": article.get("publishedAt", "")[:10]  # Format YYYY-MM-DD
-                    })
-
-                    # Stopper si on a assez d'articles
-                    if len(articles) >= num_results:
-                        break
-
-            # Si pas assez d'articles, compléter avec la simulation
-            if len(articles) < num_results:
-                articles.extend(
-                    simulate_search_with_openai(query, num_results - len(articles))
-                )
-
-            return articles
+    progress = st.empty()
+    preview = st.empty()
+    while True:
+        snapshot = task.snapshot()
+        if snapshot["status"] != RUNNING:
+            break
+
+        # Sources (lecture puis résumé) : 40 % de l'avancement ; rédaction : le reste
+        sources = [step for name, step in snapshot["steps"].items() if name != "writing" and step["total"]]
+        fraction = 0.4 * sum(min(1, step["done"] / step["total"]) for step in sources) / max(1, len(sources))
+        if "writing" in snapshot["steps"]:
+            words = len(snapshot["text"].split())
+            fraction = 0.4 + 0.6 * min(1.0, words / expected_words if expected_words else 0.0)
+
+        label = TASK_PHASE_LABELS.get(snapshot["phase"], "Préparation")
+        step = snapshot["steps"].get(snapshot["phase"], {})
+        if step.get("total"):
+            label += f" ({step['done']}/{step['total']})"
+        progress.progress(min(fraction, 0.99), text=f"{label}... ({snapshot['elapsed']:.0f} s)")
+        if snapshot["text"]:
+            preview.markdown(snapshot["text"])
+        time.sleep(TASK_POLL_INTERVAL)
+
+    progress.empty()
+    preview.empty()
+    if task.status == FAILED:
+        st.error(task.error)
+        st.stop()
+    return task.result if task.status == DONE else None
 
-        # Basculement vers la simulation si pas de résultats
-        return simulate_search_with_openai(query, num_results)
 
-    except Exception as e:
-        # En cas d'erreur, utilisation de la simulation
-        return simulate_search_with_openai(query, num_results)
+# Modes dégradés signalés par le pipeline quand le budget de temps d'une étape est épuisé
+DEGRADATION_MESSAGES = {
+    ("search", "providers_timeout"): "{n} source(s) de recherche n'ont pas répondu à temps : résultats partiels.",
+    ("search", "pages_skipped"): "Recherche arrêtée faute de temps : les pages de résultats suivantes "
+                                 "n'ont pas été consultées.",
+    ("search", "simulation_skipped"): "{n} article(s) manquant(s) n'ont pas pu être complétés faute de temps.",
+    ("scraping", "sources_skipped"): "{n} article(s) source(s) non lus faute de temps : seul leur résumé "
+                                     "de recherche a été utilisé.",
+    ("scraping", "search_summaries"): "{n} article(s) source(s) non résumés faute de temps : leur résumé "
+                                      "de recherche a été utilisé.",
+}
 
 
-def simulate_search_with_openai(query: str, num_results: int = 5) -> List[Dict[str, str]]:
+def track_degradations():
     """
-    Utilise OpenAI pour simuler une recherche d'articles récents.
-    """
-    prompt = f"""
-    Génère {num_results} articles fictifs récents (moins de 72 heures) sur le sujet suivant: {query}.
-    Pour chaque article, fournir:
-    1. Un titre réaliste
-    2. Une URL fictive mais plausible
-    3. Un résumé de 3-5 lignes
-    4. Une date de publication dans les dernières 72h
-
-    Format JSON attendu:
-    [
-        {{
-            "title": "Titre de l'article 1",
-            "url": "https://example.com/article1",
-            "summary": "Résumé de l'article en 3-5 lignes",
-            "date": "YYYY-MM-DD"
-        }},
-        ...
-    ]
+    Collecte dans la session les modes dégradés signalés par les étapes lancées
+    depuis ce script (appels directs, précalcul et tâches d'arrière-plan).
     """
+    current_degradations.set(st.session_state.degradations)
 
-    response = call_openai_api(prompt, max_tokens=1500)
 
-    try:
-        articles_text = response["choices"][0]["message"]["content"]
-        # On extrait le JSON des potentiels backticks markdown
-        if "```json" in articles_text:
-            articles_text = articles_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in articles_text:
-            articles_text = articles_text.split("```")[1].split("```")[0].strip()
-
-        articles = json.loads(articles_text)
-        return articles
-    except Exception as e:
-        st.error(f"Erreur lors du parsing des articles simulés: {e}")
-        return []
-
-
-# Fonctions pour les différentes étapes du processus
-def generate_topic_ideas(sector: str, keywords: str, services: str) -> List[str]:
-    api_key = os.environ.get("OPENAI_API_KEY", "")
-    st.write(f"Utilisation de la clé API: {api_key[:5]}...{api_key[-5:] if api_key else 'Non trouvée'}")
-
-    if not api_key:
-        st.error("Clé API OpenAI non trouvée. Veuillez configurer votre clé API.")
-        st.stop()
+def clear_degradations(*stages: str):
     """
-    Génère 5 idées de sujets d'articles basés sur les inputs utilisateur.
+    Oublie les modes dégradés des étapes dont le résultat va être recalculé.
     """
-    prompt = f"""
-    En tant qu'expert en marketing de contenu, propose 5 idées de sujets d'articles pour le secteur "{sector}" 
-    avec les mots-clés "{keywords}" et les services/produits "{services}".
-
-    Pour chaque idée, fournir:
-    - Un titre accrocheur et SEO-friendly
-    - Une brève description du sujet (1-2 phrases)
-
-    Présente les résultats sous forme de liste numérotée.
-    """
-
-    response = call_openai_api(prompt)
+    st.session_state.degradations[:] = [d for d in st.session_state.degradations if d["stage"] not in stages]
 
-    # Afficher la réponse brute pour débogage
-    st.write("Réponse brute de l'API:")
-    st.write(response)
 
-    ideas_text = response["choices"][0]["message"]["content"]
-    st.write("Contenu du message:")
-    st.write(ideas_text)
-
-    # Approche simplifiée pour extraire les idées
-    ideas = []
-    for line in ideas_text.split("\n"):
-        line = line.strip()
-        if line and (line.startswith("1.") or line.startswith("2.") or
-                     line.startswith("3.") or line.startswith("4.") or
-                     line.startswith("5.")):
-            # Extraire tout ce qui suit le numéro et le point
-            parts = line.split(".", 1)
-            if len(parts) > 1:
-                ideas.append(parts[1].strip())
-
-    # Si moins de 5 idées, générer des idées par défaut
-    while len(ideas) < 5:
-        ideas.append(f"Sujet sur {sector} et {keywords}")
-
-    return ideas[:5]
-
-
-def generate_editorial_angles(topic: str, sector: str) -> List[str]:
-    """
-    Génère 5 angles éditoriaux différents pour un sujet donné.
+def show_degradations(*stages: str):
     """
-    prompt = f"""
-    Pour le sujet d'article "{topic}" dans le secteur "{sector}", propose 5 angles éditoriaux différents.
-    Chaque angle doit être distinct et apporter une perspective unique.
-
-    Exemples d'angles: analytique, émotionnel, didactique, anecdotique, comparatif, etc.
-
-    Pour chaque angle, fournir:
-    - Un nom court et descriptif
-    - Une brève explication de l'approche (1-2 phrases)
-
-    Présente les résultats sous forme de liste numérotée.
+    Signale les modes dégradés des étapes indiquées (sources ignorées, résumés manquants...).
     """
+    for (stage, reason), count in summarize_degradations(st.session_state.degradations).items():
+        if stage in stages:
+            message = DEGRADATION_MESSAGES.get((stage, reason), f"Étape {stage} en mode dégradé ({reason}).")
+            st.warning(f"⏱️ {message.format(n=count)}")
 
-    response = call_openai_api(prompt)
-    angles_text = response["choices"][0]["message"]["content"]
-
-    # Traitement pour extraire les angles
-    angles = []
-    current_angle = ""
-
-    for line in angles_text.split("\n"):
-        line = line.strip()
-        if line and (line[0].isdigit() or line.startswith("-")):
-            # Nouvelle entrée détectée
-            if current_angle and len(current_angle) > 0:
-                angles.append(current_angle)
-
-            # Nettoyer la ligne
-            clean_line = line.split(".", 1)[-1].strip() if "." in line else line.strip()
-            clean_line = clean_line[1:].strip() if clean_line.startswith("-") else clean_line
-
-            # Extraire juste le nom de l'angle si disponible
-            if ":" in clean_line:
-                angle_name = clean_line.split(":", 1)[0].strip()
-                current_angle = angle_name
-            else:
-                current_angle = clean_line
-        elif line and current_angle:
-            # Ligne supplémentaire pour l'entrée actuelle
-            continue
-
-    # Ajouter le dernier angle s'il existe
-    if current_angle and len(current_angle) > 0:
-        angles.append(current_angle)
 
-    # Garantir qu'on a au moins 5 angles
-    if len(angles) < 5:
-        additional_angles = ["Angle " + str(i + 1) for i in range(len(angles), 5)]
-        angles.extend(additional_angles)
+# Fragments : st.fragment (Streamlit >= 1.37), ou st.experimental_fragment sur les versions antérieures.
+# Une interaction dans un fragment ne réexécute que ce fragment, pas tout le script.
+fragment = getattr(st, "fragment", None) or st.experimental_fragment
 
-    return angles[:5]  # Limiter à 5 angles
 
-
-def generate_article_outline(topic: str, angle: str, tone: str, length: str, style: str) -> Dict[str, Any]:
-    """
-    Génère un plan d'article structuré.
+def rerun_fragment():
     """
-    prompt = f"""
-    Crée un plan détaillé pour un article sur le sujet:
-    "{topic}" 
-
-    Avec l'angle éditorial:
-    "{angle}"
-
-    Paramètres de rédaction:
-    - Ton: {tone}
-    - Longueur: {length}
-    - Style: {style}
-
-    Le plan doit inclure:
-    1. Un titre accrocheur
-    2. Une introduction
-    3. 2-4 parties principales avec sous-points
-    4. Une conclusion
-
-    Format JSON attendu:
-    {{
-        "title": "Titre de l'article",
-        "introduction": "Description de l'introduction",
-        "sections": [
-            {{
-                "title": "Titre section 1",
-                "subsections": ["Sous-point 1", "Sous-point 2"]
-            }},
-            ...
-        ],
-        "conclusion": "Description de la conclusion"
-    }}
+    Réexécute seulement le fragment courant ; toute l'application si l'on n'est pas dans une
+    réexécution de fragment.
     """
-
-    response = call_openai_api(prompt, max_tokens=1200)
-    outline_text = response["choices"][0]["message"]["content"]
-
-    # Extraction du JSON du texte
     try:
-        if "```json" in outline_text:
-            outline_json = outline_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in outline_text:
-            outline_json = outline_text.split("```")[1].split("```")[0].strip()
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+    except TypeError:
+        # Streamlit < 1.37 : pas de paramètre scope, la réexécution du fragment est demandée
+        # comme le fait le navigateur après une interaction dans le fragment
+        ctx = get_script_run_ctx(suppress_warning=True)
+        if ctx is None or not ctx.fragment_ids_this_run or not ctx.current_fragment_id:
+            st.rerun()
         else:
-            outline_json = outline_text.strip()
-
-        outline = json.loads(outline_json)
-        return outline
-    except Exception as e:
-        st.error(f"Erreur lors du parsing du plan: {e}")
-        st.error(f"Texte reçu: {outline_text}")
-
-        # Fournir un plan par défaut en cas d'erreur
-        return {
-            "title": f"Article sur {topic}",
-            "introduction": "Introduction à définir",
-            "sections": [
-                {"title": "Première partie", "subsections": ["Point 1", "Point 2"]},
-                {"title": "Deuxième partie", "subsections": ["Point 1", "Point 2"]},
-            ],
-            "conclusion": "Conclusion à définir"
-        }
-
-
-def scrape_and_summarize_article(url: str) -> Dict[str, str]:
-    """
-    Scrape et résume un article à partir de son URL
+            ctx.script_requests.request_rerun(RerunData(
+                query_string=ctx.query_string,
+                page_script_hash=ctx.page_script_hash,
+                fragment_id_queue=[ctx.current_fragment_id],
+            ))
+            # Point d'interruption : le script s'arrête ici pour réexécuter le fragment
+            st.empty()
+
+
+# Initialisation des variables de session (une fois par session, ou après réinitialisation)
+SESSION_DEFAULTS = {
+    'stage': 1,
+    'sector': "",
+    'keywords': "",
+    'services': "",
+    'topic_ideas': [],
+    'selected_topic': "",
+    'recent_articles': [],
+    'editorial_angles': [],
+    'selected_angle': "",
+    'selected_tone': "",
+    'selected_length': "",
+    'selected_style': "",
+    'article_outline': {},
+    'final_article': "",
+    'refresh_outline': False,
+    'degradations': [],
+}
+
+if 'prefetcher' not in st.session_state:
+    for key, default in SESSION_DEFAULTS.items():
+        if key not in st.session_state:
+            st.session_state[key] = default.copy() if isinstance(default, (list, dict)) else default
+    st.session_state.prefetcher = Prefetcher()
+
+# Points de reprise : entrées et sorties de chaque étape payante, persistées dans SQLite
+CHECKPOINT_STAGES = {
+    "topic_ideas": (("sector", "keywords", "services"), ("topic_ideas",)),
+    "search": (("selected_topic", "sector", "keywords"), ("recent_articles",)),
+    "editorial_angles": (("selected_topic", "sector"), ("editorial_angles",)),
+    "outline": (("selected_topic", "selected_angle", "selected_tone", "selected_length", "selected_style"),
+                ("article_outline",)),
+    "article": (("article_outline", "selected_topic", "selected_angle", "selected_tone", "selected_length",
+                 "selected_style"), ("final_article",)),
+}
+
+# Choix de l'utilisateur et étape courante, restaurés tels quels
+CHECKPOINT_SELECTIONS = (
+    "stage", "sector", "keywords", "services", "selected_topic", "selected_angle",
+    "selected_tone", "selected_length", "selected_style",
+)
 
-    Args:
-        url (str): URL de l'article
 
-    Returns:
-        Dict contenant le contenu scrapé et résumé
+def save_checkpoints():
     """
-    try:
-        # Utilisation de trafilatura pour extraction de contenu
-        downloaded = trafilatura.fetch_url(url)
-        content = trafilatura.extract(downloaded)
-
-        if not content:
-            return None
-
-        # Génération de résumé avec GPT
-        summary_prompt = f"""
-        Résume professionnellement le contenu suivant en mettant en avant 
-        les points clés et les insights principaux. 
-
-        Contenu de l'article:
-        {content[:4000]}  # Limiter la longueur
-
-        Consignes:
-        - Résumé concis (150-250 mots)
-        - Style professionnel
-        - Mettre en évidence les informations essentielles
-        - Structure claire
-        """
-
-        # Appel à l'API OpenAI pour le résumé
-        summary_response = call_openai_api(
-            summary_prompt,
-            model="gpt-4o-mini",
-            max_tokens=300
-        )
+    Persiste les étapes dont le résultat a changé depuis la dernière sauvegarde.
 
-        summary = summary_response["choices"][0]["message"]["content"]
-
-        return {
-            "original_content": content,
-            "summary": summary
-        }
+    Une étape dont le résultat a été effacé (ex: changement de sujet) est supprimée,
+    pour ne jamais reprendre un résultat obsolète.
+    """
+    if not st.session_state.topic_ideas:
+        # Rien de payant à reprendre tant que la première étape n'a pas été générée
+        return
+
+    store = get_checkpoint_store()
+    workflow_id = st.session_state.workflow_id
+    saved = st.session_state.checkpoint_digests
+
+    snapshot = {"selections": ({}, {key: st.session_state[key] for key in CHECKPOINT_SELECTIONS})}
+    for stage, (inputs, outputs) in CHECKPOINT_STAGES.items():
+        snapshot[stage] = (
+            {key: st.session_state[key] for key in inputs},
+            {key: st.session_state[key] for key in outputs},
+        )
 
-    except Exception as e:
-        print(f"Erreur de scrapping : {e}")
-        return None
+    for stage, (inputs, outputs) in snapshot.items():
+        digest = cache_key(inputs, outputs) if any(outputs.values()) else None
+        if digest == saved.get(stage):
+            continue
+        if digest is None:
+            store.delete(workflow_id, stage)
+        else:
+            store.save(workflow_id, stage, inputs, outputs)
+        saved[stage] = digest
 
 
-def process_articles_for_generation(recent_articles: List[Dict], max_articles: int = 3) -> List[Dict]:
+def restore_checkpoints(workflow_id: str) -> bool:
     """
-    Traite les articles pour la génération
+    Restaure la session depuis les points de reprise d'un workflow.
 
-    Args:
-        recent_articles (List[Dict]): Articles à traiter
-        max_articles (int): Nombre max d'articles à traiter
+    Une étape n'est reprise que si ses entrées correspondent aux choix restaurés.
 
     Returns:
-        Liste d'articles scrapés et résumés
+        bool: True si le workflow existait
     """
-    processed_articles = []
+    checkpoints = get_checkpoint_store().load(workflow_id)
+    if "selections" not in checkpoints:
+        return False
+
+    for key, value in checkpoints["selections"]["outputs"].items():
+        st.session_state[key] = value
+
+    for stage, (inputs, outputs) in CHECKPOINT_STAGES.items():
+        checkpoint = checkpoints.get(stage)
+        if checkpoint and all(checkpoint["inputs"].get(key) == st.session_state[key] for key in inputs):
+            for key in outputs:
+                st.session_state[key] = checkpoint["outputs"][key]
+    return True
+
+
+# Identifiant du workflow dans l'URL (?wf=...) : un rafraîchissement ou un redémarrage reprend là où on en était
+if 'workflow_id' not in st.session_state:
+    workflow_id = st.query_params.get("wf", "")
+    st.session_state.checkpoint_digests = {}
+    if not (workflow_id.isalnum() and len(workflow_id) <= 64 and restore_checkpoints(workflow_id)):
+        workflow_id = new_workflow_id()
+    st.session_state.workflow_id = workflow_id
+    st.query_params["wf"] = workflow_id
+
+# Options de l'étape 5 (partagées avec le précalcul du plan)
+TONE_OPTIONS = [
+    "Professionnel", "Dynamique", "Bienveillant", "Humoristique",
+    "Formel", "Informatif", "Conversationnel", "Persuasif"
+]
+LENGTH_OPTIONS = ["Court (~300 mots)", "Moyen (~600 mots)", "Long (~1200 mots)"]
+STYLE_OPTIONS = ["Blog", "Article LinkedIn", "Post inspirant", "Tutoriel", "Analyse de marché", "Étude de cas"]
+
 
-    for article in recent_articles[:max_articles]:
-        scraped_article = scrape_and_summarize_article(article['url'])
+# Fonctions de navigation
+def go_to_stage(stage):
+    st.session_state.stage = stage
 
-        if scraped_article:
-            processed_articles.append({
-                **article,
-                **scraped_article
-            })
 
-    return processed_articles
+def next_stage():
+    st.session_state.stage += 1
 
 
-def generate_article_with_context(
-        topic: str,
-        angle: str,
-        processed_articles: List[Dict]
-) -> str:
-    """
-    Génère un article avec contexte des articles scrapés
+def prev_stage():
+    if st.session_state.stage > 1:
+        st.session_state.stage -= 1
 
-    Args:
-        topic (str): Sujet de l'article
-        angle (str): Angle éditorial
-        processed_articles (List[Dict]): Articles traités
 
-    Returns:
-        Article généré
+# Précalcul spéculatif des étapes suivantes
+def writing_params() -> tuple:
     """
-    # Construire le contexte
-    context = "\n\n".join([
-        f"Article {i + 1} Résumé:\n{article['summary']}"
-        for i, article in enumerate(processed_articles)
-    ])
-
-    generation_prompt = f"""
-    Génère un article sur le sujet "{topic}" avec l'angle "{angle}".
-
-    Contexte des articles récents:
-    {context}
-
-    Consignes:
-    - Intègre les insights des articles scrapés
-    - Apporte une perspective unique
-    - Utilise les informations contextuelles
-    - Maintiens une structure claire et professionnelle
+    Paramètres de rédaction courants, ou valeurs par défaut du formulaire de l'étape 5.
     """
-
-    response = call_openai_api(
-        generation_prompt,
-        model="gpt-4o-mini",
-        max_tokens=1500
+    return (
+        st.session_state.selected_tone or TONE_OPTIONS[0],
+        st.session_state.selected_length or LENGTH_OPTIONS[1],
+        st.session_state.selected_style or STYLE_OPTIONS[0],
     )
 
-    return response["choices"][0]["message"]["content"]
-
 
-def generate_article(outline: Dict[str, Any], topic: str, angle: str, tone: str, length: str, style: str) -> str:
+def select_topic(topic: str):
+    """
+    Enregistre le sujet choisi et lance en arrière-plan la recherche d'articles
+    et la génération des angles, dont les entrées sont désormais connues.
     """
-    Génère l'article complet basé sur le plan, lss articles processesd et les paramètres.
+    if topic != st.session_state.selected_topic:
+        # Les résultats liés à l'ancien sujet sont obsolètes
+        clear_degradations("search", "scraping")
+        st.session_state.recent_articles = []
+        st.session_state.editorial_angles = []
+        st.session_state.selected_angle = ""
+        st.session_state.article_outline = {}
+    st.session_state.selected_topic = topic
+
+    sector = st.session_state.sector
+    keywords = st.session_state.keywords
+    prefetcher = st.session_state.prefetcher
+    prefetcher.start("recent_articles", (topic, sector, keywords), search_recent_articles, topic, sector, keywords)
+    prefetcher.start("editorial_angles", (topic, sector), generate_editorial_angles, topic, sector)
+
+
+def select_angle(angle: str):
     """
-    processed_articles = process_articles_for_generation(
-        st.session_state.recent_articles
+    Enregistre l'angle choisi et précalcule le plan avec les paramètres de rédaction courants.
+    """
+    if angle != st.session_state.selected_angle:
+        st.session_state.article_outline = {}
+    st.session_state.selected_angle = angle
+
+    topic = st.session_state.selected_topic
+    tone, length, style = writing_params()
+    st.session_state.prefetcher.start(
+        "article_outline", (topic, angle, tone, length, style),
+        generate_article_outline, topic, angle, tone, length, style
     )
 
-    # Déterminer la longueur approximative en mots
-    word_count = {
-        "Court (~300 mots)": 300,
-        "Moyen (~600 mots)": 600,
-        "Long (~1200 mots)": 1200
-    }.get(length, 600)
-
-    # Création du plan formaté pour le prompt
-    outline_formatted = f"""
-    Titre: {outline['title']}
-
-    Introduction: {outline['introduction']}
 
+def apply_prefetched_results():
     """
-
-    for i, section in enumerate(outline['sections']):
-        outline_formatted += f"Section {i + 1}: {section['title']}\n"
-        for j, subsection in enumerate(section['subsections']):
-            outline_formatted += f"- {subsection}\n"
-        outline_formatted += "\n"
-
-    outline_formatted += f"Conclusion: {outline['conclusion']}"
-
-    prompt = f"""
-    Rédige un article complet et professionnel sur le sujet "{topic}" avec l'angle "{angle}" 
-    en suivant précisément le plan ci-dessous:
-
-    {outline_formatted}
-
-    Les articles réel pour inspiration : 
-    {processed_articles}
-    
-    Paramètres de rédaction:
-    - Ton: {tone}
-    - Longueur cible: environ {word_count} mots
-    - Style: {style}
-
-    L'article doit être cohérent, engageant, et respecter les meilleures pratiques SEO sans compromettre la qualité éditoriale.
-    Utilise des paragraphes clairs, des sous-titres pertinents, et une structure logique.
+    Reporte dans la session les résultats de précalcul déjà terminés.
     """
+    prefetcher = st.session_state.prefetcher
+    topic = st.session_state.selected_topic
+    sector = st.session_state.sector
 
-    response = call_openai_api(prompt, max_tokens=2000)
-    article_text = response["choices"][0]["message"]["content"]
-
-    return article_text
-
-
-# Initialisation des variables de session
-if 'stage' not in st.session_state:
-    st.session_state.stage = 1
-
-if 'sector' not in st.session_state:
-    st.session_state.sector = ""
+    if topic and not st.session_state.recent_articles:
+        articles = prefetcher.take("recent_articles", (topic, sector, st.session_state.keywords), wait=False)
+        if articles is not None:
+            st.session_state.recent_articles = articles
 
-if 'keywords' not in st.session_state:
-    st.session_state.keywords = ""
+    if topic and not st.session_state.editorial_angles:
+        angles = prefetcher.take("editorial_angles", (topic, sector), wait=False)
+        if angles is not None:
+            st.session_state.editorial_angles = angles
 
-if 'services' not in st.session_state:
-    st.session_state.services = ""
 
-if 'topic_ideas' not in st.session_state:
-    st.session_state.topic_ideas = []
-
-if 'selected_topic' not in st.session_state:
-    st.session_state.selected_topic = ""
-
-if 'recent_articles' not in st.session_state:
-    st.session_state.recent_articles = []
-
-if 'editorial_angles' not in st.session_state:
-    st.session_state.editorial_angles = []
-
-if 'selected_angle' not in st.session_state:
-    st.session_state.selected_angle = ""
-
-if 'selected_tone' not in st.session_state:
-    st.session_state.selected_tone = ""
-
-if 'selected_length' not in st.session_state:
-    st.session_state.selected_length = ""
-
-if 'selected_style' not in st.session_state:
-    st.session_state.selected_style = ""
-
-if 'article_outline' not in st.session_state:
-    st.session_state.article_outline = {}
-
-if 'final_article' not in st.session_state:
-    st.session_state.final_article = ""
-
-
-# Fonctions de navigation
-def go_to_stage(stage):
-    st.session_state.stage = stage
+apply_prefetched_results()
+save_checkpoints()
 
 
-def next_stage():
-    st.session_state.stage += 1
-
-
-def prev_stage():
-    if st.session_state.stage > 1:
-        st.session_state.stage -= 1
-
-
-# Sidebar
-with st.sidebar:
-    st.image("https://via.placeholder.com/150x50?text=AI+Writer", width=150)
-    st.markdown("### Étapes du processus")
-
-    stages = [
-        "1️⃣ Données initiales",
-        "2️⃣ Choix du sujet",
-        "3️⃣ Articles inspirants",
-        "4️⃣ Angles éditoriaux",
-        "5️⃣ Paramètres de rédaction",
-        "6️⃣ Plan de l'article",
-        "7️⃣ Article final"
-    ]
-
-    for i, stage in enumerate(stages):
-        if i + 1 < st.session_state.stage:
-            st.success(stage)
-        elif i + 1 == st.session_state.stage:
-            st.info(stage)
-        else:
-            st.markdown(stage)
-
-    st.markdown("---")
-
-    # Bouton pour recommencer
-    if st.button("🔄 Recommencer"):
-        for key in st.session_state.keys():
-            if key != 'stage':
-                del st.session_state[key]
-        st.session_state.stage = 1
-        st.rerun()
-
-# Affichage principal selon l'étape
-st.markdown("<h1 class='main-title'>🚀 Assistant de génération d'articles IA</h1>", unsafe_allow_html=True)
-
 # Étape 1: Données initiales
-if st.session_state.stage == 1:
+def render_initial_data():
     st.markdown("<h2 class='subtitle'>📝 Étape 1: Données initiales</h2>", unsafe_allow_html=True)
 
     with st.form("initial_data_form"):
@@ -721,7 +424,8 @@ if st.session_state.stage == 1:
                 st.error("Veuillez remplir au moins le secteur et les mots-clés.")
             else:
                 with st.spinner("Génération d'idées en cours..."):
-                    st.session_state.topic_ideas = generate_topic_ideas(
+                    st.session_state.topic_ideas = run_stage(
+                        generate_topic_ideas,
                         st.session_state.sector,
                         st.session_state.keywords,
                         st.session_state.services
@@ -729,8 +433,9 @@ if st.session_state.stage == 1:
                 next_stage()
                 st.rerun()
 
+
 # Étape 2: Choix du sujet
-elif st.session_state.stage == 2:
+def render_topic_choice():
     st.markdown("<h2 class='subtitle'>🎯 Étape 2: Choix du sujet</h2>", unsafe_allow_html=True)
 
     # Idées générées
@@ -741,7 +446,7 @@ elif st.session_state.stage == 2:
             st.markdown(f"**{i + 1}. {idea}**")
         with col2:
             if st.button("Choisir", key=f"choose_topic_{i}"):
-                st.session_state.selected_topic = idea
+                select_topic(idea)
                 next_stage()
                 st.rerun()
 
@@ -757,8 +462,8 @@ elif st.session_state.stage == 2:
 
         # Traitement du sujet personnalisé
         if submit_custom and custom_topic:
-            # Mettre à jour la variable de session
-            st.session_state.selected_topic = custom_topic
+            # Mettre à jour la variable de session et précalculer les étapes suivantes
+            select_topic(custom_topic)
 
             # Passer à l'étape suivante
             next_stage()
@@ -769,8 +474,9 @@ elif st.session_state.stage == 2:
         prev_stage()
         st.rerun()
 
+
 # Étape 3: Articles inspirants
-elif st.session_state.stage == 3:
+def render_inspiring_articles():
     st.markdown("<h2 class='subtitle'>📚 Étape 3: Articles inspirants</h2>", unsafe_allow_html=True)
 
     # Afficher le sujet choisi
@@ -782,12 +488,20 @@ elif st.session_state.stage == 3:
             # Utiliser les variables de session pour la recherche
             search_query = st.session_state.selected_topic
 
-            # Appel avec tous les paramètres requis
-            st.session_state.recent_articles = search_recent_articles(
-                selected_topic=search_query,
-                sector=st.session_state.sector,
-                keywords=st.session_state.keywords
+            # Réutiliser la recherche lancée en arrière-plan au choix du sujet, si elle existe
+            recent_articles = st.session_state.prefetcher.take(
+                "recent_articles",
+                (search_query, st.session_state.sector, st.session_state.keywords)
             )
+            if recent_articles is None:
+                # Appel avec tous les paramètres requis
+                recent_articles = run_stage(
+                    search_recent_articles,
+                    selected_topic=search_query,
+                    sector=st.session_state.sector,
+                    keywords=st.session_state.keywords
+                )
+            st.session_state.recent_articles = recent_articles
 
     # Afficher les articles trouvés
     if st.session_state.recent_articles:
@@ -801,6 +515,7 @@ elif st.session_state.stage == 3:
                 st.write(article['summary'])
     else:
         st.warning("Aucun article récent trouvé. Vous pouvez continuer sans inspiration externe.")
+    show_degradations("search")
 
     # Navigation
     col1, col2 = st.columns(2)
@@ -815,8 +530,9 @@ elif st.session_state.stage == 3:
             next_stage()
             st.rerun()
 
+
 # Étape 4: Angles éditoriaux
-elif st.session_state.stage == 4:
+def render_editorial_angles():
     st.markdown("<h2 class='subtitle'>📐 Étape 4: Angles éditoriaux</h2>", unsafe_allow_html=True)
 
     # Afficher le sujet choisi
@@ -825,10 +541,17 @@ elif st.session_state.stage == 4:
     # Si les angles n'ont pas encore été générés
     if not st.session_state.editorial_angles:
         with st.spinner("Génération d'angles éditoriaux..."):
-            st.session_state.editorial_angles = generate_editorial_angles(
-                st.session_state.selected_topic,
-                st.session_state.sector
+            editorial_angles = st.session_state.prefetcher.take(
+                "editorial_angles",
+                (st.session_state.selected_topic, st.session_state.sector)
             )
+            if editorial_angles is None:
+                editorial_angles = run_stage(
+                    generate_editorial_angles,
+                    st.session_state.selected_topic,
+                    st.session_state.sector
+                )
+            st.session_state.editorial_angles = editorial_angles
 
     # Afficher les angles proposés
     st.markdown("### Angles éditoriaux proposés:")
@@ -839,7 +562,7 @@ elif st.session_state.stage == 4:
             st.markdown(f"**{i + 1}. {angle}**")
         with col2:
             if st.button("Choisir", key=f"choose_angle_{i}"):
-                st.session_state.selected_angle = angle
+                select_angle(angle)
                 next_stage()
                 st.rerun()
 
@@ -852,7 +575,7 @@ elif st.session_state.stage == 4:
         submit_custom = st.form_submit_button("Utiliser cet angle")
 
         if submit_custom and custom_angle:
-            st.session_state.selected_angle = custom_angle
+            select_angle(custom_angle)
             next_stage()
             st.rerun()
 
@@ -861,8 +584,9 @@ elif st.session_state.stage == 4:
         prev_stage()
         st.rerun()
 
+
 # Étape 5: Paramètres de rédaction
-elif st.session_state.stage == 5:
+def render_writing_params():
     st.markdown("<h2 class='subtitle'>⚙️ Étape 5: Paramètres de rédaction</h2>", unsafe_allow_html=True)
 
     # Afficher le sujet et l'angle choisis
@@ -871,24 +595,21 @@ elif st.session_state.stage == 5:
 
     # Formulaire pour les paramètres
     with st.form("writing_params_form"):
-        tone_options = [
-            "Professionnel", "Dynamique", "Bienveillant", "Humoristique",
-            "Formel", "Informatif", "Conversationnel", "Persuasif"
-        ]
+        tone_options = TONE_OPTIONS
         st.session_state.selected_tone = st.selectbox(
             "Ton de l'article",
             options=tone_options,
             index=0 if not st.session_state.selected_tone else tone_options.index(st.session_state.selected_tone)
         )
 
-        length_options = ["Court (~300 mots)", "Moyen (~600 mots)", "Long (~1200 mots)"]
+        length_options = LENGTH_OPTIONS
         st.session_state.selected_length = st.selectbox(
             "Longueur de l'article",
             options=length_options,
             index=1 if not st.session_state.selected_length else length_options.index(st.session_state.selected_length)
         )
 
-        style_options = ["Blog", "Article LinkedIn", "Post inspirant", "Tutoriel", "Analyse de marché", "Étude de cas"]
+        style_options = STYLE_OPTIONS
         st.session_state.selected_style = st.selectbox(
             "Style de l'article",
             options=style_options,
@@ -906,8 +627,29 @@ elif st.session_state.stage == 5:
         prev_stage()
         st.rerun()
 
+
+def outline_preview(outline: Dict[str, Any]) -> str:
+    """
+    Plan partiel, en cours de génération, mis en forme en markdown (champs reçus seulement).
+    """
+    lines = []
+    if isinstance(outline.get("title"), str):
+        lines.append(f"**Titre:** {outline['title']}")
+    if isinstance(outline.get("introduction"), str):
+        lines.append(f"**Introduction:** {outline['introduction']}")
+    sections = [section for section in outline.get("sections") or [] if isinstance(section, dict)]
+    if sections:
+        lines.append("**Corps de l'article:**")
+    for i, section in enumerate(sections):
+        lines.append(f"**{i + 1}. {section.get('title', '')}**")
+        lines.extend(f"   - {subsection}" for subsection in section.get("subsections") or [])
+    if isinstance(outline.get("conclusion"), str):
+        lines.append(f"**Conclusion:** {outline['conclusion']}")
+    return "\n\n".join(lines)
+
+
 # Étape 6 : Plan de l'article
-elif st.session_state.stage == 6:
+def render_outline():
     st.markdown("<h2 class='subtitle'>📋 Étape 6: Plan de l'article</h2>", unsafe_allow_html=True)
 
     # Résumé des paramètres choisis
@@ -922,15 +664,40 @@ elif st.session_state.stage == 6:
         st.markdown(f"**Style:** {st.session_state.selected_style}")
 
     # Générer le plan si nécessaire
-    if not st.session_state.article_outline:
+    if not st.session_state.article_outline and not st.session_state.refresh_outline:
+        # Plan précalculé au choix de l'angle, valable si les paramètres n'ont pas changé
         with st.spinner("Génération du plan en cours..."):
-            st.session_state.article_outline = generate_article_outline(
-                st.session_state.selected_topic,
-                st.session_state.selected_angle,
-                st.session_state.selected_tone,
-                st.session_state.selected_length,
-                st.session_state.selected_style
+            prefetched_outline = st.session_state.prefetcher.take(
+                "article_outline",
+                (st.session_state.selected_topic, st.session_state.selected_angle) + writing_params()
             )
+        if prefetched_outline is not None:
+            st.session_state.article_outline = prefetched_outline
+
+    if not st.session_state.article_outline:
+        outline_stream = run_stage(
+            generate_article_outline,
+            st.session_state.selected_topic,
+            st.session_state.selected_angle,
+            st.session_state.selected_tone,
+            st.session_state.selected_length,
+            st.session_state.selected_style,
+            refresh=st.session_state.refresh_outline,
+            stream=True
+        )
+
+        # Afficher le plan au fur et à mesure de sa génération : titre, introduction, puis chaque section
+        outline_placeholder = st.empty()
+        parser = IncrementalJSONParser()
+        outline_text = ""
+        for chunk in guard_stream(outline_stream):
+            outline_text += chunk
+            if parser.feed(chunk) and isinstance(parser.value, dict):
+                outline_placeholder.markdown(outline_preview(parser.value))
+        outline_placeholder.empty()
+
+        st.session_state.article_outline = parse_article_outline(outline_text, st.session_state.selected_topic)
+        st.session_state.refresh_outline = False
 
     # Afficher le plan
     st.markdown("### Plan proposé:")
@@ -959,15 +726,17 @@ elif st.session_state.stage == 6:
     with col2:
         if st.button("🔄 Regénérer le plan"):
             st.session_state.article_outline = {}
-            st.rerun()
+            st.session_state.refresh_outline = True
+            rerun_fragment()
 
     with col3:
         if st.button("✅ Valider le plan"):
             next_stage()
             st.rerun()
 
- # Étape 7: Article final
-elif st.session_state.stage == 7:
+
+# Étape 7: Article final
+def render_final_article():
     st.markdown("<h2 class='subtitle'>📝 Étape 7: Article final</h2>", unsafe_allow_html=True)
 
     # Vérifier que tous les paramètres nécessaires sont présents
@@ -982,20 +751,40 @@ elif st.session_state.stage == 7:
             st.rerun()
     else:
         # Générer l'article si nécessaire
+        st.markdown("### Article généré:")
+
         if not st.session_state.final_article:
-            with st.spinner("Génération de l'article en cours... Cela peut prendre quelques instants."):
-                st.session_state.final_article = generate_article(
-                    st.session_state.article_outline,  # Plan de l'article
-                    st.session_state.selected_topic,  # Sujet choisi
-                    st.session_state.selected_angle,  # Angle éditorial
-                    st.session_state.selected_tone,  # Ton de l'article
-                    st.session_state.selected_length,  # Longueur
-                    st.session_state.selected_style  # Style
-                )
+            # Rédaction en tâche d'arrière-plan : un rerun s'y rattache au lieu de la relancer
+            inputs = (
+                st.session_state.selected_topic,
+                st.session_state.selected_angle,
+                st.session_state.selected_tone,
+                st.session_state.selected_length,
+                st.session_state.selected_style,
+                cache_key(st.session_state.article_outline, st.session_state.recent_articles),
+            )
+            task = get_task_registry().start(
+                st.session_state.workflow_id, "article", inputs,
+                generate_article,
+                st.session_state.article_outline,  # Plan de l'article
+                st.session_state.selected_topic,  # Sujet choisi
+                st.session_state.selected_angle,  # Angle éditorial
+                st.session_state.selected_tone,  # Ton de l'article
+                st.session_state.selected_length,  # Longueur
+                st.session_state.selected_style,  # Style
+                recent_articles=st.session_state.recent_articles,  # Articles sources
+                stream=True
+            )
 
-        # Afficher l'article
-        st.markdown("### Article généré:")
-        st.markdown(st.session_state.final_article)
+            # Afficher l'article au fil de sa génération, puis le conserver en session
+            st.session_state.final_article = follow_task(
+                task, LENGTH_WORD_COUNTS.get(st.session_state.selected_length, 600)
+            ) or ""
+            st.markdown(st.session_state.final_article)
+        else:
+            # Afficher l'article
+            st.markdown(st.session_state.final_article)
+        show_degradations("scraping", "article")
 
         # Options d'export
         st.markdown("---")
@@ -1032,14 +821,122 @@ elif st.session_state.stage == 7:
 
         # Option pour regénérer l'article
         if st.button("🔄 Regénérer l'article"):
+            get_task_registry().discard(st.session_state.workflow_id, "article")
+            clear_degradations("scraping", "article")
             st.session_state.final_article = ""
-            st.rerun()
+            rerun_fragment()
 
         # Navigation
         if st.button("← Retour au plan"):
             st.session_state.stage = 6
             st.rerun()
 
+
+# Vues des étapes, affichées dans un fragment
+STAGE_VIEWS = {
+    1: render_initial_data,
+    2: render_topic_choice,
+    3: render_inspiring_articles,
+    4: render_editorial_angles,
+    5: render_writing_params,
+    6: render_outline,
+    7: render_final_article,
+}
+
+
+@fragment
+def stage_view():
+    """
+    Vue de l'étape courante.
+
+    Une interaction qui reste dans l'étape (regénérer le plan ou l'article, télécharger...)
+    ne réexécute que ce fragment ; un changement d'étape réexécute toute l'application
+    pour mettre à jour la barre latérale.
+    """
+    track_degradations()
+    STAGE_VIEWS[st.session_state.stage]()
+
+    # Sauvegarde des résultats produits pendant cette exécution (ex: article final)
+    save_checkpoints()
+
+
+# Sidebar
+@fragment
+def technical_stats():
+    """
+    Statistiques techniques du processus (partagées entre toutes les sessions).
+
+    Calculées seulement à la demande ; « Actualiser » ne réexécute que ce fragment.
+    """
+    with st.expander("📊 Statistiques techniques"):
+        if not st.toggle("Afficher les compteurs", key="show_technical_stats"):
+            return
+        st.button("Actualiser", key="refresh_technical_stats")
+        st.markdown("**Client HTTP OpenAI**")
+        st.json(get_http_client().stats())
+        st.markdown("**Cache des réponses OpenAI**")
+        st.json(get_llm_cache().stats())
+        st.markdown("**Cache des pages scrapées**")
+        st.json({**scrape_stats(), **get_scrape_cache().stats()})
+        st.markdown("**Précalcul des étapes**")
+        st.json(prefetch_stats())
+        st.markdown("**Tâches d'arrière-plan**")
+        st.json(task_stats())
+        st.markdown("**Limiteur de débit OpenAI**")
+        st.json(get_rate_limiter().stats())
+        st.markdown("**Requêtes identiques regroupées**")
+        st.json(singleflight_stats())
+        st.download_button(
+            "Télécharger les métriques (JSON)",
+            data=json.dumps(registry.to_json(), ensure_ascii=False, indent=2),
+            file_name="metrics.json",
+            mime="application/json",
+        )
+
+
+STAGE_LABELS = [
+    "1️⃣ Données initiales",
+    "2️⃣ Choix du sujet",
+    "3️⃣ Articles inspirants",
+    "4️⃣ Angles éditoriaux",
+    "5️⃣ Paramètres de rédaction",
+    "6️⃣ Plan de l'article",
+    "7️⃣ Article final"
+]
+
+with st.sidebar:
+    st.image("https://via.placeholder.com/150x50?text=AI+Writer", width=150)
+    st.markdown("### Étapes du processus")
+
+    for i, stage in enumerate(STAGE_LABELS):
+        if i + 1 < st.session_state.stage:
+            st.success(stage)
+        elif i + 1 == st.session_state.stage:
+            st.info(stage)
+        else:
+            st.markdown(stage)
+
+    st.markdown("---")
+
+    # Bouton pour recommencer
+    if st.button("🔄 Recommencer"):
+        st.session_state.prefetcher.cancel()
+        get_task_registry().discard(st.session_state.workflow_id)
+        # L'ancien workflow n'est plus repris : ses points de reprise et son identifiant dans l'URL disparaissent
+        get_checkpoint_store().delete(st.session_state.workflow_id)
+        del st.query_params["wf"]
+        for key in st.session_state.keys():
+            if key != 'stage':
+                del st.session_state[key]
+        st.session_state.stage = 1
+        st.rerun()
+
+    technical_stats()
+
+# Affichage principal selon l'étape
+st.markdown("<h1 class='main-title'>🚀 Assistant de génération d'articles IA</h1>", unsafe_allow_html=True)
+stage_view()
+
 # Pied de page
 st.markdown("---")
 st.markdown(
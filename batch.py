@@ -0,0 +1,301 @@
+import argparse
+import csv
+import json
+import logging
+import math
+import os
+import re
+import sys
+import threading
+import time
+import unicodedata
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+from typing import Any, Dict, Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+from batch_api import BatchCollector, BatchPending, batch_requests
+from cache import cache_key
+from metrics import dump_metrics
+from pipeline import run_workflow
+from rate_limiter import PRIORITY_BATCH, request_priority
+
+logger = logging.getLogger(__name__)
+
+# Valeurs par défaut des colonnes optionnelles (identiques au formulaire de l'étape 5)
+ROW_DEFAULTS = {
+    "services": "",
+    "tone": "Professionnel",
+    "length": "Moyen (~600 mots)",
+    "style": "Blog",
+    "topic": "",
+    "angle": "",
+}
+
+STAGES = ["topic_ideas", "search", "editorial_angles", "outline", "scraping", "article"]
+
+# Nombre maximum de tours en mode Batch API (un lot pour les plans, un pour les articles, plus une marge)
+BATCH_MAX_ROUNDS = 4
+
+
+def read_rows(path: str) -> List[Dict[str, str]]:
+    """
+    Lit les demandes de génération depuis un fichier CSV ou JSONL.
+
+    Colonnes attendues : sector, keywords, et optionnellement services, tone, length,
+    style, topic et angle.
+
+    Args:
+        path (str): Chemin du fichier (.csv ou .jsonl)
+
+    Returns:
+        List[Dict[str, str]]: Lignes complétées par les valeurs par défaut
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            raw_rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            raw_rows = list(csv.DictReader(f))
+
+    rows = []
+    for raw_row in raw_rows:
+        row = {**ROW_DEFAULTS, **{k: str(v).strip() for k, v in raw_row.items() if k and v is not None}}
+        for key, default in ROW_DEFAULTS.items():
+            row[key] = row[key] or default
+        rows.append(row)
+    return rows
+
+
+def slugify(text: str, max_length: int = 60) -> str:
+    """
+    Transforme un titre en nom de fichier ASCII.
+    """
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    text = re.sub(r"[^a-zA-Z0-9]+", "-", text).strip("-").lower()
+    return text[:max_length].strip("-") or "article"
+
+
+def percentile(values: Iterable[float], pct: float) -> float:
+    """
+    Percentile par la méthode du rang le plus proche (0 si aucune valeur).
+    """
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def run_row(index: int, row: Dict[str, str], output_dir: str, resume: bool = False,
+            collector: Optional[BatchCollector] = None, run_id: Optional[str] = None,
+            timings: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """
+    Génère l'article d'une ligne et l'écrit en markdown dans `output_dir`.
+
+    Les erreurs sont capturées : une ligne en échec n'interrompt pas le lot.
+    Les appels OpenAI du lot passent après ceux des sessions interactives du même processus.
+    Avec `resume`, les étapes déjà terminées lors d'un précédent lancement sur la même ligne
+    sont reprises depuis les points de reprise.
+
+    Avec un collecteur Batch API (`collector`), la ligne s'arrête au premier appel différé vers
+    le lot (statut "deferred") ; elle reprend au tour suivant depuis ses points de reprise,
+    identifiés par `run_id` quand `resume` n'est pas demandé. Les durées des étapes s'ajoutent
+    alors d'un tour à l'autre dans `timings`.
+    """
+    started = time.perf_counter()
+    timings = {} if timings is None else timings
+
+    def on_stage(stage: str, seconds: float) -> None:
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+    if resume:
+        workflow_id = cache_key("batch", row)
+    elif run_id:
+        workflow_id = cache_key("batch", row, run_id)
+    else:
+        workflow_id = None
+    try:
+        with request_priority(PRIORITY_BATCH), batch_requests(collector) if collector else nullcontext():
+            result = run_workflow(
+                sector=row["sector"],
+                keywords=row["keywords"],
+                services=row["services"],
+                tone=row["tone"],
+                length=row["length"],
+                style=row["style"],
+                topic=row["topic"] or None,
+                angle=row["angle"] or None,
+                on_stage=on_stage,
+                workflow_id=workflow_id,
+            )
+    except BatchPending:
+        return {"index": index, "status": "deferred", "elapsed": time.perf_counter() - started, "timings": timings}
+    except Exception as e:
+        logger.exception("Ligne %d en échec", index)
+        return {
+            "index": index,
+            "status": "error",
+            "error": f"{type(e).__name__}: {e}",
+            "elapsed": time.perf_counter() - started,
+            "timings": {},
+        }
+
+    title = result["outline"].get("title") or result["topic"]
+    path = os.path.join(output_dir, f"{index:04d}_{slugify(title)}.md")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(result["article"])
+
+    return {
+        "index": index,
+        "status": "ok",
+        "path": path,
+        "topic": result["topic"],
+        "angle": result["angle"],
+        "elapsed": time.perf_counter() - started,
+        "timings": timings,
+        "resumed": result["resumed"],
+        "degradations": result["degradations"],
+    }
+
+
+def summarize(results: List[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """
+    Calcule le débit (articles/min) et les latences p50/p95 par étape.
+
+    En mode Batch API, les durées d'une ligne cumulent ses tours, hors attente des lots
+    (voir `batch_wait_seconds` dans le résumé de `run_batch`).
+    """
+    succeeded = [r for r in results if r["status"] == "ok"]
+
+    stages = {}
+    for stage in STAGES + ["total"]:
+        if stage == "total":
+            values = [r["elapsed"] for r in succeeded]
+        else:
+            values = [r["timings"][stage] for r in results if stage in r["timings"]]
+        if values:
+            stages[stage] = {
+                "count": len(values),
+                "p50": round(percentile(values, 50), 3),
+                "p95": round(percentile(values, 95), 3),
+            }
+
+    return {
+        "rows": len(results),
+        "succeeded": len(succeeded),
+        "failed": len(results) - len(succeeded),
+        "elapsed_seconds": round(elapsed, 3),
+        "articles_per_minute": round(len(succeeded) / elapsed * 60, 2) if elapsed else 0.0,
+        "stages": stages,
+    }
+
+
+def run_batch(rows: List[Dict[str, str]], output_dir: str, concurrency: int = 4,
+              resume: bool = False, batch_api: bool = False) -> Dict[str, Any]:
+    """
+    Génère les articles de toutes les lignes avec `concurrency` workflows en parallèle.
+
+    Chaque article est écrit dès qu'il est terminé ; les résultats par ligne sont
+    ajoutés au fil de l'eau dans `results.jsonl`. Les métriques détaillées (latences,
+    tokens, coût estimé par étape) sont écrites dans `metrics.json`.
+
+    Avec `batch_api`, les plans et les articles passent par la Batch API OpenAI, par tours :
+    les lignes s'exécutent jusqu'à leur premier appel différé, les requêtes collectées sont
+    soumises en un seul lot, puis les lignes reprennent depuis leurs points de reprise avec
+    les réponses du lot (un tour pour les plans, un pour les articles). Le résumé indique alors
+    chaque lot avec son temps d'attente, et le temps d'attente total (`batch_wait_seconds`).
+
+    Returns:
+        Dict[str, Any]: Résumé du lot (voir `summarize`)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    results = []
+    write_lock = threading.Lock()
+    started = time.perf_counter()
+    collector = BatchCollector() if batch_api else None
+    run_id = uuid.uuid4().hex if batch_api else None
+    pending = list(enumerate(rows))
+    rounds = []
+    # Cumul par ligne sur les tours Batch API : durées des étapes et temps de calcul
+    row_timings: Dict[int, Dict[str, float]] = {i: {} for i, _ in pending}
+    row_elapsed: Dict[int, float] = {i: 0.0 for i, _ in pending}
+
+    with open(os.path.join(output_dir, "results.jsonl"), "w", encoding="utf-8") as results_file:
+        def record(result: Dict[str, Any]) -> None:
+            results.append(result)
+            with write_lock:
+                results_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+                results_file.flush()
+            logger.info(
+                "[%d/%d] ligne %d : %s (%.1f s)",
+                len(results), len(rows), result["index"], result["status"], result["elapsed"]
+            )
+
+        while pending:
+            deferred = []
+            with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch") as executor:
+                futures = {
+                    executor.submit(run_row, i, row, output_dir, resume, collector, run_id,
+                                    row_timings[i]): (i, row)
+                    for i, row in pending
+                }
+                for future in as_completed(futures):
+                    result = future.result()
+                    row_elapsed[result["index"]] += result["elapsed"]
+                    result["elapsed"] = row_elapsed[result["index"]]
+                    if result["status"] == "deferred":
+                        deferred.append(futures[future])
+                    else:
+                        record(result)
+
+            if not deferred:
+                break
+            if len(rounds) >= BATCH_MAX_ROUNDS:
+                for i, _ in deferred:
+                    record({"index": i, "status": "error", "elapsed": row_elapsed[i], "timings": {},
+                            "error": f"Toujours en attente de la Batch API après {BATCH_MAX_ROUNDS} lots"})
+                break
+
+            logger.info("Tour %d : %d lignes en attente du lot OpenAI", len(rounds) + 1, len(deferred))
+            submitted = time.perf_counter()
+            batch = collector.submit()
+            batch["wait_seconds"] = round(time.perf_counter() - submitted, 3)
+            rounds.append(batch)
+            pending = sorted(deferred)
+
+    summary = summarize(results, time.perf_counter() - started)
+    if batch_api:
+        summary["batches"] = rounds
+        summary["batch_wait_seconds"] = round(sum(batch["wait_seconds"] for batch in rounds), 3)
+    with open(os.path.join(output_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    dump_metrics(os.path.join(output_dir, "metrics.json"))
+    return summary
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Génération d'articles en lot, sans interface Streamlit.")
+    parser.add_argument("input", help="Fichier CSV ou JSONL (sector, keywords, services, tone, length, style)")
+    parser.add_argument("-o", "--output-dir", default="articles", help="Dossier de sortie des articles markdown")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Nombre de workflows simultanés")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reprendre les étapes déjà terminées lors d'un lancement précédent (points de reprise)")
+    parser.add_argument("--batch-api", action="store_true",
+                        help="Générer plans et articles via la Batch API OpenAI (moitié prix, résultat sous 24 h)")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    rows = read_rows(args.input)
+    summary = run_batch(rows, args.output_dir, max(1, args.concurrency), resume=args.resume,
+                        batch_api=args.batch_api)
+
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from http_client import get_http_client
+from metrics import registry
+from settings import env_float
+
+logger = logging.getLogger(__name__)
+
+# Étapes dont les appels OpenAI passent par la Batch API (plan et rédaction de l'article)
+DEFAULT_BATCH_STAGES = ("article_outline", "article")
+
+# Point d'entrée des requêtes du lot et délai de traitement demandé
+BATCH_ENDPOINT = "/v1/chat/completions"
+BATCH_COMPLETION_WINDOW = "24h"
+
+# États d'un lot après lesquels il n'évolue plus
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+# Collecteur du lot en cours de constitution (None hors mode Batch API) ; propagé aux workers via copy_context
+current_batch: contextvars.ContextVar = contextvars.ContextVar("current_batch", default=None)
+
+
+class BatchPending(Exception):
+    """
+    La réponse de l'appel OpenAI sera fournie par un lot pas encore soumis : le workflow s'arrête
+    et reprendra, depuis ses points de reprise, une fois le lot terminé.
+    """
+
+
+class BatchError(Exception):
+    """
+    Lot en échec, expiré ou non terminé à temps, ou requête du lot en erreur.
+    """
+
+
+class BatchClient:
+    """
+    Client de la Batch API OpenAI : dépôt du fichier JSONL, création du lot, suivi et lecture des résultats.
+
+    Utilise le client HTTP partagé et la même configuration que les appels directs
+    (OPENAI_API_BASE, OPENAI_API_KEY), ce qui permet de le tester contre `mock_server.py`.
+    """
+
+    def __init__(self, api_base: Optional[str] = None, api_key: Optional[str] = None):
+        # Import local : pipeline importe ce module
+        from pipeline import DEFAULT_OPENAI_API_BASE
+
+        self.api_base = (api_base or os.environ.get("OPENAI_API_BASE", DEFAULT_OPENAI_API_BASE)).rstrip("/")
+        self.api_key = api_key if api_key is not None else os.environ.get("OPENAI_API_KEY", "")
+        if not self.api_key:
+            raise BatchError("Clé API OpenAI non trouvée. Veuillez configurer votre clé API.")
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.api_key}"}
+
+    def _json(self, method: str, path: str, **kwargs: Any) -> Dict[str, Any]:
+        response = get_http_client().request(method, f"{self.api_base}{path}", headers=self.headers, **kwargs)
+        response.raise_for_status()
+        return response.json()
+
+    def upload(self, content: str, filename: str = "batch.jsonl") -> str:
+        """
+        Dépose le fichier JSONL des requêtes et retourne son identifiant.
+        """
+        uploaded = self._json("POST", "/files", data={"purpose": "batch"},
+                              files={"file": (filename, content.encode("utf-8"), "application/jsonl")})
+        return uploaded["id"]
+
+    def create(self, input_file_id: str) -> Dict[str, Any]:
+        return self._json("POST", "/batches", json={
+            "input_file_id": input_file_id,
+            "endpoint": BATCH_ENDPOINT,
+            "completion_window": BATCH_COMPLETION_WINDOW,
+        })
+
+    def retrieve(self, batch_id: str) -> Dict[str, Any]:
+        return self._json("GET", f"/batches/{batch_id}")
+
+    def content(self, file_id: str) -> str:
+        response = get_http_client().get(f"{self.api_base}/files/{file_id}/content", headers=self.headers)
+        response.raise_for_status()
+        return response.text
+
+
+def build_batch_file(requests: Dict[str, Dict[str, Any]]) -> str:
+    """
+    Fichier JSONL du lot : une ligne par requête, identifiée par sa clé (`custom_id`).
+    """
+    return "".join(
+        json.dumps({"custom_id": key, "method": "POST", "url": BATCH_ENDPOINT, "body": body},
+                   ensure_ascii=False) + "\n"
+        for key, body in requests.items()
+    )
+
+
+def parse_batch_output(lines: Iterable[str]) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """
+    Lit un fichier de résultats (ou d'erreurs) d'un lot.
+
+    Returns:
+        Tuple[Dict, Dict]: Réponses des requêtes réussies et messages d'erreur, par clé
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    errors: Dict[str, str] = {}
+    for line in lines:
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        response = item.get("response") or {}
+        if response.get("status_code") == 200 and not item.get("error"):
+            results[item["custom_id"]] = response["body"]
+        else:
+            error = item.get("error") or (response.get("body") or {}).get("error") or {}
+            errors[item["custom_id"]] = error.get("message") or f"HTTP {response.get('status_code')}"
+    return results, errors
+
+
+def run_batch_requests(requests: Dict[str, Dict[str, Any]], client: Optional[BatchClient] = None,
+                       poll_interval: Optional[float] = None,
+                       timeout: Optional[float] = None) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, str]]:
+    """
+    Soumet des requêtes chat/completions à la Batch API et attend le résultat du lot.
+
+    Intervalle de suivi : OPENAI_BATCH_POLL_INTERVAL (30 secondes) ; attente maximale :
+    OPENAI_BATCH_TIMEOUT (26 heures, soit le délai de traitement de 24 h plus une marge).
+
+    Args:
+        requests (Dict): Corps des requêtes, par clé
+        client (Optional[BatchClient]): Client de la Batch API
+        poll_interval (Optional[float]): Intervalle entre deux consultations de l'état du lot
+        timeout (Optional[float]): Attente maximale du lot
+
+    Returns:
+        Tuple[Dict, Dict]: Réponses par clé, et messages d'erreur des requêtes sans réponse
+    """
+    client = client or BatchClient()
+    poll_interval = poll_interval if poll_interval is not None else env_float("OPENAI_BATCH_POLL_INTERVAL", 30)
+    timeout = timeout if timeout is not None else env_float("OPENAI_BATCH_TIMEOUT", 26 * 3600)
+
+    started = time.monotonic()
+    batch = client.create(client.upload(build_batch_file(requests)))
+    logger.info("Lot %s soumis (%d requêtes)", batch["id"], len(requests))
+
+    while batch["status"] not in TERMINAL_STATUSES:
+        if time.monotonic() - started > timeout:
+            raise BatchError(f"Lot {batch['id']} non terminé après {timeout:.0f} s (état : {batch['status']})")
+        time.sleep(poll_interval)
+        batch = client.retrieve(batch["id"])
+        counts = batch.get("request_counts") or {}
+        logger.info("Lot %s : %s (%s/%s requêtes)", batch["id"], batch["status"],
+                    counts.get("completed", 0), counts.get("total", len(requests)))
+
+    results: Dict[str, Dict[str, Any]] = {}
+    errors: Dict[str, str] = {}
+    for file_field in ("output_file_id", "error_file_id"):
+        if batch.get(file_field):
+            file_results, file_errors = parse_batch_output(client.content(batch[file_field]).splitlines())
+            results.update(file_results)
+            errors.update(file_errors)
+    for key in requests:
+        if key not in results and key not in errors:
+            errors[key] = f"Pas de réponse dans le lot {batch['id']} (état : {batch['status']})"
+
+    elapsed = time.monotonic() - started
+    registry.observe("openai_batch_duration_seconds", elapsed, help="Durée des lots Batch API (soumission à résultat)",
+                     status=batch["status"])
+    registry.inc("openai_batch_requests_total", len(results), help="Requêtes soumises à la Batch API", outcome="ok")
+    registry.inc("openai_batch_requests_total", len(errors), help="Requêtes soumises à la Batch API", outcome="error")
+    logger.info("Lot %s %s en %.1f s : %d réponses, %d erreurs", batch["id"], batch["status"], elapsed,
+                len(results), len(errors))
+    return results, errors
+
+
+class BatchCollector:
+    """
+    Requêtes OpenAI différées vers la Batch API, et réponses déjà reçues.
+
+    Pendant un tour du lot, chaque appel d'une étape concernée (`stages`) est enregistré au lieu
+    d'être envoyé, et le workflow s'interrompt (`BatchPending`). `submit` envoie ensuite toutes
+    les requêtes en un seul lot ; au tour suivant, les mêmes appels reçoivent leur réponse.
+    """
+
+    def __init__(self, stages: Iterable[str] = DEFAULT_BATCH_STAGES):
+        self.stages = set(stages)
+        self._requests: Dict[str, Dict[str, Any]] = {}
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._errors: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def handles(self, stage: str) -> bool:
+        return stage in self.stages
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._requests)
+
+    def resolve(self, key: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Retourne la réponse de la requête si le lot l'a déjà fournie ; sinon l'ajoute au prochain lot.
+
+        Lève `BatchPending` si la réponse n'est pas encore disponible, et `BatchError`
+        si la requête a échoué dans le lot.
+
+        Args:
+            key (str): Clé de la requête (celle du cache des réponses OpenAI)
+            body (Dict): Corps de la requête chat/completions, sans streaming
+        """
+        with self._lock:
+            if key in self._results:
+                return self._results[key]
+            if key in self._errors:
+                raise BatchError(f"Requête en échec dans le lot OpenAI : {self._errors[key]}")
+            self._requests.setdefault(key, body)
+        raise BatchPending(key)
+
+    def submit(self, client: Optional[BatchClient] = None, **kwargs: Any) -> Dict[str, int]:
+        """
+        Soumet les requêtes en attente en un lot et en attend les réponses (voir `run_batch_requests`).
+
+        Si le lot lui-même échoue, toutes ses requêtes sont marquées en erreur : les workflows
+        concernés échouent au tour suivant au lieu d'être relancés indéfiniment.
+
+        Returns:
+            Dict[str, int]: Nombre de requêtes soumises, de réponses et d'erreurs
+        """
+        with self._lock:
+            requests, self._requests = self._requests, {}
+        if not requests:
+            return {"submitted": 0, "completed": 0, "failed": 0}
+
+        try:
+            results, errors = run_batch_requests(requests, client=client, **kwargs)
+        except Exception as e:
+            logger.exception("Lot OpenAI en échec")
+            results, errors = {}, {key: f"{type(e).__name__}: {e}" for key in requests}
+
+        with self._lock:
+            self._results.update(results)
+            self._errors.update(errors)
+        return {"submitted": len(requests), "completed": len(results), "failed": len(errors)}
+
+
+@contextmanager
+def batch_requests(collector: BatchCollector) -> Iterator[BatchCollector]:
+    """
+    Fait passer les appels OpenAI des étapes du collecteur par la Batch API pendant le bloc.
+    """
+    token = current_batch.set(collector)
+    try:
+        yield collector
+    finally:
+        current_batch.reset(token)
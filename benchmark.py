@@ -0,0 +1,490 @@
+import argparse
+import dataclasses
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+from unittest import mock
+
+from batch import percentile
+from mock_server import MockConfig, start_mock_server
+from settings import env_float
+
+# Données d'exemple partagées par les cas de benchmark
+SECTOR = "santé"
+KEYWORDS = "intelligence artificielle, diagnostic"
+SERVICES = "logiciel d'aide au diagnostic"
+TOPIC = "L'intelligence artificielle au service du diagnostic médical"
+ANGLE = "Analytique"
+TONE, LENGTH, STYLE = "Professionnel", "Moyen (~600 mots)", "Blog"
+OUTLINE = {
+    "title": "L'IA et le diagnostic médical",
+    "introduction": "Contexte et enjeux.",
+    "sections": [{"title": f"Partie {i}", "subsections": ["Point A", "Point B"]} for i in range(1, 4)],
+    "conclusion": "Synthèse.",
+}
+
+
+class Measures(dict):
+    """
+    Mesures complémentaires retournées par un cas (ex: {"ttft": 0.12}), en secondes.
+    """
+
+
+def configure_environment(base_url: str, with_cache: bool = False) -> None:
+    """
+    Fait pointer le pipeline vers le serveur simulé et désactive les optimisations
+    qui masqueraient le coût réel des appels (cache, précalcul).
+    """
+    os.environ["OPENAI_API_KEY"] = "mock-key"
+    os.environ["NEWSAPI_KEY"] = "mock-key"
+    os.environ["OPENAI_API_BASE"] = f"{base_url}/v1"
+    os.environ["NEWSAPI_BASE_URL"] = f"{base_url}/v2"
+    os.environ["BING_SEARCH_BASE_URL"] = base_url
+    os.environ["SERPAPI_BASE_URL"] = base_url
+    os.environ["PREFETCH_ENABLED"] = "0"
+    # Le serveur simulé n'a pas de quota : limiteur de débit désactivé sauf configuration explicite
+    os.environ.setdefault("OPENAI_RPM_LIMIT", "0")
+    os.environ.setdefault("OPENAI_TPM_LIMIT", "0")
+    if not with_cache:
+        os.environ["LLM_CACHE_STAGES"] = ""
+        os.environ["SEARCH_CACHE_TTL"] = "0"
+
+
+def stage_cases(base_url: str) -> List[Tuple[str, Callable[[], Any]]]:
+    """
+    Cas mesurés : une fonction de génération par cas, de `generate_topic_ideas` à `generate_article`.
+
+    Un cas peut retourner des `Measures` complémentaires (ex: time-to-first-token).
+    """
+    import pipeline
+
+    recent_articles = [
+        {"title": f"Actualité {i}", "url": f"{base_url}/articles/bench-{i}", "summary": "Résumé.", "date": ""}
+        for i in range(1, 4)
+    ]
+    processed_articles = [
+        {**article, "original_content": "Contenu de l'article. " * 50, "summary": "Résumé de l'article."}
+        for article in recent_articles
+    ]
+
+    def article_stream() -> Measures:
+        started = time.perf_counter()
+        chunks = pipeline.generate_article(OUTLINE, TOPIC, ANGLE, TONE, LENGTH, STYLE,
+                                           processed_articles=processed_articles, stream=True)
+        first_chunk = next(iter(chunks), None)
+        ttft = time.perf_counter() - started
+        for _ in chunks:
+            pass
+        return Measures(ttft=ttft) if first_chunk is not None else Measures()
+
+    return [
+        ("generate_topic_ideas", lambda: pipeline.generate_topic_ideas(SECTOR, KEYWORDS, SERVICES)),
+        ("search_recent_articles", lambda: pipeline.search_recent_articles(TOPIC, SECTOR, KEYWORDS)),
+        ("simulate_search_with_openai", lambda: pipeline.simulate_search_with_openai(TOPIC)),
+        ("generate_editorial_angles", lambda: pipeline.generate_editorial_angles(TOPIC, SECTOR)),
+        ("generate_article_outline",
+         lambda: pipeline.generate_article_outline(TOPIC, ANGLE, TONE, LENGTH, STYLE)),
+        ("scrape_and_summarize_article", lambda: pipeline.scrape_and_summarize_article(recent_articles[0]["url"])),
+        ("process_articles_for_generation", lambda: pipeline.process_articles_for_generation(recent_articles)),
+        ("generate_article_with_context",
+         lambda: pipeline.generate_article_with_context(TOPIC, ANGLE, processed_articles)),
+        ("generate_article",
+         lambda: pipeline.generate_article(OUTLINE, TOPIC, ANGLE, TONE, LENGTH, STYLE,
+                                           processed_articles=processed_articles)),
+        ("generate_article (stream)", article_stream),
+        ("generate_article (long, single)",
+         lambda: pipeline.generate_article(OUTLINE, TOPIC, ANGLE, TONE, "Long (~1200 mots)", STYLE,
+                                           processed_articles=processed_articles, mode="single")),
+        ("generate_article (long, sections)",
+         lambda: pipeline.generate_article(OUTLINE, TOPIC, ANGLE, TONE, "Long (~1200 mots)", STYLE,
+                                           processed_articles=processed_articles, mode="parallel")),
+        ("run_workflow", lambda: pipeline.run_workflow(SECTOR, KEYWORDS, SERVICES)),
+    ]
+
+
+def measure(name: str, fn: Callable[[], Any], iterations: int, concurrency: int) -> Dict[str, Any]:
+    """
+    Exécute `fn` `iterations` fois avec `concurrency` appels simultanés.
+
+    Returns:
+        Dict[str, Any]: Latences (moyenne, p50, p95, max), erreurs et débit en appels/s
+    """
+    latencies: List[float] = []
+    extras: Dict[str, List[float]] = {}
+    errors: List[str] = []
+
+    def run_once() -> None:
+        started = time.perf_counter()
+        try:
+            extra = fn()
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+            return
+        latencies.append(time.perf_counter() - started)
+        if isinstance(extra, Measures):
+            for key, value in extra.items():
+                extras.setdefault(key, []).append(value)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(run_once) for _ in range(iterations)]:
+            future.result()
+    wall = time.perf_counter() - started
+
+    return summarize(name, iterations, latencies, extras, errors, wall)
+
+
+def summarize(name: str, calls: int, latencies: List[float], extras: Dict[str, List[float]], errors: List[str],
+              wall: float) -> Dict[str, Any]:
+    """
+    Résume les mesures d'un cas : latences (moyenne, p50, p95, max), erreurs, débit et mesures complémentaires.
+    """
+    result = {
+        "name": name,
+        "calls": calls,
+        "errors": len(errors),
+        "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "max": max(latencies) if latencies else 0.0,
+        "throughput": len(latencies) / wall if wall else 0.0,
+    }
+    for key, values in extras.items():
+        result[f"{key}_p50"] = percentile(values, 50)
+        result[f"{key}_p95"] = percentile(values, 95)
+    if errors:
+        result["first_error"] = errors[0]
+    return result
+
+
+def run_stages_suite(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """
+    Mesure chaque fonction de génération contre le serveur simulé.
+    """
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server = start_mock_server(MockConfig(
+            latency=args.latency,
+            token_latency=args.token_latency,
+            error_rate=args.error_rate,
+            error_status=args.error_status,
+        ))
+        base_url = server.url
+
+    configure_environment(base_url, with_cache=args.with_cache)
+
+    try:
+        results = []
+        for name, fn in stage_cases(base_url):
+            if args.only and not any(selected in name for selected in args.only):
+                continue
+            results.append(measure(name, fn, args.iterations, args.concurrency))
+        return results
+    finally:
+        if server is not None:
+            server.shutdown()
+
+
+# Script exécuté dans un processus neuf pour simuler le démarrage d'un conteneur
+COLD_START_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported = time.perf_counter()
+at = AppTest.from_file(sys.argv[1], default_timeout=60).run()
+rendered = time.perf_counter()
+print(json.dumps({"import": imported - started, "render": rendered - imported, "errors": len(at.exception)}))
+"""
+
+
+def run_startup_suite(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """
+    Mesure le temps jusqu'au premier affichage de l'application (étape 1) :
+
+    - nouveau conteneur : processus Python neuf (imports compris) ;
+    - nouvelle session : nouvelle session dans un processus déjà démarré ;
+    - rerun : nouvelle exécution du script dans une session existante.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+    def cold_start() -> Measures:
+        # Lancé depuis le dossier de l'application, pour importer ses modules quel que soit le dossier courant
+        output = subprocess.run([sys.executable, "-c", COLD_START_SCRIPT, app_path],
+                                capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.abspath(app_path)))
+        result = json.loads(output.stdout.strip().splitlines()[-1])
+        if result["errors"]:
+            raise RuntimeError(f"{result['errors']} exception(s) au premier affichage")
+        return Measures(imports=result["import"], render=result["render"])
+
+    def new_session() -> AppTest:
+        at = AppTest.from_file(app_path, default_timeout=60).run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        return at
+
+    # Préchauffage du processus courant, comme un conteneur ayant déjà servi une session
+    session = new_session()
+
+    cases = [
+        ("nouveau conteneur", cold_start),
+        ("nouvelle session", lambda: new_session() and None),
+        ("rerun", lambda: session.run() and None),
+    ]
+    return [
+        measure(name, fn, args.iterations, 1)
+        for name, fn in cases
+        if not args.only or any(selected in name for selected in args.only)
+    ]
+
+
+# Budget de temps CPU serveur par interaction (ms), au-delà duquel le cas est compté en erreur
+DEFAULT_INTERACTION_CPU_BUDGET_MS = 150.0
+
+# Session d'exemple : toutes les étapes déjà calculées, pour ne mesurer que le coût de l'interface
+INTERACTION_SESSION = {
+    "sector": SECTOR,
+    "keywords": KEYWORDS,
+    "services": SERVICES,
+    "topic_ideas": [TOPIC] + [f"Idée de sujet {i}" for i in range(2, 6)],
+    "selected_topic": TOPIC,
+    "recent_articles": [
+        {"title": f"Actualité {i}", "url": f"https://example.com/article-{i}", "summary": "Résumé. " * 20,
+         "date": "2025-01-01"}
+        for i in range(1, 6)
+    ],
+    "editorial_angles": [ANGLE] + [f"Angle {i}" for i in range(2, 6)],
+    "selected_angle": ANGLE,
+    "selected_tone": TONE,
+    "selected_length": LENGTH,
+    "selected_style": STYLE,
+    "article_outline": OUTLINE,
+    "final_article": "# L'IA et le diagnostic médical\n\n" + "Paragraphe de l'article final. " * 120,
+}
+
+
+def fragment_script_runner(session: Dict[str, Any]) -> type:
+    """
+    Exécuteur de script AppTest qui traite les fragments comme le navigateur.
+
+    AppTest (Streamlit 1.35) réexécute toujours tout le script : ici les fragments enregistrés sont
+    conservés d'une exécution à l'autre, et l'exécution suivante se limite au fragment
+    `session["fragment_id"]` s'il est renseigné. Le dernier exécuteur créé est placé dans `session["runner"]`.
+    """
+    from streamlit.runtime.fragment import MemoryFragmentStorage
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    storage = MemoryFragmentStorage()
+
+    class FragmentScriptRunner(LocalScriptRunner):
+        def __init__(self, *args: Any, **kwargs: Any):
+            super().__init__(*args, **kwargs)
+            self._fragment_storage = storage
+            session["runner"] = self
+
+        def request_rerun(self, rerun_data: Any) -> bool:
+            fragment_id = session.pop("fragment_id", None)
+            if fragment_id:
+                rerun_data = dataclasses.replace(rerun_data, fragment_id_queue=[fragment_id])
+            return super().request_rerun(rerun_data)
+
+    return FragmentScriptRunner
+
+
+def widget_fragment(runner: Any, widget_id: str) -> str:
+    """
+    Fragment dans lequel le widget `widget_id` a été affiché lors de la dernière exécution ("" hors fragment).
+    """
+    for msg in runner.forward_msgs():
+        if msg.WhichOneof("type") != "delta" or msg.delta.WhichOneof("type") != "new_element":
+            continue
+        element = msg.delta.new_element
+        if getattr(getattr(element, element.WhichOneof("type")), "id", None) == widget_id:
+            return msg.delta.fragment_id
+    return ""
+
+
+def full_script_runs(runner: Any) -> int:
+    """
+    Nombre d'exécutions complètes du script (hors réexécutions de fragments) par l'exécuteur.
+    """
+    from streamlit.runtime.scriptrunner import ScriptRunnerEvent
+
+    return sum(
+        1 for event, data in zip(runner.events, runner.event_data)
+        if event == ScriptRunnerEvent.SCRIPT_STARTED and not data.get("fragment_ids_this_run")
+    )
+
+
+def run_interaction_suite(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """
+    Mesure le temps CPU consommé par le serveur pour chaque interaction de l'interface
+    (changement d'étape, affichage des statistiques), toutes les étapes étant déjà calculées.
+
+    Une interaction qui dépasse le budget (--cpu-budget, en ms) est comptée en erreur :
+    le budget fixe le nombre de sessions qu'un réplica peut servir.
+
+    Les interactions dans un fragment (regénérer le plan ou l'article, actualiser les statistiques)
+    sont rejouées comme dans le navigateur : une réexécution complète du script est comptée en
+    erreur. Chacune est suivie de la même interaction en réexécution complète (« script complet »),
+    mesurée pour comparaison sans budget.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    server = start_mock_server()
+    configure_environment(server.url)
+    # Points de reprise en mémoire : la session d'exemple ne pollue pas la base locale
+    os.environ.setdefault("CHECKPOINT_DB", ":memory:")
+    budget = args.cpu_budget / 1000
+    # Sources servies par le serveur simulé, pour les interactions qui relancent la rédaction
+    session_state = {
+        **INTERACTION_SESSION,
+        "recent_articles": [
+            {**article, "url": f"{server.url}/articles/bench-{i}"}
+            for i, article in enumerate(INTERACTION_SESSION["recent_articles"], start=1)
+        ],
+    }
+    session: Dict[str, Any] = {}
+
+    def button(at: AppTest, label: str) -> Any:
+        return next(b for b in at.button if b.label == label)
+
+    def click(label: str) -> Callable[[AppTest], None]:
+        return lambda at: button(at, label).click().run()
+
+    def click_in_fragment(label: str) -> Callable[[AppTest], None]:
+        def interact(at: AppTest) -> None:
+            widget = button(at, label)
+            session["fragment_id"] = widget_fragment(session["runner"], widget.id)
+            if not session["fragment_id"]:
+                raise RuntimeError(f"« {label} » n'est pas affiché dans un fragment")
+            widget.click().run()
+        return interact
+
+    # (nom, étape de départ, état de session complémentaire, interaction, mode) ; mode "script" :
+    # réexécution complète, "fragment" : seul le fragment doit être réexécuté, "référence" : hors budget
+    cases = [
+        ("étape 2 → 3 : choisir un sujet", 2, {}, click("Choisir"), "script"),
+        ("étape 3 → 4 : continuer", 3, {}, click("Continuer →"), "script"),
+        ("étape 4 → 5 : choisir un angle", 4, {}, click("Choisir"), "script"),
+        ("étape 5 → 6 : générer le plan", 5, {}, click("Générer le plan"), "script"),
+        ("étape 6 → 7 : valider le plan", 6, {}, click("✅ Valider le plan"), "script"),
+        ("étape 7 → 6 : retour au plan", 7, {}, click("← Retour au plan"), "script"),
+        ("étape 7 : statistiques techniques", 7, {}, lambda at: at.toggle[0].set_value(True).run(), "script"),
+    ]
+    for name, stage, state, label in [
+        ("étape 6 : regénérer le plan", 6, {}, "🔄 Regénérer le plan"),
+        ("étape 7 : regénérer l'article", 7, {}, "🔄 Regénérer l'article"),
+        ("statistiques : actualiser", 7, {"show_technical_stats": True}, "Actualiser"),
+    ]:
+        cases.append((name, stage, state, click_in_fragment(label), "fragment"))
+        cases.append((f"{name} (script complet)", stage, state, click(label), "référence"))
+
+    results = []
+    try:
+        for name, stage, state, interact, mode in cases:
+            if args.only and not any(selected in name for selected in args.only):
+                continue
+            latencies: List[float] = []
+            cpu: List[float] = []
+            errors: List[str] = []
+            started = time.perf_counter()
+            # Une première interaction non mesurée : imports différés (ex: trafilatura au premier scraping)
+            for iteration in range(args.iterations + 1):
+                session.clear()
+                with mock.patch("streamlit.testing.v1.app_test.LocalScriptRunner", fragment_script_runner(session)):
+                    # Préparation non mesurée : session à l'étape de départ, déjà affichée une fois
+                    at = AppTest.from_file(app_path, default_timeout=60).run()
+                    for key, value in {**session_state, **state, "stage": stage}.items():
+                        at.session_state[key] = value
+                    at.run()
+
+                    wall_started, cpu_started = time.perf_counter(), time.process_time()
+                    try:
+                        interact(at)
+                    except Exception as e:
+                        errors.append(f"{type(e).__name__}: {e}")
+                        continue
+                if not iteration:
+                    started = time.perf_counter()
+                    continue
+                latencies.append(time.perf_counter() - wall_started)
+                cpu.append(time.process_time() - cpu_started)
+                if at.exception:
+                    errors.append(at.exception[0].message)
+                elif mode == "fragment" and full_script_runs(session["runner"]):
+                    errors.append("réexécution complète du script au lieu du seul fragment")
+                elif cpu[-1] > budget and mode != "référence":
+                    errors.append(f"budget CPU dépassé : {cpu[-1] * 1000:.1f} ms > {args.cpu_budget:.0f} ms")
+            results.append(summarize(name, args.iterations, latencies, {"cpu": cpu}, errors,
+                                     time.perf_counter() - started))
+        return results
+    finally:
+        server.shutdown()
+
+
+SUITES = {
+    "stages": run_stages_suite,
+    "startup": run_startup_suite,
+    "interaction": run_interaction_suite,
+}
+
+
+def format_report(results: List[Dict[str, Any]]) -> str:
+    """
+    Met en forme les résultats en tableau (latences en millisecondes).
+    """
+    header = f"{'cas':<46}{'appels':>7}{'err.':>6}{'moy.':>9}{'p50':>9}{'p95':>9}{'max':>9}{'débit/s':>9}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r['name']:<46}{r['calls']:>7}{r['errors']:>6}"
+            f"{r['mean'] * 1000:>9.1f}{r['p50'] * 1000:>9.1f}{r['p95'] * 1000:>9.1f}"
+            f"{r['max'] * 1000:>9.1f}{r['throughput']:>9.2f}"
+        )
+        extras = [f"{k}={v * 1000:.1f}ms" for k, v in r.items() if k.endswith(("_p50", "_p95")) and k not in ("p50", "p95")]
+        if extras:
+            lines.append(f"{'':<46}{' '.join(extras)}")
+        if r.get("first_error"):
+            lines.append(f"{'':<46}erreur: {r['first_error'][:80]}")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks de latence du pipeline contre des API simulées.")
+    parser.add_argument("--suite", choices=sorted(SUITES), default="stages")
+    parser.add_argument("-n", "--iterations", type=int, default=10, help="Appels par cas")
+    parser.add_argument("-c", "--concurrency", type=int, default=1, help="Appels simultanés")
+    parser.add_argument("--only", nargs="*", help="Ne mesurer que les cas dont le nom contient ces termes")
+    parser.add_argument("--latency", default="fixed:0", help="Latence simulée (ex: lognormal:-1.5,0.5)")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Délai de génération par fragment (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Proportion de requêtes en erreur")
+    parser.add_argument("--error-status", type=int, default=500, help="Code HTTP des erreurs simulées")
+    parser.add_argument("--base-url", help="Utiliser un serveur simulé déjà lancé (ex: http://127.0.0.1:8089)")
+    parser.add_argument("--with-cache", action="store_true", help="Laisser le cache des réponses OpenAI actif")
+    parser.add_argument("--cpu-budget", type=float,
+                        default=env_float("INTERACTION_CPU_BUDGET_MS", DEFAULT_INTERACTION_CPU_BUDGET_MS),
+                        help="Suite interaction : budget de temps CPU serveur par interaction (ms)")
+    parser.add_argument("--json", help="Écrire les résultats bruts dans ce fichier")
+    args = parser.parse_args(argv)
+
+    results = SUITES[args.suite](args)
+    print(format_report(results))
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+
+    return 1 if any(r["errors"] for r in results) and not args.error_rate else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from settings import env_float, env_int
+
+
+def cache_key(*parts: Any) -> str:
+    """
+    Calcule une clé de cache adressée par le contenu (SHA-256 des paramètres).
+
+    Args:
+        *parts: Paramètres sérialisables en JSON identifiant la requête
+
+    Returns:
+        str: Empreinte hexadécimale
+    """
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TieredCache:
+    """
+    Cache clé/valeur à deux niveaux : un LRU en mémoire devant un stockage
+    persistant sur disque (un fichier JSON par entrée).
+
+    Chaque entrée a une durée de vie (TTL). Le niveau disque est borné en octets :
+    au-delà, les fichiers les moins récemment utilisés sont supprimés.
+    """
+
+    def __init__(
+            self,
+            directory: Optional[str],
+            memory_entries: int = 256,
+            max_bytes: int = 100 * 1024 * 1024,
+            ttl: float = 24 * 3600,
+    ):
+        self.directory = directory
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes: Optional[int] = None
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "expired": 0,
+            "writes": 0,
+            "evictions": 0,
+        }
+
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+
+    # Niveau disque
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _scan_disk_bytes(self) -> int:
+        total = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    try:
+                        total += os.path.getsize(os.path.join(root, name))
+                    except OSError:
+                        pass
+        return total
+
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            # Marquer l'entrée comme récemment utilisée pour l'éviction LRU
+            os.utime(path, None)
+            return entry
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, key: str, entry: Dict[str, Any]) -> None:
+        if not self.directory:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+        previous_size = os.path.getsize(path) if os.path.exists(path) else 0
+
+        # Écriture atomique pour ne jamais exposer un fichier partiel
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        if self._disk_bytes is None:
+            self._disk_bytes = self._scan_disk_bytes()
+        else:
+            self._disk_bytes += len(data) - previous_size
+
+        if self._disk_bytes > self.max_bytes:
+            self._evict_disk()
+
+    def _delete_disk(self, key: str) -> None:
+        if not self.directory:
+            return
+        path = self._path(key)
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+            if self._disk_bytes is not None:
+                self._disk_bytes -= size
+        except OSError:
+            pass
+
+    def _evict_disk(self) -> None:
+        """
+        Supprime les fichiers les moins récemment utilisés jusqu'à repasser sous 90 % du plafond.
+        """
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, path))
+
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        target = self.max_bytes * 0.9
+
+        for _, size, path in files:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                self._counters["evictions"] += 1
+            except OSError:
+                pass
+
+        self._disk_bytes = total
+
+    # Niveau mémoire
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    # API publique
+
+    def _lookup(self, key: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        # Appelé verrou tenu ; une seule consultation comptée par recherche
+        entry = self._memory.get(key)
+        tier = "memory_hits"
+        if entry is None:
+            entry = self._read_disk(key)
+            tier = "disk_hits"
+
+        if entry is None:
+            self._counters["misses"] += 1
+            return None, False
+
+        if entry["expires"] < time.time():
+            self._counters["expired"] += 1
+            self._counters["misses"] += 1
+            return entry, False
+
+        self._counters[tier] += 1
+        return entry, True
+
+    def get_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Retourne l'entrée brute (valeur, date de création, expiration), même expirée.
+
+        Utile pour revalider une entrée périmée plutôt que de la recalculer. Comptée comme
+        `get` : un succès si l'entrée est fraîche, un échec sinon.
+        """
+        with self._lock:
+            entry, _ = self._lookup(key)
+            if entry is not None:
+                self._remember(key, entry)
+            return entry
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Retourne la valeur en cache si elle existe et n'a pas expiré, sinon None.
+        """
+        with self._lock:
+            entry, fresh = self._lookup(key)
+            if not fresh:
+                self._memory.pop(key, None)
+                return None
+
+            self._remember(key, entry)
+            return entry["value"]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Enregistre une valeur (sérialisable en JSON) dans les deux niveaux.
+        """
+        now = time.time()
+        entry = {
+            "value": value,
+            "created": now,
+            "expires": now + (self.ttl if ttl is None else ttl),
+        }
+        with self._lock:
+            self._remember(key, entry)
+            self._write_disk(key, entry)
+            self._counters["writes"] += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._memory.pop(key, None)
+            self._delete_disk(key)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retourne les compteurs de succès/échecs par niveau et l'occupation du cache.
+        """
+        with self._lock:
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+            lookups = hits + self._counters["misses"]
+            if self.directory and self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk_bytes()
+            return {
+                **self._counters,
+                "hit_ratio": round(hits / lookups, 3) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_bytes": self._disk_bytes or 0,
+            }
+
+
+# Étapes dont les réponses OpenAI sont mises en cache par défaut
+DEFAULT_LLM_CACHE_STAGES = "topic_ideas,editorial_angles,article_outline,simulated_search,article_summary"
+
+_llm_cache: Optional[TieredCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> TieredCache:
+    """
+    Retourne le cache des réponses OpenAI du processus, créé au premier appel.
+    """
+    global _llm_cache
+
+    if _llm_cache is None:
+        with _llm_cache_lock:
+            if _llm_cache is None:
+                _llm_cache = TieredCache(
+                    directory=os.environ.get("LLM_CACHE_DIR", os.path.join(".cache", "llm")) or None,
+                    memory_entries=env_int("LLM_CACHE_MEMORY_ENTRIES", 256),
+                    max_bytes=env_int("LLM_CACHE_MAX_BYTES", 100 * 1024 * 1024),
+                    ttl=env_float("LLM_CACHE_TTL", 24 * 3600),
+                )
+    return _llm_cache
+
+
+def is_llm_cache_enabled(stage: Optional[str]) -> bool:
+    """
+    Indique si la mise en cache est activée pour une étape (variable LLM_CACHE_STAGES).
+    """
+    if not stage:
+        return False
+    stages = os.environ.get("LLM_CACHE_STAGES", DEFAULT_LLM_CACHE_STAGES)
+    return stage in {s.strip() for s in stages.split(",") if s.strip()}
@@ -0,0 +1,132 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from settings import env_float
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    workflow_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    inputs TEXT NOT NULL,
+    outputs TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (workflow_id, stage)
+);
+CREATE INDEX IF NOT EXISTS checkpoints_updated ON checkpoints (updated);
+"""
+
+
+def new_workflow_id() -> str:
+    return uuid.uuid4().hex
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, sort_keys=True)
+
+
+class CheckpointStore:
+    """
+    Points de reprise des workflows, persistés dans SQLite.
+
+    Pour chaque workflow et chaque étape sont enregistrées les entrées et les sorties
+    (sérialisables en JSON) de sa dernière exécution. Une étape déjà calculée avec les
+    mêmes entrées peut ainsi être reprise sans nouvel appel, même après un redémarrage.
+    """
+
+    def __init__(self, path: str = ":memory:", retention: float = 30 * 24 * 3600):
+        self.path = path
+        self.retention = retention
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            if path != ":memory:":
+                # WAL : les lectures ne bloquent pas les écritures des autres processus
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.execute("DELETE FROM checkpoints WHERE updated < ?", (time.time() - retention,))
+
+    def save(self, workflow_id: str, stage: str, inputs: Any, outputs: Any) -> None:
+        """
+        Enregistre (ou remplace) le résultat d'une étape.
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (workflow_id, stage, inputs, outputs, updated)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (workflow_id, stage, _dumps(inputs), _dumps(outputs), time.time()),
+            )
+
+    def get(self, workflow_id: str, stage: str, inputs: Any) -> Optional[Any]:
+        """
+        Retourne les sorties de l'étape si elle a été enregistrée avec les mêmes entrées, sinon None.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT inputs, outputs FROM checkpoints WHERE workflow_id = ? AND stage = ?",
+                (workflow_id, stage),
+            ).fetchone()
+        if row is None or row[0] != _dumps(inputs):
+            return None
+        return json.loads(row[1])
+
+    def load(self, workflow_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Retourne toutes les étapes enregistrées d'un workflow : {étape: {"inputs", "outputs", "updated"}}.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage, inputs, outputs, updated FROM checkpoints WHERE workflow_id = ?",
+                (workflow_id,),
+            ).fetchall()
+        return {
+            stage: {"inputs": json.loads(inputs), "outputs": json.loads(outputs), "updated": updated}
+            for stage, inputs, outputs, updated in rows
+        }
+
+    def delete(self, workflow_id: str, stage: Optional[str] = None) -> None:
+        """
+        Supprime une étape, ou tout le workflow si `stage` est None.
+        """
+        with self._lock, self._conn:
+            if stage is None:
+                self._conn.execute("DELETE FROM checkpoints WHERE workflow_id = ?", (workflow_id,))
+            else:
+                self._conn.execute("DELETE FROM checkpoints WHERE workflow_id = ? AND stage = ?",
+                                   (workflow_id, stage))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            workflows, stages = self._conn.execute(
+                "SELECT COUNT(DISTINCT workflow_id), COUNT(*) FROM checkpoints"
+            ).fetchone()
+        return {"workflows": workflows, "stages": stages}
+
+
+_store: Optional[CheckpointStore] = None
+_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    """
+    Retourne le stockage des points de reprise du processus, créé au premier appel.
+
+    Emplacement : CHECKPOINT_DB (`.cache/checkpoints.sqlite3`) ; conservation : CHECKPOINT_RETENTION_DAYS (30).
+    """
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = CheckpointStore(
+                    path=os.environ.get("CHECKPOINT_DB", os.path.join(".cache", "checkpoints.sqlite3")),
+                    retention=env_float("CHECKPOINT_RETENTION_DAYS", 30) * 24 * 3600,
+                )
+    return _store
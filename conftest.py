@@ -0,0 +1 @@
+# Racine du projet : les modules (plats, à la racine) sont importables depuis tests/
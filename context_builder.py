@@ -0,0 +1,208 @@
+import functools
+import logging
+import math
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+
+import tiktoken
+
+from metrics import registry
+from settings import env_int
+
+logger = logging.getLogger(__name__)
+
+# Budget par défaut du prompt de rédaction (instructions + plan + sources), en tokens
+DEFAULT_CONTEXT_TOKEN_BUDGET = 6000
+
+# Part du budget des sources réservée aux résumés, le reste allant aux extraits
+SUMMARY_SHARE = 0.4
+
+# Sans fichier BPE chargeable : environ 4 caractères par token
+CHARS_PER_TOKEN = 4
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_SENTENCE_END_RE = re.compile(r"[.!?…](?=\s|$)")
+
+
+@functools.lru_cache(maxsize=8)
+def _encoding(model: str):
+    # Le cache garantit un seul avertissement par modèle
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        # Modèle inconnu de tiktoken : encodages des modèles récents
+        error = None
+        for name in ("o200k_base", "cl100k_base"):
+            try:
+                return tiktoken.get_encoding(name)
+            except Exception as e:
+                error = e
+    except Exception as e:
+        # Fichier BPE indisponible (ex: pas d'accès réseau au premier chargement)
+        error = e
+    logger.warning("Tokenizer indisponible pour %s, estimation à %d caractères par token : %s", model, CHARS_PER_TOKEN, error)
+    return None
+
+
+def count_tokens(text: str, model: str = "gpt-4o-mini") -> int:
+    """
+    Compte les tokens d'un texte avec le tokenizer du modèle (tiktoken),
+    ou les estime si son fichier BPE ne peut pas être chargé.
+
+    Args:
+        text (str): Texte à mesurer
+        model (str): Modèle cible
+
+    Returns:
+        int: Nombre de tokens
+    """
+    if not text:
+        return 0
+    encoding = _encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-4o-mini") -> str:
+    """
+    Tronque un texte à `max_tokens`, de préférence à la fin d'une phrase.
+
+    Args:
+        text (str): Texte à tronquer
+        max_tokens (int): Nombre maximum de tokens
+        model (str): Modèle cible
+
+    Returns:
+        str: Texte tronqué (inchangé s'il tient déjà dans la limite)
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+
+    encoding = _encoding(model)
+    if encoding is None:
+        truncated = text[:max_tokens * CHARS_PER_TOKEN]
+    else:
+        truncated = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+
+    # Couper à la dernière fin de phrase si elle ne sacrifie pas plus de la moitié du texte
+    ends = [m.end() for m in _SENTENCE_END_RE.finditer(truncated)]
+    if ends and ends[-1] >= len(truncated) // 2:
+        truncated = truncated[:ends[-1]]
+    return truncated.rstrip() + " […]"
+
+
+def _terms(text: str) -> set:
+    folded = unicodedata.normalize("NFKD", text.lower()).encode("ascii", "ignore").decode("ascii")
+    return {word for word in _WORD_RE.findall(folded) if len(word) > 3}
+
+
+def rank_articles(articles: List[Dict[str, Any]], query: str) -> List[Dict[str, Any]]:
+    """
+    Classe les articles par recouvrement de termes entre la requête et leur titre/résumé.
+
+    L'ordre d'origine départage les ex æquo.
+    """
+    query_terms = _terms(query)
+    if not query_terms:
+        return list(articles)
+
+    def score(item: Tuple[int, Dict[str, Any]]) -> Tuple[float, int]:
+        index, article = item
+        terms = _terms(f"{article.get('title', '')} {article.get('summary', '')}")
+        return (-len(query_terms & terms) / len(query_terms), index)
+
+    return [article for _, article in sorted(enumerate(articles), key=score)]
+
+
+def get_context_token_budget() -> int:
+    return env_int("ARTICLE_CONTEXT_TOKEN_BUDGET", DEFAULT_CONTEXT_TOKEN_BUDGET)
+
+
+def build_article_context(processed_articles: List[Dict[str, Any]], query: str, fixed_prompt: str = "",
+                          budget: Optional[int] = None,
+                          model: str = "gpt-4o-mini") -> Tuple[str, Dict[str, Any]]:
+    """
+    Assemble le contexte des articles sources dans un budget de tokens.
+
+    Le texte fixe du prompt (instructions et plan) est décompté en premier ; le reste du budget
+    est réparti entre les résumés (articles les plus pertinents d'abord) puis des extraits
+    du contenu original, partagés équitablement entre les articles retenus.
+
+    Args:
+        processed_articles (List[Dict]): Articles scrapés et résumés
+        query (str): Sujet, angle et plan, pour classer les articles par pertinence
+        fixed_prompt (str): Partie du prompt toujours envoyée (instructions, plan)
+        budget (Optional[int]): Budget total du prompt (ARTICLE_CONTEXT_TOKEN_BUDGET, 6000 par défaut)
+        model (str): Modèle cible, pour le comptage des tokens
+
+    Returns:
+        Tuple[str, Dict[str, Any]]: Contexte à insérer dans le prompt, et rapport
+        (tokens bruts, utilisés, économisés, articles retenus et tronqués)
+    """
+    budget = budget or get_context_token_budget()
+    fixed_tokens = count_tokens(fixed_prompt, model)
+    available = max(0, budget - fixed_tokens)
+
+    ranked = rank_articles(processed_articles, query)
+
+    # Résumés : les plus pertinents d'abord, le dernier retenu pouvant être tronqué
+    summary_budget = int(available * SUMMARY_SHARE) if any(a.get("original_content") for a in ranked) else available
+    summaries: List[Tuple[Dict[str, Any], str]] = []
+    truncated = set()
+    remaining = summary_budget
+    for article in ranked:
+        header = f"Source: {article.get('title', 'Article')} ({article.get('url', '')})\nRésumé: "
+        needed = count_tokens(header, model) + 8
+        if remaining <= needed:
+            break
+        summary = article.get("summary", "")
+        fitted = truncate_to_tokens(summary, remaining - needed, model)
+        if fitted != summary:
+            truncated.add(id(article))
+        summaries.append((article, header + fitted))
+        remaining -= count_tokens(header + fitted, model)
+
+    # Extraits : le budget restant est partagé entre les articles retenus
+    excerpt_budget = available - (summary_budget - remaining)
+    blocks = []
+    for i, (article, summary_block) in enumerate(summaries):
+        share = excerpt_budget // max(1, len(summaries) - i)
+        content = article.get("original_content") or ""
+        excerpt = truncate_to_tokens(content, share - 4, model) if content and share > 16 else ""
+        if excerpt:
+            if excerpt != content:
+                truncated.add(id(article))
+            block = f"{summary_block}\nExtrait: {excerpt}"
+        else:
+            block = summary_block
+        excerpt_budget -= count_tokens(block, model) - count_tokens(summary_block, model)
+        blocks.append(block)
+
+    context = "\n\n".join(blocks)
+    raw_tokens = count_tokens(str(processed_articles), model)
+    used_tokens = count_tokens(context, model)
+    report = {
+        "tokenizer": "tiktoken" if _encoding(model) is not None else "estimation",
+        "budget": budget,
+        "fixed_tokens": fixed_tokens,
+        "raw_tokens": raw_tokens,
+        "context_tokens": used_tokens,
+        "saved_tokens": max(0, raw_tokens - used_tokens),
+        "articles": len(processed_articles),
+        "articles_included": len(blocks),
+        "articles_truncated": len(truncated),
+    }
+
+    registry.inc("article_context_tokens_total", raw_tokens, help="Tokens du contexte des sources",
+                 type="raw")
+    registry.inc("article_context_tokens_total", used_tokens, type="used")
+    registry.inc("article_context_tokens_total", report["saved_tokens"], type="saved")
+    logger.info(
+        "Contexte des sources : %d tokens au lieu de %d (%d économisés, %d/%d articles)",
+        used_tokens, raw_tokens, report["saved_tokens"], len(blocks), len(processed_articles),
+    )
+    return context, report
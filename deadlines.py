@@ -0,0 +1,172 @@
+import contextvars
+import functools
+import os
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from metrics import registry
+
+# Échéance de l'étape en cours (horloge monotone), None si aucune ; propagée aux workers via copy_context
+current_deadline: contextvars.ContextVar = contextvars.ContextVar("current_deadline", default=None)
+
+# Dégradations de l'exécution en cours (liste partagée par les workers d'une même demande)
+current_degradations: contextvars.ContextVar = contextvars.ContextVar("current_degradations", default=None)
+
+# Budget par défaut de chaque étape, en secondes (surchargeable via STAGE_BUDGETS)
+DEFAULT_STAGE_BUDGETS = {
+    "search": 20.0,
+    "scraping": 45.0,
+    "article": 240.0,
+}
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    Le budget de temps de l'étape est épuisé : l'appel réseau n'est pas (ou plus) tenté.
+    """
+
+    def __init__(self, message: str = "Le délai de l'étape est dépassé."):
+        super().__init__(message)
+
+
+def get_stage_budgets() -> Dict[str, float]:
+    """
+    Budgets des étapes : valeurs par défaut, surchargées par STAGE_BUDGETS
+    (ex: "scraping=30,article=120" ; 0 désactive le budget d'une étape).
+    """
+    budgets = dict(DEFAULT_STAGE_BUDGETS)
+    for item in os.environ.get("STAGE_BUDGETS", "").split(","):
+        name, _, value = item.partition("=")
+        try:
+            budgets[name.strip()] = float(value)
+        except ValueError:
+            continue
+    return budgets
+
+
+def remaining(default: Optional[float] = None) -> Optional[float]:
+    """
+    Temps restant avant l'échéance courante, en secondes (`default` s'il n'y a pas d'échéance).
+    """
+    deadline = current_deadline.get()
+    if deadline is None:
+        return default
+    return deadline - time.monotonic()
+
+
+def clamp_timeout(timeout: Timeout) -> Timeout:
+    """
+    Borne le timeout d'un appel réseau (valeur unique ou couple connexion/lecture) par le temps restant.
+
+    Lève `DeadlineExceeded` si l'échéance est déjà passée.
+    """
+    left = remaining()
+    if left is None:
+        return timeout
+    if left <= 0:
+        raise DeadlineExceeded()
+    if isinstance(timeout, tuple):
+        return tuple(min(value, left) for value in timeout)
+    return min(timeout, left)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[Optional[float]]:
+    """
+    Fixe une échéance dans `seconds` secondes pour le bloc ; une échéance englobante plus proche
+    est conservée (un budget imbriqué ne peut que raccourcir le délai). None ou 0 : pas de nouveau budget.
+    """
+    deadline = current_deadline.get()
+    if seconds:
+        candidate = time.monotonic() + seconds
+        deadline = candidate if deadline is None else min(deadline, candidate)
+    token = current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        current_deadline.reset(token)
+
+
+def _stream_within(chunks: Iterator[Any], deadline: Optional[float]) -> Iterator[Any]:
+    """
+    Relaie un flux sous l'échéance `deadline` : chaque lecture s'exécute avec cette échéance,
+    et `DeadlineExceeded` est levée (flux fermé) si elle est dépassée avant la fin du flux.
+    """
+    try:
+        while True:
+            token = current_deadline.set(deadline)
+            try:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise DeadlineExceeded()
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            finally:
+                current_deadline.reset(token)
+            yield chunk
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+def with_stage_budget(stage: str) -> Callable:
+    """
+    Décorateur : exécute la fonction dans le budget de l'étape `stage` (voir `get_stage_budgets`).
+
+    Si la fonction retourne un itérateur (mode stream), sa consommation reste soumise au même budget.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with deadline_scope(get_stage_budgets().get(stage)) as deadline:
+                result = fn(*args, **kwargs)
+            if isinstance(result, Iterator):
+                return _stream_within(result, deadline)
+            return result
+        return wrapper
+    return decorator
+
+
+def record_degradation(stage: str, reason: str, count: int = 1) -> None:
+    """
+    Signale un mode dégradé (ex: sources ignorées faute de temps), dans les métriques
+    et dans les dégradations collectées par l'appelant (voir `collect_degradations`).
+
+    Args:
+        stage (str): Étape concernée
+        reason (str): Nature de la dégradation (ex: "sources_skipped", "search_summaries")
+        count (int): Nombre d'éléments concernés
+    """
+    registry.inc("stage_degradations_total", count, help="Étapes exécutées en mode dégradé faute de temps",
+                 stage=stage, reason=reason)
+    degradations = current_degradations.get()
+    if degradations is not None:
+        degradations.append({"stage": stage, "reason": reason, "count": count})
+
+
+@contextmanager
+def collect_degradations(into: Optional[List[Dict[str, Any]]] = None) -> Iterator[List[Dict[str, Any]]]:
+    """
+    Collecte les dégradations signalées pendant le bloc, y compris par les workers qui en héritent le contexte.
+    """
+    degradations = [] if into is None else into
+    token = current_degradations.set(degradations)
+    try:
+        yield degradations
+    finally:
+        current_degradations.reset(token)
+
+
+def summarize_degradations(degradations: List[Dict[str, Any]]) -> Dict[Tuple[str, str], int]:
+    """
+    Regroupe les dégradations par (étape, nature), avec le nombre total d'éléments concernés.
+    """
+    summary: Dict[Tuple[str, str], int] = {}
+    for degradation in degradations:
+        key = (degradation["stage"], degradation["reason"])
+        summary[key] = summary.get(key, 0) + degradation["count"]
+    return summary
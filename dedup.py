@@ -0,0 +1,157 @@
+import hashlib
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from metrics import registry
+from search_cache import fold_accents
+from settings import env_float
+
+# Nombre de fonctions de hachage de la signature MinHash (erreur type de l'estimation ≈ 1/√128)
+MINHASH_PERMUTATIONS = 128
+
+# Similarité de Jaccard estimée à partir de laquelle deux textes sont des quasi-doublons
+DEFAULT_METADATA_SIMILARITY = 0.4  # titre + description, réécrits d'un site à l'autre
+DEFAULT_TEXT_SIMILARITY = 0.5  # texte extrait de la page
+
+# Permutations h(x) = (a·x + b) mod p, avec p = 2^31 - 1 : pour x < 2^32, a·x + b tient sur 63 bits
+_PRIME = (1 << 31) - 1
+
+# Coefficients fixes (graine constante) : les signatures sont comparables d'un processus à l'autre
+_rng = np.random.default_rng(0x5EED)
+_A = _rng.integers(1, _PRIME, size=(MINHASH_PERMUTATIONS, 1), dtype=np.uint64)
+_B = _rng.integers(0, _PRIME, size=(MINHASH_PERMUTATIONS, 1), dtype=np.uint64)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def shingles(text: str, size: int = 2) -> set:
+    """
+    Découpe un texte en n-grammes de mots (minuscules, sans accents).
+
+    Un texte plus court que `size` mots donne ses mots isolés.
+    """
+    words = _WORD_RE.findall(fold_accents(text.lower()))
+    if len(words) < size:
+        return set(words)
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def minhash(text: str, size: int = 2) -> Optional[Tuple[int, ...]]:
+    """
+    Calcule la signature MinHash d'un texte, sur ses n-grammes de mots.
+
+    La proportion de valeurs égales entre deux signatures estime la similarité de Jaccard
+    des deux ensembles de n-grammes.
+
+    Args:
+        text (str): Texte à résumer
+        size (int): Taille des n-grammes de mots
+
+    Returns:
+        Optional[Tuple[int, ...]]: Signature, ou None si le texte ne contient aucun mot
+    """
+    values = np.fromiter(
+        # blake2b plutôt que hash() : valeur stable d'un processus à l'autre
+        (int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "big")
+         for shingle in shingles(text, size)),
+        dtype=np.uint64,
+    )
+    if not values.size:
+        return None
+    # Une ligne par permutation : le minimum de chaque ligne est une valeur de la signature
+    return tuple(((_A * values + _B) % _PRIME).min(axis=1).tolist())
+
+
+def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+    """
+    Similarité de Jaccard estimée à partir de deux signatures MinHash.
+    """
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class DuplicateArticle(Exception):
+    """
+    Le texte extrait d'un article est un quasi-doublon d'un article déjà retenu.
+    """
+
+
+class NearDuplicateIndex:
+    """
+    Ensemble de signatures MinHash, partageable entre threads.
+
+    `add` enregistre une signature et indique si une signature proche
+    (similarité supérieure ou égale à `threshold`) était déjà présente.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_TEXT_SIMILARITY):
+        self.threshold = threshold
+        self._signatures: List[Tuple[int, ...]] = []
+        self._lock = threading.Lock()
+
+    def _find(self, signature: Tuple[int, ...]) -> Optional[Tuple[int, ...]]:
+        for known in self._signatures:
+            if similarity(known, signature) >= self.threshold:
+                return known
+        return None
+
+    def add(self, signature: Optional[Tuple[int, ...]]) -> bool:
+        """
+        Enregistre une signature ; retourne True si c'est un quasi-doublon d'une signature connue.
+
+        Une signature absente (texte vide) n'est jamais un doublon.
+        """
+        if signature is None:
+            return False
+        with self._lock:
+            if self._find(signature) is not None:
+                return True
+            self._signatures.append(signature)
+            return False
+
+
+def article_signature(article: Dict[str, Any]) -> Optional[Tuple[int, ...]]:
+    """
+    Signature d'un résultat de recherche, calculée sur son titre et sa description.
+    """
+    return minhash(f"{article.get('title', '')} {article.get('summary', '')}")
+
+
+def get_text_index() -> NearDuplicateIndex:
+    """
+    Nouvel index pour comparer les textes extraits d'un lot d'articles (DEDUP_TEXT_SIMILARITY, 0.5 par défaut).
+    """
+    return NearDuplicateIndex(env_float("DEDUP_TEXT_SIMILARITY", DEFAULT_TEXT_SIMILARITY))
+
+
+def dedupe_articles(articles: Iterable[Dict[str, Any]],
+                    threshold: Optional[float] = None) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Écarte les quasi-doublons d'une liste de résultats de recherche (même dépêche reprise
+    par plusieurs sites), d'après leur titre et leur description.
+
+    La première occurrence est conservée et l'ordre d'origine respecté.
+
+    Args:
+        articles (Iterable[Dict]): Résultats de recherche (title, summary, url...)
+        threshold (Optional[float]): Similarité minimale d'un doublon (DEDUP_METADATA_SIMILARITY, 0.4 par défaut)
+
+    Returns:
+        Tuple[List[Dict], List[Dict]]: Articles distincts, et doublons écartés
+    """
+    if threshold is None:
+        threshold = env_float("DEDUP_METADATA_SIMILARITY", DEFAULT_METADATA_SIMILARITY)
+    index = NearDuplicateIndex(threshold)
+    unique, duplicates = [], []
+    for article in articles:
+        if index.add(article_signature(article)):
+            duplicates.append(article)
+        else:
+            unique.append(article)
+
+    if duplicates:
+        registry.inc("articles_deduplicated_total", len(duplicates), help="Quasi-doublons écartés avant traitement",
+                     step="metadata")
+    return unique, duplicates
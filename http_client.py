@@ -0,0 +1,230 @@
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from deadlines import DeadlineExceeded, clamp_timeout, remaining
+from settings import env_float, env_int
+
+# Codes HTTP pour lesquels une nouvelle tentative a du sens
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Convertit un en-tête Retry-After (secondes ou date HTTP) en nombre de secondes.
+
+    Args:
+        value (Optional[str]): Valeur brute de l'en-tête
+
+    Returns:
+        Optional[float]: Délai d'attente en secondes, ou None si absent/invalide
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_date = parsedate_to_datetime(value)
+        return max(0.0, retry_date.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class HttpClient:
+    """
+    Client HTTP partagé par tout le processus.
+
+    Encapsule une `requests.Session` avec un pool de connexions borné (keep-alive),
+    des timeouts de connexion/lecture et une stratégie de nouvelles tentatives
+    avec backoff exponentiel « jittered » respectant l'en-tête Retry-After.
+    """
+
+    def __init__(
+            self,
+            pool_connections: int = 4,
+            pool_maxsize: int = 16,
+            connect_timeout: float = 5.0,
+            read_timeout: float = 60.0,
+            max_retries: int = 3,
+            backoff_base: float = 0.5,
+            backoff_max: float = 20.0,
+    ):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=True,  # Au-delà de pool_maxsize, on attend une connexion libre
+            max_retries=0,  # Les nouvelles tentatives sont gérées ici
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._retries = 0
+        self._failures = 0
+        self._backoff_seconds = 0.0
+
+    @property
+    def timeout(self):
+        return self.connect_timeout, self.read_timeout
+
+    def _backoff_delay(self, attempt: int, response: Optional[requests.Response]) -> float:
+        """
+        Calcule le délai avant la prochaine tentative (full jitter, borné par backoff_max).
+        """
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return min(retry_after, self.backoff_max)
+
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    def request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """
+        Envoie une requête HTTP via la session partagée, avec nouvelles tentatives.
+
+        Les erreurs réseau et les statuts 429/5xx sont retentés jusqu'à `max_retries` fois.
+        La dernière réponse (même en erreur) est retournée : l'appelant reste responsable
+        de `raise_for_status()`.
+
+        Dans une étape à budget limité (voir `deadlines.py`), chaque tentative est bornée par
+        le temps restant, et aucune nouvelle tentative n'est faite si l'attente dépasserait l'échéance.
+        Lève `DeadlineExceeded` si l'échéance est passée avant l'envoi.
+
+        Args:
+            method (str): Méthode HTTP
+            url (str): URL cible
+            on_retry (Optional[Callable]): Appelé avant chaque nouvelle tentative (ex: créneau
+                auprès du limiteur de débit) ; une exception interrompt les tentatives
+            **kwargs: Paramètres transmis à `requests.Session.request`
+
+        Returns:
+            requests.Response: Réponse HTTP
+        """
+        timeout = kwargs.pop("timeout", self.timeout)
+        on_retry = kwargs.pop("on_retry", None)
+
+        attempt = 0
+        while True:
+            kwargs["timeout"] = clamp_timeout(timeout)
+            with self._lock:
+                self._requests += 1
+
+            response = None
+            error = None
+            try:
+                response = self.session.request(method, url, **kwargs)
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    return response
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+                if attempt >= self.max_retries:
+                    with self._lock:
+                        self._failures += 1
+                    left = remaining()
+                    if left is not None and left <= 0:
+                        # Délai de lecture raccourci par l'échéance : c'est le budget qui est épuisé
+                        raise DeadlineExceeded() from e
+                    raise
+
+            delay = self._backoff_delay(attempt, response)
+            left = remaining()
+            if left is not None and left <= delay:
+                # Plus le temps d'une nouvelle tentative : la dernière réponse est retournée telle quelle
+                if response is not None:
+                    return response
+                with self._lock:
+                    self._failures += 1
+                raise DeadlineExceeded() from error
+
+            if response is not None:
+                # Libérer la connexion pour qu'elle retourne dans le pool
+                response.close()
+
+            with self._lock:
+                self._retries += 1
+                self._backoff_seconds += delay
+
+            time.sleep(delay)
+            attempt += 1
+            if on_retry is not None:
+                on_retry()
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retourne les métriques du client : requêtes, connexions ouvertes,
+        réutilisations du pool (keep-alive) et nouvelles tentatives.
+        """
+        connections_opened = 0
+        pool_requests = 0
+
+        pools = self._adapter.poolmanager.pools
+        for pool_key in list(pools.keys()):
+            pool = pools.get(pool_key)
+            if pool is None:
+                continue
+            connections_opened += pool.num_connections
+            pool_requests += pool.num_requests
+
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "retries": self._retries,
+                "failures": self._failures,
+                "backoff_seconds": round(self._backoff_seconds, 3),
+                "connections_opened": connections_opened,
+                "pool_hits": max(0, pool_requests - connections_opened),
+            }
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """
+    Retourne le client HTTP du processus, créé au premier appel.
+
+    Ce module étant importé une seule fois par processus (contrairement au script
+    Streamlit, réexécuté à chaque interaction), le client et son pool de connexions
+    sont partagés entre toutes les sessions.
+    """
+    global _client
+
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = HttpClient(
+                    pool_connections=env_int("HTTP_POOL_CONNECTIONS", 4),
+                    pool_maxsize=env_int("HTTP_POOL_MAXSIZE", 16),
+                    connect_timeout=env_float("HTTP_CONNECT_TIMEOUT", 5.0),
+                    read_timeout=env_float("HTTP_READ_TIMEOUT", 60.0),
+                    max_retries=env_int("HTTP_MAX_RETRIES", 3),
+                    backoff_base=env_float("HTTP_BACKOFF_BASE", 0.5),
+                    backoff_max=env_float("HTTP_BACKOFF_MAX", 20.0),
+                )
+    return _client
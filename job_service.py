@@ -0,0 +1,416 @@
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from dotenv import load_dotenv
+
+from batch import ROW_DEFAULTS
+from metrics import registry, start_metrics_server
+from pipeline import run_workflow
+from rate_limiter import PRIORITY_BATCH, request_priority
+from settings import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+# Statuts d'un job ; les trois derniers sont définitifs
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED_STATUSES = {SUCCEEDED, FAILED, CANCELLED}
+
+# Paramètres acceptés par POST /jobs (les mêmes que les colonnes de batch.py)
+JOB_FIELDS = ("sector", "keywords", *ROW_DEFAULTS)
+
+
+class QueueFull(Exception):
+    """
+    La file est pleine ; `retry_after` estime dans combien de secondes réessayer.
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"File d'attente pleine, réessayer dans {retry_after} s")
+        self.retry_after = retry_after
+
+
+class Job:
+    """
+    Demande de génération et son avancement (étapes terminées, résultat ou erreur).
+    """
+
+    def __init__(self, params: Dict[str, str]):
+        self.id = uuid.uuid4().hex
+        self.params = params
+        self.status = QUEUED
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.stages: Dict[str, float] = {}
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        # Incrémenté à chaque changement, pour le suivi en streaming
+        self.version = 0
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        data = {
+            "id": self.id,
+            "status": self.status,
+            "params": self.params,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "stages": self.stages,
+        }
+        if self.error:
+            data["error"] = self.error
+        if include_result and self.result is not None:
+            data["result"] = self.result
+        return data
+
+
+def validate_params(payload: Any) -> Dict[str, str]:
+    """
+    Vérifie et complète les paramètres d'un job.
+
+    Raises:
+        ValueError: Si le corps n'est pas un objet JSON ou si `sector` ou `keywords` manque
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Le corps de la requête doit être un objet JSON")
+
+    params = {**ROW_DEFAULTS, **{k: str(v).strip() for k, v in payload.items() if k in JOB_FIELDS and v is not None}}
+    for key, default in ROW_DEFAULTS.items():
+        params[key] = params[key] or default
+
+    missing = [field for field in ("sector", "keywords") if not params.get(field)]
+    if missing:
+        raise ValueError(f"Champs obligatoires manquants: {', '.join(missing)}")
+    return params
+
+
+class JobQueue:
+    """
+    File de jobs exécutés par un pool borné de workers.
+
+    Au-delà de `workers + max_queued` jobs en attente ou en cours, les nouvelles demandes
+    sont refusées (`QueueFull`) avec une estimation du délai avant de réessayer. Les jobs
+    terminés sont conservés `retention` secondes pour être consultés.
+    """
+
+    def __init__(self, workers: int = 4, max_queued: int = 16, retention: float = 3600):
+        self.workers = max(1, workers)
+        self.max_queued = max(0, max_queued)
+        self.retention = retention
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        self._jobs: Dict[str, Job] = {}
+        self._cond = threading.Condition()
+        self._durations: List[float] = []
+        self._counters = {"submitted": 0, "rejected": 0, SUCCEEDED: 0, FAILED: 0, CANCELLED: 0}
+
+    def _active(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.status in (QUEUED, RUNNING))
+
+    def _retry_after(self, active: int) -> int:
+        # Durée moyenne des derniers jobs x nombre de « vagues » devant le prochain créneau
+        recent = self._durations[-20:]
+        mean = sum(recent) / len(recent) if recent else 30.0
+        return max(1, math.ceil(mean * (active - self.workers + 1) / self.workers))
+
+    def _prune(self) -> None:
+        limit = time.time() - self.retention
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished < limit]:
+            del self._jobs[job_id]
+
+    def _update(self, job: Job, **changes: Any) -> None:
+        with self._cond:
+            for name, value in changes.items():
+                setattr(job, name, value)
+            job.version += 1
+            self._cond.notify_all()
+
+    def submit(self, params: Dict[str, str]) -> Job:
+        """
+        Ajoute un job à la file.
+
+        Raises:
+            QueueFull: Si la file est pleine
+        """
+        with self._cond:
+            self._prune()
+            active = self._active()
+            if active >= self.workers + self.max_queued:
+                self._counters["rejected"] += 1
+                registry.inc("job_service_requests_total", help="Demandes reçues par le service de jobs",
+                             outcome="rejected")
+                raise QueueFull(self._retry_after(active))
+
+            job = Job(params)
+            self._jobs[job.id] = job
+            self._counters["submitted"] += 1
+        registry.inc("job_service_requests_total", help="Demandes reçues par le service de jobs", outcome="accepted")
+        self._executor.submit(self._run, job)
+        return job
+
+    def _run(self, job: Job) -> None:
+        with self._cond:
+            # Un job annulé avant son démarrage n'est pas exécuté
+            if job.status != QUEUED:
+                return
+            self._update(job, status=RUNNING, started=time.time())
+
+        def on_stage(stage: str, elapsed: float) -> None:
+            self._update(job, stages={**job.stages, stage: round(elapsed, 3)})
+
+        try:
+            # Les jobs passent après les sessions interactives auprès du limiteur de débit
+            with request_priority(PRIORITY_BATCH):
+                result = run_workflow(
+                    sector=job.params["sector"],
+                    keywords=job.params["keywords"],
+                    services=job.params["services"],
+                    tone=job.params["tone"],
+                    length=job.params["length"],
+                    style=job.params["style"],
+                    topic=job.params["topic"] or None,
+                    angle=job.params["angle"] or None,
+                    on_stage=on_stage,
+                )
+        except Exception as e:
+            logger.exception("Job %s en échec", job.id)
+            self._finish(job, FAILED, error=f"{type(e).__name__}: {e}")
+            return
+
+        self._finish(job, SUCCEEDED, result=result)
+
+    def _finish(self, job: Job, status: str, **changes: Any) -> None:
+        finished = time.time()
+        self._update(job, status=status, finished=finished, **changes)
+        with self._cond:
+            self._counters[status] += 1
+            if job.started:
+                self._durations.append(finished - job.started)
+                del self._durations[:-100]
+        registry.observe("job_duration_seconds", finished - job.created, help="Durée des jobs, attente comprise",
+                         status=status)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Annule un job encore en attente ; retourne False s'il a déjà démarré ou n'existe pas.
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.status != QUEUED:
+                return False
+            self._finish(job, CANCELLED)
+        return True
+
+    def wait_for_change(self, job: Job, version: int, timeout: float) -> int:
+        """
+        Attend que le job change de version (ou `timeout` secondes) et retourne la version courante.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: job.version != version, timeout=timeout)
+            return job.version
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            statuses = [job.status for job in self._jobs.values()]
+            return {
+                **self._counters,
+                "queued": statuses.count(QUEUED),
+                "running": statuses.count(RUNNING),
+                "workers": self.workers,
+                "max_queued": self.max_queued,
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+class JobHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: "JobServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _route(self) -> Tuple[str, Optional[str], Optional[str]]:
+        """
+        Découpe le chemin en (ressource, identifiant, sous-ressource), ex: ("jobs", "<id>", "events").
+        """
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        return (
+            parts[0] if parts else "",
+            parts[1] if len(parts) > 1 else None,
+            parts[2] if len(parts) > 2 else None,
+        )
+
+    def do_POST(self) -> None:
+        resource, job_id, _ = self._route()
+        if resource != "jobs" or job_id:
+            self._send_json(404, {"error": "Not found"})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            params = validate_params(json.loads(self.rfile.read(length) or b"{}"))
+        except ValueError as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        try:
+            job = self.server.queue.submit(params)
+        except QueueFull as e:
+            self._send_json(429, {"error": str(e), "retry_after": e.retry_after},
+                            headers={"Retry-After": str(e.retry_after)})
+            return
+
+        self._send_json(202, {
+            **job.to_dict(include_result=False),
+            "links": {"self": f"/jobs/{job.id}", "events": f"/jobs/{job.id}/events"},
+        }, headers={"Location": f"/jobs/{job.id}"})
+
+    def do_GET(self) -> None:
+        resource, job_id, sub = self._route()
+
+        if resource == "health" and not job_id:
+            self._send_json(200, {"status": "ok", **self.server.queue.stats()})
+            return
+
+        job = self.server.queue.get(job_id) if resource == "jobs" and job_id else None
+        if job is None:
+            self._send_json(404, {"error": "Job introuvable"})
+        elif sub == "events":
+            self._stream_events(job)
+        elif sub is None:
+            self._send_json(200, job.to_dict())
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_DELETE(self) -> None:
+        resource, job_id, _ = self._route()
+        job = self.server.queue.get(job_id) if resource == "jobs" and job_id else None
+        if job is None:
+            self._send_json(404, {"error": "Job introuvable"})
+        elif self.server.queue.cancel(job.id):
+            self._send_json(200, job.to_dict())
+        else:
+            self._send_json(409, {"error": "Le job a déjà démarré", "status": job.status})
+
+    def _stream_events(self, job: Job) -> None:
+        """
+        Envoie l'état du job en server-sent events à chaque changement, jusqu'à sa fin.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        version = -1
+        try:
+            while True:
+                current = self.server.queue.wait_for_change(job, version, timeout=15.0)
+                if current == version:
+                    # Commentaire SSE pour garder la connexion ouverte
+                    self.wfile.write(b": keep-alive\n\n")
+                else:
+                    version = current
+                    finished = job.status in FINISHED_STATUSES
+                    payload = json.dumps(job.to_dict(include_result=finished), ensure_ascii=False)
+                    self.wfile.write(f"event: {job.status}\ndata: {payload}\n\n".encode("utf-8"))
+                    if finished:
+                        self.wfile.flush()
+                        return
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+class JobServer(ThreadingHTTPServer):
+    """
+    API HTTP du service de jobs :
+
+    - POST /jobs : soumet une génération (202 + identifiant, 429 + Retry-After si la file est pleine)
+    - GET /jobs/<id> : état du job, et son résultat une fois terminé
+    - GET /jobs/<id>/events : suivi en server-sent events
+    - DELETE /jobs/<id> : annule un job encore en attente
+    - GET /health : état de la file
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], queue: JobQueue):
+        super().__init__(address, JobHandler)
+        self.queue = queue
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_job_server(queue: Optional[JobQueue] = None, host: str = "127.0.0.1", port: int = 0) -> JobServer:
+    """
+    Démarre le service dans un thread (port libre choisi automatiquement si `port` vaut 0).
+    """
+    server = JobServer((host, port), queue or JobQueue())
+    threading.Thread(target=server.serve_forever, name="job-server", daemon=True).start()
+    return server
+
+
+def main(argv: List[str] = None) -> int:
+    # Avant l'analyse des arguments, dont les valeurs par défaut viennent de l'environnement
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Service HTTP de génération d'articles (file de jobs).")
+    parser.add_argument("--host", default=os.environ.get("JOB_SERVICE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=env_int("JOB_SERVICE_PORT", 8090))
+    parser.add_argument("-w", "--workers", type=int, default=env_int("JOB_WORKERS", 4),
+                        help="Nombre de jobs exécutés simultanément")
+    parser.add_argument("-q", "--max-queued", type=int, default=env_int("JOB_MAX_QUEUED", 16),
+                        help="Nombre de jobs en attente au-delà duquel les demandes sont refusées")
+    parser.add_argument("--retention", type=float, default=env_float("JOB_RETENTION", 3600),
+                        help="Durée de conservation des jobs terminés (s)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    start_metrics_server()
+
+    queue = JobQueue(args.workers, args.max_queued, args.retention)
+    registry.register_collector("job_service", queue.stats)
+    server = JobServer((args.host, args.port), queue)
+    logger.info("Service de jobs sur %s (%d workers, %d en attente max)", server.url, queue.workers, queue.max_queued)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        queue.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
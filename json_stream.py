@@ -0,0 +1,178 @@
+import json
+from typing import Any, Iterable, Iterator, List, Optional
+
+_WHITESPACE = " \t\r\n"
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class IncrementalJSONParser:
+    """
+    Analyse un document JSON reçu par morceaux (réponse en streaming) et en donne, à tout moment,
+    la meilleure valeur partielle : le plus long préfixe valide, complété par les guillemets
+    et les accolades/crochets encore ouverts.
+
+    Le texte n'est parcouru qu'une fois : l'état de l'analyse (conteneurs ouverts, chaîne en cours)
+    est conservé d'un morceau à l'autre. Une chaîne en cours de réception est incluse telle quelle,
+    dès son guillemet ouvrant, sans la séquence d'échappement (ex: `\\u00`) ou la paire de
+    substitution UTF-16 éventuellement inachevées ; une clé, un nombre ou un littéral incomplets ne le
+    sont pas. Le texte qui précède le premier `{` ou `[` (ex: balise markdown) est ignoré.
+
+    Exemple : après `{"title": "L'IA", "sections": [{"title": "Par`, `value` vaut
+    `{"title": "L'IA", "sections": [{"title": "Par"}]}`.
+    """
+
+    def __init__(self):
+        self._buffer: List[str] = []
+        self._length = 0
+        self._started = False
+        self._origin = 0  # position du premier `{` ou `[`
+        # Conteneurs ouverts : [type, attente] ; attente ("key" ou "value") pour les objets
+        self._stack: List[List[str]] = []
+        self._in_string = False
+        self._string_is_key = False
+        self._escape = 0  # caractères restants de la séquence d'échappement en cours
+        self._hex = ""  # chiffres reçus de la séquence \uXXXX en cours
+        self._surrogate = False  # première moitié d'une paire de substitution, en attente de la seconde
+        self._in_token = False  # nombre ou littéral en cours
+        self._done = False
+        # Dernier point de coupure valide : (longueur du préfixe, fermetures à ajouter)
+        self._checkpoint: Optional[tuple] = None
+        self._parsed_checkpoint: Optional[tuple] = None
+        self._value: Any = None
+
+    def _closers(self) -> str:
+        return "".join(_CLOSERS[container[0]] for container in reversed(self._stack))
+
+    def _mark(self, position: int, prefix: str = "") -> None:
+        self._checkpoint = (position, prefix + self._closers())
+
+    def _value_complete(self, position: int) -> None:
+        self._mark(position)
+        # Valeur de premier niveau terminée : la suite est ignorée
+        self._done = not self._stack
+
+    def _end_token(self, position: int) -> None:
+        self._in_token = False
+        self._value_complete(position)
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Ajoute un morceau de texte.
+
+        Returns:
+            bool: True si la valeur partielle a changé
+        """
+        if self._done or not chunk:
+            return False
+
+        offset = self._length
+        self._buffer.append(chunk)
+        self._length += len(chunk)
+
+        for i, char in enumerate(chunk):
+            position = offset + i
+            if self._done:
+                break
+
+            if not self._started:
+                if char not in _CLOSERS:
+                    continue
+                self._started = True
+                self._origin = position
+
+            if self._in_string:
+                if self._escape == -1:
+                    self._escape = 4 if char == "u" else 0
+                    self._hex = ""
+                elif self._escape:
+                    self._hex += char
+                    self._escape -= 1
+                    if not self._escape:
+                        self._surrogate = "d800" <= self._hex.lower() <= "dbff"
+                elif char == "\\":
+                    self._escape = -1
+                elif char == '"':
+                    self._in_string = False
+                    self._surrogate = False
+                    if not self._string_is_key:
+                        self._value_complete(position + 1)
+                    continue
+                else:
+                    self._surrogate = False
+                if not self._string_is_key and not self._escape and not self._surrogate:
+                    # Chaîne partielle : incluse telle quelle
+                    self._mark(position + 1, '"')
+                continue
+
+            if self._in_token:
+                if char in _WHITESPACE or char in ",]}":
+                    self._end_token(position)
+                else:
+                    continue
+
+            if char in _WHITESPACE:
+                continue
+            if char in _CLOSERS:
+                self._stack.append([char, "key" if char == "{" else "value"])
+                self._mark(position + 1)
+            elif char in "}]":
+                if self._stack:
+                    self._stack.pop()
+                self._value_complete(position + 1)
+            elif char == '"':
+                self._in_string = True
+                self._string_is_key = bool(self._stack) and self._stack[-1] == ["{", "key"]
+                if not self._string_is_key:
+                    self._mark(position + 1, '"')
+            elif char == ":":
+                if self._stack and self._stack[-1][0] == "{":
+                    self._stack[-1][1] = "value"
+            elif char == ",":
+                if self._stack and self._stack[-1][0] == "{":
+                    self._stack[-1][1] = "key"
+            else:
+                self._in_token = True
+
+        return self._checkpoint != self._parsed_checkpoint
+
+    @property
+    def value(self) -> Any:
+        """
+        Valeur partielle courante (None tant qu'aucun conteneur n'a été ouvert).
+        """
+        if self._checkpoint is None or self._checkpoint == self._parsed_checkpoint:
+            return self._value
+
+        end, closers = self._checkpoint
+        text = "".join(self._buffer)
+        self._buffer = [text]
+        try:
+            self._value = json.loads(text[self._origin:end] + closers)
+        except ValueError:
+            # Préfixe non réparable (JSON invalide) : la dernière valeur valide est conservée
+            pass
+        self._parsed_checkpoint = self._checkpoint
+        return self._value
+
+    def close(self) -> Any:
+        """
+        Termine l'analyse : retourne la valeur complète.
+
+        Lève `ValueError` si le texte reçu n'est pas un document JSON complet.
+        """
+        if self._in_token:
+            self._end_token(self._length)
+        if not self._started or self._stack or self._in_string:
+            raise ValueError("Document JSON incomplet")
+        text = "".join(self._buffer)
+        return json.loads(text[self._origin:self._checkpoint[0]])
+
+
+def parse_json_stream(chunks: Iterable[str]) -> Iterator[Any]:
+    """
+    Produit la valeur partielle d'un document JSON en streaming à chaque fois qu'elle change.
+    """
+    parser = IncrementalJSONParser()
+    for chunk in chunks:
+        if parser.feed(chunk):
+            yield parser.value
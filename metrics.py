@@ -0,0 +1,383 @@
+import contextvars
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from settings import env_int
+
+# Bornes des histogrammes de latence, en secondes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 60.0, 120.0)
+
+# Prix indicatifs en USD par million de tokens (entrée, sortie)
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+# Remise sur les appels passés par la Batch API (moitié prix)
+BATCH_PRICE_FACTOR = 0.5
+
+# Étape du pipeline en cours, pour étiqueter les appels externes qu'elle déclenche
+current_stage: contextvars.ContextVar = contextvars.ContextVar("current_stage", default="unknown")
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(**labels: Any) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """
+    Histogramme cumulatif à bornes fixes (format Prometheus).
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                return
+        self.counts[-1] += 1
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimation d'un quantile : borne supérieure du bucket qui le contient.
+        """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        cumulative = 0
+        for i, bound in enumerate(self.buckets):
+            cumulative += self.counts[i]
+            if cumulative >= target:
+                return bound
+        return float("inf")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "mean": round(self.sum / self.count, 6) if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+        }
+
+
+class MetricsRegistry:
+    """
+    Agrégation en mémoire des compteurs et histogrammes du processus.
+
+    Les statistiques d'autres composants (client HTTP, caches...) sont ajoutées
+    via `register_collector` et exposées comme jauges.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def inc(self, name: str, value: float = 1.0, help: str = "", **labels: Any) -> None:
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            key = _labels(**labels)
+            series[key] = series.get(key, 0.0) + value
+            if help:
+                self._help.setdefault(name, help)
+
+    def observe(self, name: str, value: float, help: str = "", **labels: Any) -> None:
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            key = _labels(**labels)
+            if key not in series:
+                series[key] = Histogram()
+            series[key].observe(value)
+            if help:
+                self._help.setdefault(name, help)
+
+    def register_collector(self, name: str, collector: Callable[[], Dict[str, Any]]) -> None:
+        with self._lock:
+            self._collectors[name] = collector
+
+    def _collect(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            collectors = dict(self._collectors)
+        collected = {}
+        for name, collector in collectors.items():
+            try:
+                collected[name] = collector()
+            except Exception as e:
+                collected[name] = {"error": str(e)}
+        return collected
+
+    def to_json(self) -> Dict[str, Any]:
+        """
+        Instantané des métriques sous forme de dictionnaire sérialisable.
+        """
+        with self._lock:
+            counters = {
+                name: [{"labels": dict(key), "value": value} for key, value in series.items()]
+                for name, series in self._counters.items()
+            }
+            histograms = {
+                name: [{"labels": dict(key), **hist.to_dict()} for key, hist in series.items()]
+                for name, series in self._histograms.items()
+            }
+        return {
+            "timestamp": time.time(),
+            "counters": counters,
+            "histograms": histograms,
+            "components": self._collect(),
+        }
+
+    def to_prometheus(self) -> str:
+        """
+        Exposition au format texte Prometheus.
+        """
+        def fmt(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+            items = list(labels) + ([extra] if extra else [])
+            if not items:
+                return ""
+            return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+        lines: List[str] = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{fmt(key)} {value}")
+
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, hist in series.items():
+                    cumulative = 0
+                    for bound, count in zip(hist.buckets, hist.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{fmt(key, ('le', str(bound)))} {cumulative}")
+                    lines.append(f"{name}_bucket{fmt(key, ('le', '+Inf'))} {hist.count}")
+                    lines.append(f"{name}_sum{fmt(key)} {hist.sum}")
+                    lines.append(f"{name}_count{fmt(key)} {hist.count}")
+
+        lines.append("# TYPE generator_component_stat gauge")
+        for component, stats in self._collect().items():
+            for stat, value in stats.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    lines.append(f"generator_component_stat{fmt(_labels(component=component, stat=stat))} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """
+    Coût estimé d'un appel en USD (0 pour un modèle absent de MODEL_PRICES).
+    """
+    for prefix, (input_price, output_price) in sorted(MODEL_PRICES.items(), key=lambda p: -len(p[0])):
+        if model.startswith(prefix):
+            return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+    return 0.0
+
+
+def record_openai_call(model: str, duration: float, usage: Optional[Dict[str, Any]] = None,
+                       cache: str = "off", error: Optional[str] = None, stage: Optional[str] = None) -> None:
+    """
+    Enregistre un appel à l'API OpenAI : durée, tokens, coût estimé, cache et erreur éventuelle.
+
+    Args:
+        model (str): Modèle appelé
+        duration (float): Durée de l'appel en secondes
+        usage (Optional[Dict]): Bloc `usage` de la réponse
+        cache (str): "hit", "miss", "off" ou "batch" (réponse d'un lot Batch API, facturée à prix réduit)
+        error (Optional[str]): Type d'erreur, None en cas de succès
+        stage (Optional[str]): Étape à l'origine de l'appel (par défaut, l'étape en cours)
+    """
+    stage = stage or current_stage.get()
+    outcome = error or "ok"
+    registry.inc("openai_requests_total", help="Appels à l'API OpenAI",
+                 model=model, stage=stage, cache=cache, outcome=outcome)
+    registry.observe("openai_request_duration_seconds", duration, help="Durée des appels à l'API OpenAI",
+                     model=model, stage=stage, cache=cache)
+
+    if usage and cache != "hit":
+        prompt_tokens = int(usage.get("prompt_tokens", 0))
+        completion_tokens = int(usage.get("completion_tokens", 0))
+        registry.inc("openai_tokens_total", prompt_tokens, help="Tokens consommés",
+                     model=model, stage=stage, type="prompt")
+        registry.inc("openai_tokens_total", completion_tokens, help="Tokens consommés",
+                     model=model, stage=stage, type="completion")
+        cost = estimate_cost(model, prompt_tokens, completion_tokens)
+        if cache == "batch":
+            cost *= BATCH_PRICE_FACTOR
+        registry.inc("openai_cost_usd_total", cost,
+                     help="Coût estimé des appels OpenAI (USD)", model=model, stage=stage)
+
+
+def record_external_call(service: str, duration: float, cache: str = "off", error: Optional[str] = None) -> None:
+    """
+    Enregistre un appel à un service externe hors OpenAI (recherche, téléchargement de page).
+    """
+    stage = current_stage.get()
+    registry.inc("external_requests_total", help="Appels aux services externes",
+                 service=service, stage=stage, cache=cache, outcome=error or "ok")
+    registry.observe("external_request_duration_seconds", duration, help="Durée des appels aux services externes",
+                     service=service, stage=stage, cache=cache)
+
+
+def _record_stage(stage: str, started: float, error: Optional[str] = None) -> None:
+    registry.inc("stage_runs_total", help="Exécutions des étapes du pipeline", stage=stage, outcome=error or "ok")
+    registry.observe("stage_duration_seconds", time.perf_counter() - started,
+                     help="Durée des étapes du pipeline", stage=stage)
+
+
+@contextmanager
+def stage_timer(stage: str) -> Iterator[None]:
+    """
+    Mesure la durée d'une étape du pipeline et étiquette les appels externes qu'elle déclenche.
+    """
+    token = current_stage.set(stage)
+    started = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        current_stage.reset(token)
+        _record_stage(stage, started, error)
+
+
+def _timed_stream(stage: str, chunks: Iterator[Any], started: float) -> Iterator[Any]:
+    """
+    Relaie un flux retourné par une étape : la lecture reste étiquetée et mesurée comme l'étape,
+    jusqu'à la fin du flux, une erreur ou sa fermeture par l'appelant.
+    """
+    error = None
+    try:
+        while True:
+            token = current_stage.set(stage)
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                return
+            except Exception as e:
+                error = type(e).__name__
+                raise
+            finally:
+                current_stage.reset(token)
+            yield chunk
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+        _record_stage(stage, started, error)
+
+
+def instrument_stage(stage: str) -> Callable:
+    """
+    Décorateur : mesure chaque appel de la fonction comme l'étape `stage`.
+
+    Si la fonction retourne un itérateur (mode stream), la mesure couvre aussi sa consommation.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            token = current_stage.set(stage)
+            started = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                _record_stage(stage, started, type(e).__name__)
+                raise
+            finally:
+                current_stage.reset(token)
+            if isinstance(result, Iterator):
+                return _timed_stream(stage, result, started)
+            _record_stage(stage, started)
+            return result
+        return wrapper
+    return decorator
+
+
+def dump_metrics(path: str) -> None:
+    """
+    Écrit un instantané JSON des métriques dans un fichier.
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(registry.to_json(), f, ensure_ascii=False, indent=2)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path == "/metrics":
+            body = registry.to_prometheus().encode("utf-8")
+            content_type = "text/plain; version=0.0.4; charset=utf-8"
+        elif path == "/metrics.json":
+            body = json.dumps(registry.to_json(), ensure_ascii=False).encode("utf-8")
+            content_type = "application/json"
+        else:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+_server: Optional[ThreadingHTTPServer] = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: Optional[int] = None, host: str = "0.0.0.0") -> Optional[ThreadingHTTPServer]:
+    """
+    Démarre (une seule fois par processus) le serveur exposant /metrics et /metrics.json.
+
+    Sans `port`, utilise METRICS_PORT ; ne fait rien si aucun port n'est configuré.
+    """
+    global _server
+
+    port = port if port is not None else env_int("METRICS_PORT", 0)
+    if not port:
+        return None
+
+    with _server_lock:
+        if _server is None:
+            try:
+                _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            except OSError:
+                # Port déjà utilisé (ex: autre processus) : l'application fonctionne sans endpoint
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
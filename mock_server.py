@@ -0,0 +1,591 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+class LatencyDistribution:
+    """
+    Distribution de latence décrite par une chaîne :
+    "fixed:0.2", "uniform:0.1,0.5", "normal:0.3,0.05" ou "lognormal:-1.5,0.5" (en secondes).
+    """
+
+    def __init__(self, spec: str = "fixed:0"):
+        self.spec = spec
+        kind, _, raw_params = spec.partition(":")
+        self.kind = kind.strip().lower()
+        self.params = [float(p) for p in raw_params.split(",") if p.strip()] or [0.0]
+
+        if self.kind not in ("fixed", "uniform", "normal", "lognormal"):
+            raise ValueError(f"Distribution de latence inconnue: {spec}")
+
+    def sample(self) -> float:
+        p = self.params
+        if self.kind == "uniform":
+            return random.uniform(p[0], p[1] if len(p) > 1 else p[0])
+        if self.kind == "normal":
+            return max(0.0, random.gauss(p[0], p[1] if len(p) > 1 else 0.0))
+        if self.kind == "lognormal":
+            return random.lognormvariate(p[0], p[1] if len(p) > 1 else 0.0)
+        return p[0]
+
+
+class MockConfig:
+    """
+    Comportement du serveur : latences, taux d'erreur et réponses prédéfinies.
+
+    Args:
+        latency (str): Distribution de la latence avant la première réponse
+        token_latency (float): Délai de génération par fragment (entre deux fragments en streaming,
+            cumulé avant la réponse sinon)
+        error_rate (float): Proportion de requêtes en erreur (0 à 1)
+        error_status (int): Code HTTP des erreurs simulées
+        canned (Optional[Dict]): Réponses prédéfinies (voir `load_canned`)
+        batch_latency (float): Durée de traitement d'un lot Batch API, en secondes
+    """
+
+    def __init__(self, latency: str = "fixed:0", token_latency: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 500, canned: Optional[Dict[str, Any]] = None, batch_latency: float = 0.0):
+        self.latency = LatencyDistribution(latency)
+        self.token_latency = token_latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.canned = canned or {}
+        self.batch_latency = batch_latency
+
+
+def load_canned(path: str) -> Dict[str, Any]:
+    """
+    Charge un fichier JSON de réponses prédéfinies :
+
+        {
+            "chat": [{"contains": "angles éditoriaux", "content": "1. Analytique ..."}],
+            "everything": {"status": "ok", "articles": [...]},
+            "bing": {"value": [...]},
+            "serpapi": {"news_results": [...]}
+        }
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Vocabulaire des textes simulés : chaque page et chaque résultat de recherche a son propre texte,
+# pour ne pas être pris pour un doublon des autres par dedup.py
+WORDS = (
+    "marché entreprise croissance innovation données client service réseau énergie transition "
+    "stratégie investissement recherche production région emploi formation santé sécurité plateforme "
+    "logiciel industrie usine réglementation contrat budget projet équipe partenaire produit "
+    "consommateur prix demande offre analyse rapport étude tendance risque opportunité modèle outil "
+    "usage territoire collectivité filière export startup financement levée capital fonds directeur "
+    "annonce lancement accord rachat fusion résultat chiffre trimestre hausse baisse record objectif"
+).split()
+
+
+def simulated_text(seed: str, words: int) -> str:
+    """
+    Texte déterministe de `words` mots tirés du vocabulaire, propre à `seed`.
+    """
+    rng = random.Random(seed)
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _chat_completion(model: str, prompt: str, content: str) -> Dict[str, Any]:
+    return {
+        "id": f"chatcmpl-mock-{random.randrange(10 ** 8)}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                     "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": _estimate_tokens(prompt),
+            "completion_tokens": _estimate_tokens(content),
+            "total_tokens": _estimate_tokens(prompt) + _estimate_tokens(content),
+        },
+    }
+
+
+def default_chat_content(prompt: str, base_url: str, response_format: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Produit une réponse plausible, au format attendu par chaque étape du pipeline.
+
+    Avec un `response_format` JSON (structured outputs), la réponse est du JSON brut, sans
+    balises markdown ; sinon elle imite un modèle qui entoure son JSON de balises.
+    """
+    structured = bool(response_format) and response_format.get("type") in ("json_schema", "json_object")
+
+    if "plan détaillé" in prompt:
+        outline = json.dumps({
+            "title": "Titre de l'article simulé",
+            "introduction": "Présentation du contexte et de l'enjeu.",
+            "sections": [
+                {"title": f"Partie {i}", "subsections": [f"Point {i}.1", f"Point {i}.2"]}
+                for i in range(1, 4)
+            ],
+            "conclusion": "Synthèse et ouverture.",
+        }, ensure_ascii=False, indent=2)
+        return outline if structured else "```json\n" + outline + "\n```"
+
+    if "articles fictifs" in prompt:
+        articles = [
+            {
+                "title": f"Article simulé {i}",
+                "url": f"{base_url}/articles/simulated-{i}",
+                "summary": "Résumé d'un article simulé par le serveur local.",
+                "date": time.strftime("%Y-%m-%d"),
+            }
+            for i in range(1, 6)
+        ]
+        return json.dumps({"articles": articles} if structured else articles, ensure_ascii=False)
+
+    if "idées de sujets" in prompt:
+        return "\n".join(f"{i}. Sujet simulé numéro {i} : description courte." for i in range(1, 6))
+
+    if "angles éditoriaux" in prompt:
+        names = ["Analytique", "Didactique", "Comparatif", "Anecdotique", "Prospectif"]
+        return "\n".join(f"{i}. {name}: approche {name.lower()} du sujet." for i, name in enumerate(names, 1))
+
+    if "Résume" in prompt:
+        return "Résumé simulé : points clés et enseignements principaux de l'article source. " * 6
+
+    # Longueur demandée dans le prompt, pour que la durée de génération simulée en dépende
+    match = re.search(r"[Ee]nviron (\d+) mots", prompt)
+    words = int(match.group(1)) if match else 600
+    sentence = "Phrase simulée de l'article, cohérente avec le plan et le ton demandés. "
+    repeats = max(1, words // len(sentence.split()))
+
+    if "une partie à la fois" in prompt:
+        return sentence * repeats
+
+    paragraph = sentence * max(1, repeats // 4)
+    return "# Article simulé\n\n" + "\n\n".join(
+        f"## Section {i}\n\n{paragraph}" for i in range(1, 5)
+    )
+
+
+def default_article_html(slug: str) -> str:
+    paragraphs = "".join(
+        f"<p>Paragraphe {i} de l'article {slug} : {simulated_text(f'{slug}-{i}', 24)}.</p>"
+        for i in range(1, 13)
+    )
+    return (
+        f"<html><head><title>Article {slug}</title></head>"
+        f"<body><article><h1>Article {slug}</h1>{paragraphs}</article></body></html>"
+    )
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # En-têtes et corps partent en deux écritures : sans TCP_NODELAY, Nagle et l'ACK retardé du client
+    # bloquent chaque réponse ~40 ms sur une connexion keep-alive réutilisée
+    disable_nagle_algorithm = True
+    server: "MockServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    @property
+    def config(self) -> MockConfig:
+        return self.server.config
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json",
+              headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: Any) -> None:
+        self._send(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+
+    def _simulate_network(self) -> bool:
+        """
+        Applique la latence configurée ; retourne False si une erreur a été renvoyée.
+        """
+        self.server.count("requests")
+        time.sleep(self.config.latency.sample())
+
+        if random.random() < self.config.error_rate:
+            self.server.count("errors")
+            self._send(
+                self.config.error_status,
+                json.dumps({"error": {"message": "Erreur simulée"}}).encode("utf-8"),
+                headers={"Retry-After": "0"} if self.config.error_status == 429 else None,
+            )
+            return False
+        return True
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        raw_body = self.rfile.read(length)
+        path = urlparse(self.path).path.rstrip("/")
+
+        if path == "/v1/files":
+            self._upload_file(raw_body)
+            return
+        if path == "/v1/batches":
+            self._create_batch(json.loads(raw_body or b"{}"))
+            return
+        if path != "/v1/chat/completions":
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+        if not self._simulate_network():
+            return
+
+        body = json.loads(raw_body or b"{}")
+
+        self.server.count("chat_completions")
+        prompt = " ".join(m.get("content", "") for m in body.get("messages", []))
+        content = self._chat_content(prompt, body.get("response_format"))
+
+        if not body.get("stream") and self.config.token_latency:
+            # Sans streaming, la réponse arrive une fois tous les tokens générés
+            time.sleep(self.config.token_latency * len(re.findall(r"\S+\s*", content)))
+
+        if body.get("stream"):
+            include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+            self._stream_chat(body.get("model", ""), content, prompt if include_usage else None)
+            return
+
+        self._send_json(200, _chat_completion(body.get("model", ""), prompt, content))
+
+    def _upload_file(self, raw_body: bytes) -> None:
+        """
+        Dépôt d'un fichier (multipart/form-data, champs `file` et `purpose`), comme `/v1/files`.
+        """
+        message = BytesParser(policy=default_policy).parsebytes(
+            f"Content-Type: {self.headers.get('Content-Type', '')}\r\n\r\n".encode("latin-1") + raw_body)
+        fields = {part.get_param("name", header="content-disposition"): part.get_payload(decode=True)
+                  for part in message.iter_parts()} if message.is_multipart() else {}
+        if "file" not in fields:
+            self._send_json(400, {"error": {"message": "Champ `file` manquant"}})
+            return
+
+        self.server.count("files")
+        file_id = self.server.store_file(fields["file"])
+        self._send_json(200, {"id": file_id, "object": "file", "bytes": len(fields["file"]),
+                              "purpose": (fields.get("purpose") or b"").decode("utf-8"),
+                              "created_at": int(time.time())})
+
+    def _create_batch(self, body: Dict[str, Any]) -> None:
+        """
+        Création d'un lot, comme `/v1/batches` : les réponses sont calculées immédiatement
+        mais ne sont publiées qu'après `batch_latency` secondes. Chaque requête échoue
+        avec la probabilité `error_rate` (ligne du fichier d'erreurs).
+        """
+        content = self.server.files.get(body.get("input_file_id", ""))
+        if content is None:
+            self._send_json(404, {"error": {"message": "Fichier introuvable"}})
+            return
+
+        self.server.count("batches")
+        outputs, errors = [], []
+        for line in content.decode("utf-8").splitlines():
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            request = item.get("body") or {}
+            if random.random() < self.config.error_rate:
+                errors.append({"custom_id": item["custom_id"], "error": None, "response": {
+                    "status_code": self.config.error_status, "body": {"error": {"message": "Erreur simulée"}}}})
+                continue
+            prompt = " ".join(m.get("content", "") for m in request.get("messages", []))
+            completion = _chat_completion(request.get("model", ""), prompt,
+                                          self._chat_content(prompt, request.get("response_format")))
+            outputs.append({"custom_id": item["custom_id"], "error": None,
+                            "response": {"status_code": 200, "body": completion}})
+
+        batch = self.server.create_batch(body, outputs, errors)
+        self._send_json(200, batch)
+
+    def _chat_content(self, prompt: str, response_format: Optional[Dict[str, Any]] = None) -> str:
+        for rule in self.config.canned.get("chat", []):
+            if rule.get("contains", "") in prompt:
+                return rule["content"]
+        return default_chat_content(prompt, self.base_url, response_format)
+
+    def _stream_chat(self, model: str, content: str, prompt: Optional[str] = None) -> None:
+        """
+        Envoie la réponse en SSE ; si `prompt` est fourni (stream_options.include_usage),
+        un dernier fragment porte le bloc `usage`, comme l'API OpenAI.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        for token in re.findall(r"\S+\s*", content):
+            chunk = {"object": "chat.completion.chunk", "model": model,
+                     "choices": [{"index": 0, "delta": {"content": token}}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            if self.config.token_latency:
+                time.sleep(self.config.token_latency)
+        if prompt is not None:
+            usage_chunk = {"object": "chat.completion.chunk", "model": model, "choices": [], "usage": {
+                "prompt_tokens": _estimate_tokens(prompt),
+                "completion_tokens": _estimate_tokens(content),
+                "total_tokens": _estimate_tokens(prompt) + _estimate_tokens(content),
+            }}
+            self.wfile.write(f"data: {json.dumps(usage_chunk)}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def do_GET(self) -> None:
+        parsed = urlparse(self.path)
+        path = parsed.path.rstrip("/")
+
+        if path == "/v2/everything":
+            if not self._simulate_network():
+                return
+            self.server.count("everything")
+            self._send_json(200, self._everything(parse_qs(parsed.query)))
+        elif path == "/v7.0/news/search":
+            if not self._simulate_network():
+                return
+            self.server.count("bing")
+            self._send_json(200, self._bing(parse_qs(parsed.query)))
+        elif path == "/search.json":
+            if not self._simulate_network():
+                return
+            self.server.count("serpapi")
+            self._send_json(200, self._serpapi(parse_qs(parsed.query)))
+        elif path.startswith("/articles/"):
+            if not self._simulate_network():
+                return
+            self.server.count("articles")
+            self._send(200, default_article_html(path.rsplit("/", 1)[-1]).encode("utf-8"),
+                       content_type="text/html; charset=utf-8")
+        elif path.startswith("/v1/batches/"):
+            batch = self.server.get_batch(path.rsplit("/", 1)[-1])
+            if batch is None:
+                self._send_json(404, {"error": {"message": "Lot introuvable"}})
+            else:
+                self._send_json(200, batch)
+        elif path.startswith("/v1/files/") and path.endswith("/content"):
+            content = self.server.files.get(path.split("/")[-2])
+            if content is None:
+                self._send_json(404, {"error": {"message": "Fichier introuvable"}})
+            else:
+                self._send(200, content, content_type="application/jsonl")
+        elif path == "/stats":
+            self._send_json(200, self.server.stats())
+        else:
+            self._send_json(404, {"status": "error", "message": "Not found"})
+
+    def _everything(self, params: Dict[str, List[str]]) -> Dict[str, Any]:
+        if "everything" in self.config.canned:
+            return self.config.canned["everything"]
+
+        query = params.get("q", [""])[0]
+        page_size = int(params.get("pageSize", ["10"])[0])
+        start = (int(params.get("page", ["1"])[0]) - 1) * page_size
+        published = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+        return {
+            "status": "ok",
+            "totalResults": page_size,
+            "articles": [
+                {
+                    "title": f"Actualité {i} : {query}",
+                    "url": f"{self.base_url}/articles/news-{i}",
+                    "description": f"{simulated_text(f'news-{i}', 16)} ({query}).",
+                    "publishedAt": published,
+                }
+                for i in range(start + 1, start + page_size + 1)
+            ],
+        }
+
+    def _bing(self, params: Dict[str, List[str]]) -> Dict[str, Any]:
+        if "bing" in self.config.canned:
+            return self.config.canned["bing"]
+
+        # Mêmes pages que NewsAPI (URL non canonique) : les doublons sont éliminés à la fusion
+        query = params.get("q", [""])[0]
+        count = int(params.get("count", ["10"])[0])
+        start = int(params.get("offset", ["0"])[0])
+        published = time.strftime("%Y-%m-%dT%H:%M:%S.0000000Z", time.gmtime())
+        return {
+            "value": [
+                {
+                    "name": f"Actualité {i} : {query}",
+                    "url": f"{self.base_url}/articles/news-{i}/?utm_source=bing",
+                    "description": f"{simulated_text(f'news-{i}', 16)} ({query}).",
+                    "datePublished": published,
+                }
+                for i in range(start + 1, start + count + 1)
+            ],
+        }
+
+    def _serpapi(self, params: Dict[str, List[str]]) -> Dict[str, Any]:
+        if "serpapi" in self.config.canned:
+            return self.config.canned["serpapi"]
+
+        query = params.get("q", [""])[0]
+        count = int(params.get("num", ["10"])[0])
+        start = int(params.get("start", ["0"])[0])
+        return {
+            "news_results": [
+                {
+                    "title": f"Dépêche {i} : {query}",
+                    "link": f"{self.base_url}/articles/serp-{i}",
+                    "snippet": f"{simulated_text(f'serp-{i}', 16)} ({query}).",
+                    "date": "il y a 2 heures",
+                }
+                for i in range(start + 1, start + count + 1)
+            ],
+        }
+
+
+class MockServer(ThreadingHTTPServer):
+    """
+    Serveur local imitant les API OpenAI (`/v1/chat/completions`), NewsAPI (`/v2/everything`),
+    Bing News Search (`/v7.0/news/search`) et SerpAPI (`/search.json`), ainsi que des pages d'articles à scraper (`/articles/<id>`).
+    La Batch API OpenAI (`/v1/files`, `/v1/batches`) est simulée en mémoire.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], config: MockConfig):
+        super().__init__(address, MockHandler)
+        self.config = config
+        self.files: Dict[str, bytes] = {}
+        self._batches: Dict[str, Dict[str, Any]] = {}
+        self._counters: Dict[str, int] = {}
+        self._ids = 0
+        self._lock = threading.Lock()
+
+    def _new_id(self, prefix: str) -> str:
+        with self._lock:
+            self._ids += 1
+            return f"{prefix}-mock-{self._ids}"
+
+    def store_file(self, content: bytes) -> str:
+        file_id = self._new_id("file")
+        with self._lock:
+            self.files[file_id] = content
+        return file_id
+
+    def create_batch(self, request: Dict[str, Any], outputs: List[Dict[str, Any]],
+                     errors: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Enregistre un lot et ses fichiers de résultats, publiés une fois le lot terminé (voir `get_batch`).
+        """
+        def jsonl(items: List[Dict[str, Any]]) -> Optional[str]:
+            if not items:
+                return None
+            return self.store_file("".join(json.dumps(item, ensure_ascii=False) + "\n"
+                                           for item in items).encode("utf-8"))
+
+        batch = {
+            "id": self._new_id("batch"),
+            "object": "batch",
+            "endpoint": request.get("endpoint"),
+            "input_file_id": request.get("input_file_id"),
+            "completion_window": request.get("completion_window"),
+            "status": "in_progress",
+            "created_at": int(time.time()),
+            "output_file_id": None,
+            "error_file_id": None,
+            "request_counts": {"total": len(outputs) + len(errors), "completed": 0, "failed": 0},
+        }
+        entry = {
+            "batch": batch,
+            "ready_at": time.monotonic() + self.config.batch_latency,
+            "output_file_id": jsonl(outputs),
+            "error_file_id": jsonl(errors),
+            "counts": {"completed": len(outputs), "failed": len(errors)},
+        }
+        with self._lock:
+            self._batches[batch["id"]] = entry
+        return dict(batch)
+
+    def get_batch(self, batch_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._batches.get(batch_id)
+            if entry is None:
+                return None
+            batch = entry["batch"]
+            if batch["status"] == "in_progress" and time.monotonic() >= entry["ready_at"]:
+                batch.update(status="completed", completed_at=int(time.time()),
+                             output_file_id=entry["output_file_id"], error_file_id=entry["error_file_id"])
+                batch["request_counts"].update(entry["counts"])
+            return json.loads(json.dumps(batch))
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counters)
+
+
+def start_mock_server(config: Optional[MockConfig] = None, host: str = "127.0.0.1", port: int = 0) -> MockServer:
+    """
+    Démarre le serveur dans un thread (port libre choisi automatiquement si `port` vaut 0).
+    """
+    server = MockServer((host, port), config or MockConfig())
+    threading.Thread(target=server.serve_forever, name="mock-server", daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serveur local imitant OpenAI et NewsAPI.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="fixed:0", help="ex: fixed:0.2, uniform:0.1,0.5, lognormal:-1.5,0.5")
+    parser.add_argument("--token-latency", type=float, default=0.0, help="Délai de génération par fragment (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Proportion de requêtes en erreur (0 à 1)")
+    parser.add_argument("--error-status", type=int, default=500, help="Code HTTP des erreurs simulées")
+    parser.add_argument("--canned", help="Fichier JSON de réponses prédéfinies")
+    parser.add_argument("--batch-latency", type=float, default=0.0, help="Durée de traitement des lots Batch API (s)")
+    args = parser.parse_args()
+
+    config = MockConfig(
+        latency=args.latency,
+        token_latency=args.token_latency,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        canned=load_canned(args.canned) if args.canned else None,
+        batch_latency=args.batch_latency,
+    )
+    server = MockServer((args.host, args.port), config)
+    print(f"Serveur simulé sur {server.url}")
+    print(f"  OPENAI_API_BASE={server.url}/v1")
+    print(f"  NEWSAPI_BASE_URL={server.url}/v2")
+    print(f"  BING_SEARCH_BASE_URL={server.url}")
+    print(f"  SERPAPI_BASE_URL={server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1323 @@
+import contextvars
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import List, Dict, Any, Callable, Iterator, Optional, Tuple, Union
+
+import requests
+
+from batch_api import BatchError, current_batch
+from cache import cache_key, get_llm_cache, is_llm_cache_enabled
+from checkpoints import get_checkpoint_store
+from context_builder import build_article_context, count_tokens
+from deadlines import (
+    DeadlineExceeded,
+    collect_degradations,
+    current_deadline,
+    record_degradation,
+    remaining,
+    summarize_degradations,
+    with_stage_budget,
+)
+from dedup import DuplicateArticle, NearDuplicateIndex, dedupe_articles, get_text_index, minhash
+from http_client import get_http_client
+from json_stream import IncrementalJSONParser
+from metrics import current_stage, instrument_stage, record_openai_call, registry
+from ranking import rank_search_results
+from rate_limiter import PRIORITY_NAMES, RateLimitTimeout, current_priority, get_rate_limiter
+from scrape_cache import fetch_article_text, get_scrape_cache, normalize_url, scrape_stats
+from search_cache import build_search_query, get_search_cache
+from search_providers import get_search_deadline, get_search_max_pages, search_articles
+from settings import env_float, env_int
+from singleflight import coalesce, get_group, singleflight_stats
+from tasks import TaskCancelled, report_progress
+
+logger = logging.getLogger(__name__)
+
+# Statistiques des composants partagés, exposées avec les métriques
+registry.register_collector("http_client", lambda: get_http_client().stats())
+registry.register_collector("llm_cache", lambda: get_llm_cache().stats())
+registry.register_collector("scrape_cache", lambda: {**scrape_stats(), **get_scrape_cache().stats()})
+registry.register_collector("search_cache", lambda: get_search_cache().stats())
+registry.register_collector("rate_limiter", lambda: get_rate_limiter().stats())
+registry.register_collector("checkpoints", lambda: get_checkpoint_store().stats())
+registry.register_collector("singleflight", lambda: {
+    f"{group}_{name}": value for group, stats in singleflight_stats().items() for name, value in stats.items()
+})
+
+
+# URL par défaut de l'API OpenAI, surchargeable via OPENAI_API_BASE
+# (par exemple pour pointer vers le serveur local de mock_server.py)
+DEFAULT_OPENAI_API_BASE = "https://api.openai.com/v1"
+
+# Schémas des réponses structurées : en mode strict, l'API garantit une réponse conforme,
+# dont les clés arrivent dans l'ordre du schéma (le titre et l'introduction avant les sections)
+OUTLINE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "title": {"type": "string"},
+        "introduction": {"type": "string"},
+        "sections": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string"},
+                    "subsections": {"type": "array", "items": {"type": "string"}},
+                },
+                "required": ["title", "subsections"],
+                "additionalProperties": False,
+            },
+        },
+        "conclusion": {"type": "string"},
+    },
+    "required": ["title", "introduction", "sections", "conclusion"],
+    "additionalProperties": False,
+}
+
+SIMULATED_ARTICLES_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "articles": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string"},
+                    "url": {"type": "string"},
+                    "summary": {"type": "string"},
+                    "date": {"type": "string"},
+                },
+                "required": ["title", "url", "summary", "date"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["articles"],
+    "additionalProperties": False,
+}
+
+
+class OpenAIAPIError(Exception):
+    """
+    Erreur lors d'un appel à l'API OpenAI (clé manquante, erreur HTTP, flux interrompu).
+    """
+
+
+def _iter_openai_stream(response, cache=None, key: str = "", model: str = "", started: float = 0.0,
+                        stage: Optional[str] = None, reserved_tokens: int = 0,
+                        prompt_tokens: int = 0) -> Iterator[str]:
+    """
+    Lit un flux SSE de l'API OpenAI et produit les fragments de texte au fur et à mesure.
+
+    Une fois le flux terminé, la réponse complète est enregistrée dans le cache
+    sous la même forme qu'une réponse non streamée et l'appel est comptabilisé
+    dans les métriques (durée totale, tokens si le flux les fournit).
+
+    Dans tous les cas (fin du flux, erreur, fermeture anticipée par l'appelant), la réservation
+    de tokens auprès du limiteur de débit est ajustée à l'usage réel, ou à défaut au prompt
+    (`prompt_tokens`) et au texte déjà reçu.
+    """
+    parts = []
+    usage = None
+    # Les flux text/event-stream n'annoncent pas toujours leur encodage
+    response.encoding = "utf-8"
+
+    try:
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+
+            chunk = json.loads(data)
+            usage = chunk.get("usage") or usage
+            choices = chunk.get("choices") or []
+            delta = choices[0].get("delta", {}).get("content") if choices else None
+            if delta:
+                parts.append(delta)
+                yield delta
+    except Exception as e:
+        record_openai_call(model, time.perf_counter() - started, cache="miss" if cache else "off",
+                           error=type(e).__name__, stage=stage)
+        raise OpenAIAPIError(f"Erreur lors de la lecture du flux OpenAI: {e}") from e
+    finally:
+        response.close()
+        if reserved_tokens:
+            get_rate_limiter().settle(reserved_tokens, usage or {
+                "total_tokens": prompt_tokens + count_tokens("".join(parts), model)})
+
+    record_openai_call(model, time.perf_counter() - started, usage, cache="miss" if cache else "off", stage=stage)
+
+    if cache is not None and parts:
+        cache.set(key, {
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(parts)}}],
+        })
+
+
+def json_schema_format(name: str, schema: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Paramètre `response_format` demandant une réponse JSON conforme au schéma (structured outputs).
+
+    Retourne None si OPENAI_STRUCTURED_OUTPUTS vaut 0 (API compatible qui ne gère pas ce mode) :
+    la réponse est alors analysée telle quelle, balises markdown comprises.
+    """
+    if os.environ.get("OPENAI_STRUCTURED_OUTPUTS", "1").lower() in ("0", "false", "no", ""):
+        return None
+    return {"type": "json_schema", "json_schema": {"name": name, "strict": True, "schema": schema}}
+
+
+# Fonction pour appeler l'API OpenAI
+def call_openai_api(prompt: str, model: str = "gpt-4o-mini", max_tokens: int = 1000, temperature: float = 0.7,
+                    cache_stage: Optional[str] = None, refresh: bool = False,
+                    stream: bool = False,
+                    response_format: Optional[Dict[str, Any]] = None) -> Union[Dict[str, Any], Iterator[str]]:
+    """
+    Envoie une requête à l'API OpenAI et retourne la réponse.
+
+    En mode `stream`, la réponse est lue en server-sent events et la fonction retourne
+    un itérateur sur les fragments de texte, consommable par `st.write_stream`.
+
+    Les appels identiques simultanés (hors stream et `refresh`) sont regroupés en un seul envoi.
+    En mode Batch API (voir `batch_api.batch_requests`), les appels des étapes concernées sont
+    différés vers un lot : `BatchPending` est levée tant que le lot n'a pas fourni la réponse.
+
+    Lève `OpenAIAPIError` si la clé API est absente ou si l'appel échoue, et `DeadlineExceeded`
+    si le budget de l'étape en cours est épuisé avant la réponse.
+
+    Args:
+        prompt (str): Prompt utilisateur
+        model (str): Modèle OpenAI
+        max_tokens (int): Nombre maximum de tokens générés
+        temperature (float): Température d'échantillonnage
+        cache_stage (Optional[str]): Nom de l'étape, pour la mise en cache (si activée via LLM_CACHE_STAGES)
+        refresh (bool): Ignorer la réponse en cache et la remplacer par une nouvelle
+        stream (bool): Recevoir la réponse token par token
+        response_format (Optional[Dict]): Format de réponse imposé (voir `json_schema_format`)
+
+    Returns:
+        Union[Dict[str, Any], Iterator[str]]: Réponse JSON de l'API, ou itérateur de texte en mode stream
+    """
+    started = time.perf_counter()
+    cache = get_llm_cache() if is_llm_cache_enabled(cache_stage) else None
+    key = cache_key(model, prompt, max_tokens, temperature, *([response_format] if response_format else []))
+    cache_status = "miss" if cache is not None else "off"
+
+    if cache is not None and not refresh:
+        cached_response = cache.get(key)
+        if cached_response is not None:
+            record_openai_call(model, time.perf_counter() - started, cache="hit")
+            if stream:
+                return iter([cached_response["choices"][0]["message"]["content"]])
+            return cached_response
+
+    api_key = os.environ.get("OPENAI_API_KEY", "")
+
+    if not api_key:
+        record_openai_call(model, 0.0, cache=cache_status, error="missing_api_key")
+        raise OpenAIAPIError("Clé API OpenAI non trouvée. Veuillez configurer votre clé API.")
+
+    api_base = os.environ.get("OPENAI_API_BASE", DEFAULT_OPENAI_API_BASE)
+
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {api_key}"
+    }
+
+    payload = {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+    }
+    if response_format:
+        payload["response_format"] = response_format
+    if stream:
+        payload["stream"] = True
+        # Demander le bloc `usage` en fin de flux pour les métriques de tokens
+        payload["stream_options"] = {"include_usage": True}
+
+    # Mode Batch API (batch.py --batch-api) : la requête rejoint le prochain lot, la réponse arrive au tour suivant
+    collector = current_batch.get()
+    if collector is not None and collector.handles(current_stage.get()):
+        body = {name: value for name, value in payload.items() if name not in ("stream", "stream_options")}
+        try:
+            result = collector.resolve(key, body)
+        except BatchError as e:
+            record_openai_call(model, time.perf_counter() - started, cache="batch", error="batch")
+            raise OpenAIAPIError(str(e)) from e
+        if cache is not None:
+            cache.set(key, result)
+        record_openai_call(model, time.perf_counter() - started, result.get("usage"), cache="batch")
+        if stream:
+            return iter([result["choices"][0]["message"]["content"]])
+        return result
+
+    def acquire_slot(tokens: int) -> float:
+        # L'attente d'un créneau compte dans le budget de l'étape
+        queue_timeout = env_float("OPENAI_QUEUE_TIMEOUT", 120)
+        left = remaining()
+        try:
+            return get_rate_limiter().acquire(
+                tokens, timeout=queue_timeout if left is None else max(0.0, min(queue_timeout, left)))
+        except RateLimitTimeout as e:
+            if left is not None and left <= queue_timeout:
+                raise DeadlineExceeded() from e
+            raise OpenAIAPIError(f"Trop d'appels OpenAI en attente, réessayez dans un instant. ({e})") from e
+
+    def send() -> Union[Dict[str, Any], Iterator[str]]:
+        # Créneau auprès du limiteur partagé (requêtes et tokens par minute), par ordre de priorité
+        limiter = get_rate_limiter()
+        prompt_tokens = count_tokens(prompt, model) if limiter.enabled else 0
+        reserved_tokens = prompt_tokens + max_tokens if limiter.enabled else 0
+        if limiter.enabled:
+            try:
+                waited = acquire_slot(reserved_tokens)
+            except (DeadlineExceeded, OpenAIAPIError):
+                record_openai_call(model, time.perf_counter() - started, cache=cache_status, error="queue_timeout")
+                raise
+            registry.observe("openai_queue_wait_seconds", waited, help="Attente avant envoi des appels OpenAI",
+                             priority=PRIORITY_NAMES.get(current_priority.get(), "other"))
+
+        # Réservation de tokens ajustée à l'usage réel en fin d'appel, ou rendue si l'appel échoue ;
+        # un flux s'en charge lui-même une fois lu (voir `_iter_openai_stream`)
+        usage = None
+        streaming = False
+        try:
+            # Client partagé : connexions keep-alive, timeouts et nouvelles tentatives (429/5xx) ;
+            # chaque nouvelle tentative consomme une requête auprès du limiteur
+            response = get_http_client().post(
+                f"{api_base.rstrip('/')}/chat/completions",
+                headers=headers,
+                data=json.dumps(payload),
+                stream=stream,
+                hooks={"response": limiter.observe_response},
+                on_retry=(lambda: acquire_slot(0)) if limiter.enabled else None,
+            )
+            response.raise_for_status()
+            if stream:
+                streaming = True
+                return _iter_openai_stream(response, cache, key, model, started, current_stage.get(),
+                                           reserved_tokens, prompt_tokens)
+            result = response.json()
+            usage = result.get("usage") or {"total_tokens": reserved_tokens}
+            if cache is not None:
+                cache.set(key, result)
+            record_openai_call(model, time.perf_counter() - started, result.get("usage"), cache=cache_status)
+            return result
+        except DeadlineExceeded:
+            record_openai_call(model, time.perf_counter() - started, cache=cache_status, error="deadline")
+            raise
+        except OpenAIAPIError:
+            # Pas de créneau pour une nouvelle tentative
+            record_openai_call(model, time.perf_counter() - started, cache=cache_status, error="queue_timeout")
+            raise
+        except requests.exceptions.HTTPError as e:
+            record_openai_call(model, time.perf_counter() - started, cache=cache_status,
+                               error=f"http_{response.status_code}")
+            raise OpenAIAPIError(f"Erreur HTTP lors de l'appel à l'API OpenAI: {e}\nDétails: {response.text}") from e
+        except Exception as e:
+            record_openai_call(model, time.perf_counter() - started, cache=cache_status, error=type(e).__name__)
+            raise OpenAIAPIError(f"Erreur lors de l'appel à l'API OpenAI: {e}") from e
+        finally:
+            if reserved_tokens and not streaming:
+                if usage is None:
+                    limiter.refund(reserved_tokens)
+                else:
+                    limiter.settle(reserved_tokens, usage)
+
+    if stream or refresh:
+        return send()
+
+    # Appels identiques simultanés (ex: plusieurs sessions sur le même secteur) : un seul envoi
+    sent = []
+
+    def send_once() -> Dict[str, Any]:
+        sent.append(True)
+        return send()
+
+    result = get_group("openai").do(key, send_once)
+    if not sent:
+        record_openai_call(model, time.perf_counter() - started, cache="coalesced")
+    return result
+
+
+def extract_keywords(title: str, max_keywords: int = 3) -> List[str]:
+    """
+    Extrait les mots-clés pertinents d'un titre.
+
+    Args:
+        title (str): Titre de l'article
+        max_keywords (int): Nombre maximum de mots-clés à extraire
+
+    Returns:
+        List[str]: Liste des mots-clés extraits
+    """
+    # Charger les stopwords français
+    stop_words = set([
+            'le', 'la', 'les', 'un', 'une', 'des', 'de', 'du', 'à', 'en', 'et',
+            'dans', 'pour', 'par', 'sur', 'qui', 'que', 'quoi', 'dont', 'comment'
+        ])
+
+    # Nettoyer et tokenizer le titre
+    words = title.lower().split()
+
+    # Filtrer les stopwords et garder uniquement les mots significatifs
+    keywords = [
+        word for word in words
+        if word not in stop_words and len(word) > 2
+    ]
+
+    # Limiter le nombre de mots-clés
+    return keywords[:max_keywords]
+
+
+@instrument_stage("search")
+@with_stage_budget("search")
+@coalesce("search")
+def search_recent_articles(selected_topic: str, sector: str, keywords: str, max_age_hours: int = 72,
+                           num_results: int = 5) -> List[Dict[str, str]]:
+    """
+    Recherche d'articles récents basée sur le titre, le secteur et les mots-clés.
+
+    Args:
+        selected_topic (str): Titre de l'article choisi
+        sector (str): Secteur d'activité
+        keywords (str): Mots-clés initiaux
+        max_age_hours (int): Âge maximum des articles
+        num_results (int): Nombre de résultats
+
+    Returns:
+        List[Dict[str, str]]: Liste des articles trouvés
+    """
+    # Extraire les mots-clés du titre
+    title_keywords = extract_keywords(selected_topic)
+
+    # Combiner les mots-clés du titre, du secteur et initiaux
+    search_terms = (
+            title_keywords +
+            [sector] +
+            [kw.strip() for kw in keywords.split(',') if kw.strip()]
+    )
+
+    # Construire la requête de recherche (canonique : même demande, même requête)
+    query = build_search_query(search_terms)
+
+    # Tous les fournisseurs configurés sont interrogés en parallèle, dans un délai global ;
+    # les candidats sont classés par pertinence BM25, et la page suivante n'est demandée que si
+    # les candidats pertinents ne suffisent pas
+    count = num_results * 2  # Demander plus pour filtrer
+    candidates: List[Dict[str, str]] = []
+    seen = set()
+    articles: List[Dict[str, str]] = []
+    for page in range(1, get_search_max_pages() + 1):
+        # Le délai global de la recherche est borné par le budget restant de l'étape
+        left = remaining()
+        if left is not None and left <= 0:
+            record_degradation("search", "pages_skipped")
+            break
+        results, report = search_articles(query, max_age_hours, count=count, page=page,
+                                          deadline=None if left is None else min(get_search_deadline(), left))
+        timeouts = sum(1 for status in report["providers"].values() if status == "timeout")
+        if timeouts:
+            record_degradation("search", "providers_timeout", timeouts)
+        for article in results:
+            if normalize_url(article["url"]) not in seen:
+                seen.add(normalize_url(article["url"]))
+                candidates.append(article)
+
+        articles = rank_search_results(candidates, search_terms, limit=num_results)
+        # Aucun fournisseur n'a rempli sa page : il n'y a pas de page suivante
+        if len(articles) >= num_results or all(n < count for n in report["results"].values()):
+            break
+
+    articles = [{key: article[key] for key in ("title", "url", "summary", "date")} for article in articles]
+    registry.inc("search_articles_total", len(articles), help="Articles retenus pour la rédaction", source="search")
+
+    # Basculement vers la simulation si aucun fournisseur n'a répondu, complément si pas assez d'articles
+    if len(articles) < num_results:
+        try:
+            simulated = simulate_search_with_openai(query, num_results - len(articles))
+        except DeadlineExceeded:
+            # Plus le temps de compléter : la rédaction s'appuiera sur les articles déjà trouvés
+            record_degradation("search", "simulation_skipped", num_results - len(articles))
+            simulated = []
+        registry.inc("search_articles_total", len(simulated), source="simulated")
+        articles.extend(simulated)
+
+    return articles
+
+
+@instrument_stage("simulated_search")
+@with_stage_budget("simulated_search")
+def simulate_search_with_openai(query: str, num_results: int = 5) -> List[Dict[str, str]]:
+    """
+    Utilise OpenAI pour simuler une recherche d'articles récents.
+    """
+    prompt = f"""
+    Génère {num_results} articles fictifs récents (moins de 72 heures) sur le sujet suivant: {query}.
+    Pour chaque article, fournir:
+    1. Un titre réaliste
+    2. Une URL fictive mais plausible
+    3. Un résumé de 3-5 lignes
+    4. Une date de publication dans les dernières 72h
+
+    Format JSON attendu:
+    {{
+        "articles": [
+            {{
+                "title": "Titre de l'article 1",
+                "url": "https://example.com/article1",
+                "summary": "Résumé de l'article en 3-5 lignes",
+                "date": "YYYY-MM-DD"
+            }},
+            ...
+        ]
+    }}
+    """
+
+    response = call_openai_api(prompt, max_tokens=1500, cache_stage="simulated_search",
+                               response_format=json_schema_format("simulated_articles", SIMULATED_ARTICLES_SCHEMA))
+    articles_text = response["choices"][0]["message"]["content"]
+
+    # Objet {"articles": [...]}, éventuellement entre balises markdown hors mode structuré (ou simple liste)
+    parser = IncrementalJSONParser()
+    parser.feed(articles_text)
+    try:
+        articles = parser.close()
+        complete = True
+    except ValueError as e:
+        logger.warning("Réponse des articles simulés incomplète: %s", e)
+        articles = parser.value
+        complete = False
+
+    if isinstance(articles, dict):
+        articles = articles.get("articles")
+    if not isinstance(articles, list):
+        logger.warning("Articles simulés illisibles : %s", articles_text)
+        return []
+    if not complete:
+        # Réponse tronquée : le dernier article est peut-être incomplet
+        articles = articles[:-1]
+
+    return [
+        {"title": article["title"], "url": article["url"], "summary": article.get("summary", ""),
+         "date": article.get("date", "")}
+        for article in articles
+        if isinstance(article, dict) and article.get("title") and article.get("url")
+    ]
+
+
+# Fonctions pour les différentes étapes du processus
+@instrument_stage("topic_ideas")
+@with_stage_budget("topic_ideas")
+def generate_topic_ideas(sector: str, keywords: str, services: str) -> List[str]:
+    """
+    Génère 5 idées de sujets d'articles basés sur les inputs utilisateur.
+    """
+    prompt = f"""
+    En tant qu'expert en marketing de contenu, propose 5 idées de sujets d'articles pour le secteur "{sector}" 
+    avec les mots-clés "{keywords}" et les services/produits "{services}".
+
+    Pour chaque idée, fournir:
+    - Un titre accrocheur et SEO-friendly
+    - Une brève description du sujet (1-2 phrases)
+
+    Présente les résultats sous forme de liste numérotée.
+    """
+
+    response = call_openai_api(prompt, cache_stage="topic_ideas")
+
+    ideas_text = response["choices"][0]["message"]["content"]
+    # Réponse brute pour débogage
+    logger.debug("Idées de sujets reçues: %s", ideas_text)
+
+    # Approche simplifiée pour extraire les idées
+    ideas = []
+    for line in ideas_text.split("\n"):
+        line = line.strip()
+        if line and (line.startswith("1.") or line.startswith("2.") or
+                     line.startswith("3.") or line.startswith("4.") or
+                     line.startswith("5.")):
+            # Extraire tout ce qui suit le numéro et le point
+            parts = line.split(".", 1)
+            if len(parts) > 1:
+                ideas.append(parts[1].strip())
+
+    # Si moins de 5 idées, générer des idées par défaut
+    while len(ideas) < 5:
+        ideas.append(f"Sujet sur {sector} et {keywords}")
+
+    return ideas[:5]
+
+
+@instrument_stage("editorial_angles")
+@with_stage_budget("editorial_angles")
+def generate_editorial_angles(topic: str, sector: str) -> List[str]:
+    """
+    Génère 5 angles éditoriaux différents pour un sujet donné.
+    """
+    prompt = f"""
+    Pour le sujet d'article "{topic}" dans le secteur "{sector}", propose 5 angles éditoriaux différents.
+    Chaque angle doit être distinct et apporter une perspective unique.
+
+    Exemples d'angles: analytique, émotionnel, didactique, anecdotique, comparatif, etc.
+
+    Pour chaque angle, fournir:
+    - Un nom court et descriptif
+    - Une brève explication de l'approche (1-2 phrases)
+
+    Présente les résultats sous forme de liste numérotée.
+    """
+
+    response = call_openai_api(prompt, cache_stage="editorial_angles")
+    angles_text = response["choices"][0]["message"]["content"]
+
+    # Traitement pour extraire les angles
+    angles = []
+    current_angle = ""
+
+    for line in angles_text.split("\n"):
+        line = line.strip()
+        if line and (line[0].isdigit() or line.startswith("-")):
+            # Nouvelle entrée détectée
+            if current_angle and len(current_angle) > 0:
+                angles.append(current_angle)
+
+            # Nettoyer la ligne
+            clean_line = line.split(".", 1)[-1].strip() if "." in line else line.strip()
+            clean_line = clean_line[1:].strip() if clean_line.startswith("-") else clean_line
+
+            # Extraire juste le nom de l'angle si disponible
+            if ":" in clean_line:
+                angle_name = clean_line.split(":", 1)[0].strip()
+                current_angle = angle_name
+            else:
+                current_angle = clean_line
+        elif line and current_angle:
+            # Ligne supplémentaire pour l'entrée actuelle
+            continue
+
+    # Ajouter le dernier angle s'il existe
+    if current_angle and len(current_angle) > 0:
+        angles.append(current_angle)
+
+    # Garantir qu'on a au moins 5 angles
+    if len(angles) < 5:
+        additional_angles = ["Angle " + str(i + 1) for i in range(len(angles), 5)]
+        angles.extend(additional_angles)
+
+    return angles[:5]  # Limiter à 5 angles
+
+
+def normalize_outline(outline: Any, topic: str) -> Optional[Dict[str, Any]]:
+    """
+    Met un plan (éventuellement partiel) à la forme attendue : titre, introduction, sections
+    (titre et sous-points) et conclusion, les champs manquants étant complétés.
+
+    Returns:
+        Optional[Dict[str, Any]]: Plan, ou None s'il ne contient aucune section exploitable
+    """
+    if not isinstance(outline, dict):
+        return None
+    sections = [
+        {
+            "title": str(section["title"]),
+            "subsections": [str(item) for item in section.get("subsections") or [] if isinstance(item, str)],
+        }
+        for section in outline.get("sections") or []
+        if isinstance(section, dict) and section.get("title")
+    ]
+    if not sections:
+        return None
+    return {
+        "title": str(outline.get("title") or f"Article sur {topic}"),
+        "introduction": str(outline.get("introduction") or ""),
+        "sections": sections,
+        "conclusion": str(outline.get("conclusion") or ""),
+    }
+
+
+def parse_article_outline(outline_text: str, topic: str) -> Dict[str, Any]:
+    """
+    Extrait le plan JSON de la réponse du modèle.
+
+    Une réponse tronquée (limite de tokens) est analysée jusqu'au dernier élément reçu ;
+    le plan par défaut n'est utilisé que si aucune section n'est exploitable.
+    """
+    parser = IncrementalJSONParser()
+    parser.feed(outline_text)
+    try:
+        outline = parser.close()
+    except ValueError as e:
+        logger.warning("Plan incomplet (%s) : seule la partie reçue est analysée", e)
+        outline = parser.value
+
+    normalized = normalize_outline(outline, topic)
+    if normalized is not None:
+        return normalized
+
+    logger.warning("Plan illisible, plan par défaut utilisé. Texte reçu: %s", outline_text)
+    return {
+        "title": f"Article sur {topic}",
+        "introduction": "Introduction à définir",
+        "sections": [
+            {"title": "Première partie", "subsections": ["Point 1", "Point 2"]},
+            {"title": "Deuxième partie", "subsections": ["Point 1", "Point 2"]},
+        ],
+        "conclusion": "Conclusion à définir"
+    }
+
+
+@instrument_stage("article_outline")
+@with_stage_budget("article_outline")
+def generate_article_outline(topic: str, angle: str, tone: str, length: str, style: str,
+                             refresh: bool = False, stream: bool = False) -> Union[Dict[str, Any], Iterator[str]]:
+    """
+    Génère un plan d'article structuré.
+
+    `refresh` force un nouvel appel (bouton « Regénérer le plan ») au lieu de réutiliser le cache.
+    La réponse est demandée en JSON conforme à `OUTLINE_SCHEMA`.
+    En mode `stream`, retourne le texte brut au fil de l'eau, à analyser avec `parse_article_outline`
+    (ou, pour un affichage progressif, avec `IncrementalJSONParser`).
+    """
+    prompt = f"""
+    Crée un plan détaillé pour un article sur le sujet:
+    "{topic}" 
+
+    Avec l'angle éditorial:
+    "{angle}"
+
+    Paramètres de rédaction:
+    - Ton: {tone}
+    - Longueur: {length}
+    - Style: {style}
+
+    Le plan doit inclure:
+    1. Un titre accrocheur
+    2. Une introduction
+    3. 2-4 parties principales avec sous-points
+    4. Une conclusion
+
+    Format JSON attendu:
+    {{
+        "title": "Titre de l'article",
+        "introduction": "Description de l'introduction",
+        "sections": [
+            {{
+                "title": "Titre section 1",
+                "subsections": ["Sous-point 1", "Sous-point 2"]
+            }},
+            ...
+        ],
+        "conclusion": "Description de la conclusion"
+    }}
+    """
+
+    response_format = json_schema_format("article_outline", OUTLINE_SCHEMA)
+    if stream:
+        return call_openai_api(prompt, max_tokens=1200, cache_stage="article_outline", refresh=refresh,
+                               stream=True, response_format=response_format)
+
+    response = call_openai_api(prompt, max_tokens=1200, cache_stage="article_outline", refresh=refresh,
+                               response_format=response_format)
+    outline_text = response["choices"][0]["message"]["content"]
+
+    # Extraction du JSON du texte
+    return parse_article_outline(outline_text, topic)
+
+
+@instrument_stage("scrape_article")
+@with_stage_budget("scrape_article")
+def scrape_and_summarize_article(url: str, text_index: Optional[NearDuplicateIndex] = None) -> Dict[str, str]:
+    """
+    Scrape et résume un article à partir de son URL
+
+    Lève `DuplicateArticle`, avant tout résumé, si son texte est un quasi-doublon
+    d'un article déjà enregistré dans `text_index`, et `DeadlineExceeded` si le budget est épuisé
+    avant la lecture de la page. Si le temps manque pour le résumé, seul le texte est retourné
+    (le résumé de la recherche en tiendra lieu).
+
+    Args:
+        url (str): URL de l'article
+        text_index (Optional[NearDuplicateIndex]): Textes des articles déjà retenus dans le lot
+
+    Returns:
+        Dict contenant le contenu scrapé et résumé
+    """
+    try:
+        # Extraction du contenu avec trafilatura, via le cache des pages (revalidation conditionnelle)
+        content = fetch_article_text(url)
+
+        if not content:
+            return None
+
+        # Même dépêche reprise par un autre site : inutile de la résumer une seconde fois
+        if text_index is not None and text_index.add(minhash(content)):
+            registry.inc("articles_deduplicated_total", help="Quasi-doublons écartés avant traitement", step="text")
+            raise DuplicateArticle(url)
+
+        # Génération de résumé avec GPT
+        summary_prompt = f"""
+        Résume professionnellement le contenu suivant en mettant en avant 
+        les points clés et les insights principaux. 
+
+        Contenu de l'article:
+        {content[:4000]}  # Limiter la longueur
+
+        Consignes:
+        - Résumé concis (150-250 mots)
+        - Style professionnel
+        - Mettre en évidence les informations essentielles
+        - Structure claire
+        """
+
+        # Appel à l'API OpenAI pour le résumé
+        try:
+            summary_response = call_openai_api(
+                summary_prompt,
+                model="gpt-4o-mini",
+                max_tokens=300,
+                cache_stage="article_summary"
+            )
+        except DeadlineExceeded:
+            record_degradation("scraping", "search_summaries")
+            return {"original_content": content}
+
+        summary = summary_response["choices"][0]["message"]["content"]
+        report_progress("summarizing", advance=1)
+
+        return {
+            "original_content": content,
+            "summary": summary
+        }
+
+    except (DuplicateArticle, DeadlineExceeded, TaskCancelled):
+        raise
+    except Exception as e:
+        logger.warning("Erreur de scrapping : %s", e)
+        return None
+
+
+# Attente des workers de scraping après l'échéance de l'étape, le temps qu'ils la constatent (secondes)
+SCRAPE_DEADLINE_GRACE = 0.25
+
+
+@instrument_stage("scraping")
+@with_stage_budget("scraping")
+def process_articles_for_generation(recent_articles: List[Dict], max_articles: int = 3, concurrent: bool = True,
+                                    max_workers: Optional[int] = None,
+                                    url_timeout: Optional[float] = None) -> List[Dict]:
+    """
+    Traite les articles pour la génération
+
+    Les quasi-doublons (même dépêche reprise par plusieurs sites) sont écartés d'abord
+    d'après leur titre et leur description, puis d'après le texte extrait, avant le résumé ;
+    un doublon découvert au scraping est remplacé par le candidat distinct suivant.
+
+    En mode concurrent, le téléchargement, l'extraction et le résumé de chaque URL
+    s'exécutent en parallèle : un site lent ou indisponible ne retarde pas les autres
+    et est abandonné une fois son délai dépassé.
+
+    Une fois le budget de l'étape épuisé, les articles restants ne sont plus lus : ils sont
+    retournés avec le seul résumé de la recherche (mode dégradé signalé par `record_degradation`).
+
+    Args:
+        recent_articles (List[Dict]): Articles à traiter
+        max_articles (int): Nombre max d'articles à traiter
+        concurrent (bool): Traiter les URLs en parallèle
+        max_workers (Optional[int]): Nombre max de workers (SCRAPE_MAX_WORKERS, 4 par défaut)
+        url_timeout (Optional[float]): Délai max par URL en secondes (SCRAPE_URL_TIMEOUT, 20 par défaut)
+
+    Returns:
+        Liste d'articles scrapés et résumés, dans l'ordre d'origine
+    """
+    distinct_articles, _ = dedupe_articles(recent_articles)
+    candidates = distinct_articles[:max_articles]
+    # Candidats de réserve, pour remplacer les doublons découverts au scraping
+    reserve = iter(distinct_articles[max_articles:])
+    text_index = get_text_index()
+    # Avancement visible dans l'interface quand l'étape s'exécute en tâche d'arrière-plan
+    report_progress("summarizing", done=0, total=len(candidates))
+    report_progress("scraping", done=0, total=len(candidates))
+    # Positions des articles non lus faute de temps
+    skipped = set()
+
+    if not concurrent or len(candidates) <= 1:
+        scraped_articles = []
+        for i, article in enumerate(candidates):
+            scraped_article = None
+            while article is not None:
+                try:
+                    scraped_article = scrape_and_summarize_article(article['url'], text_index)
+                    break
+                except DuplicateArticle:
+                    article = candidates[i] = next(reserve, None)
+                except DeadlineExceeded:
+                    skipped.add(i)
+                    break
+            scraped_articles.append(scraped_article)
+            report_progress("scraping", advance=1)
+    else:
+        max_workers = max_workers or env_int("SCRAPE_MAX_WORKERS", 4)
+        url_timeout = url_timeout or env_float("SCRAPE_URL_TIMEOUT", 20)
+        workers = max(1, min(max_workers, len(candidates)))
+
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scrape")
+        started = time.monotonic()
+        # Échéance de l'étape : passé ce délai, les workers échouent d'eux-mêmes (appels réseau bornés) ;
+        # ils ne sont plus attendus au-delà d'un court délai de grâce
+        stage_deadline = (current_deadline.get() or float("inf")) + SCRAPE_DEADLINE_GRACE
+
+        def submit(article: Dict) -> Future:
+            # Chaque worker hérite du contexte courant pour que ses appels restent attribués à cette étape
+            return executor.submit(contextvars.copy_context().run, scrape_and_summarize_article, article['url'],
+                                   text_index)
+
+        # Future -> (position dans le résultat, échéance)
+        futures: Dict[Future, Tuple[int, float]] = {}
+        for i, article in enumerate(candidates):
+            # Une URL démarre au plus tard après les vagues précédentes : son échéance en tient compte
+            futures[submit(article)] = (i, min(stage_deadline, started + url_timeout * (i // workers + 1)))
+        scraped_articles = [None] * len(candidates)
+
+        try:
+            while futures:
+                timeout = max(0.0, min(deadline for _, deadline in futures.values()) - time.monotonic())
+                done, _ = wait(futures, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i, _ = futures.pop(future)
+                    try:
+                        scraped_articles[i] = future.result()
+                    except DuplicateArticle:
+                        # Un worker vient de se libérer : le candidat de réserve démarre aussitôt
+                        replacement = next(reserve, None)
+                        if replacement is not None:
+                            candidates[i] = replacement
+                            futures[submit(replacement)] = (i, min(stage_deadline, time.monotonic() + url_timeout))
+                            continue
+                    except DeadlineExceeded:
+                        skipped.add(i)
+                    except TaskCancelled:
+                        raise
+                    except Exception as e:
+                        logger.warning("Erreur de scrapping : %s", e)
+                    report_progress("scraping", advance=1)
+
+                now = time.monotonic()
+                for future, (i, deadline) in list(futures.items()):
+                    if deadline <= now and not future.done():
+                        logger.warning("Scraping abandonné (délai dépassé) : %s", candidates[i]['url'])
+                        del futures[future]
+                        if now >= stage_deadline:
+                            skipped.add(i)
+                        report_progress("scraping", advance=1)
+        finally:
+            # Ne pas attendre les sites trop lents : leurs résultats sont simplement ignorés
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+
+    if skipped:
+        record_degradation("scraping", "sources_skipped", len(skipped))
+
+    processed_articles = []
+
+    for i, (article, scraped_article) in enumerate(zip(candidates, scraped_articles)):
+        if scraped_article:
+            processed_articles.append({
+                **article,
+                **scraped_article
+            })
+        elif i in skipped and article is not None:
+            # Non lu faute de temps : la rédaction s'appuie sur le résumé de la recherche
+            processed_articles.append(dict(article))
+
+    return processed_articles
+
+
+@instrument_stage("article_with_context")
+@with_stage_budget("article_with_context")
+def generate_article_with_context(
+        topic: str,
+        angle: str,
+        processed_articles: List[Dict]
+) -> str:
+    """
+    Génère un article avec contexte des articles scrapés
+
+    Args:
+        topic (str): Sujet de l'article
+        angle (str): Angle éditorial
+        processed_articles (List[Dict]): Articles traités
+
+    Returns:
+        Article généré
+    """
+    # Construire le contexte
+    context = "\n\n".join([
+        f"Article {i + 1} Résumé:\n{article['summary']}"
+        for i, article in enumerate(processed_articles)
+    ])
+
+    generation_prompt = f"""
+    Génère un article sur le sujet "{topic}" avec l'angle "{angle}".
+
+    Contexte des articles récents:
+    {context}
+
+    Consignes:
+    - Intègre les insights des articles scrapés
+    - Apporte une perspective unique
+    - Utilise les informations contextuelles
+    - Maintiens une structure claire et professionnelle
+    """
+
+    response = call_openai_api(
+        generation_prompt,
+        model="gpt-4o-mini",
+        max_tokens=1500
+    )
+
+    return response["choices"][0]["message"]["content"]
+
+
+# Longueur cible en mots selon l'option choisie
+LENGTH_WORD_COUNTS = {
+    "Court (~300 mots)": 300,
+    "Moyen (~600 mots)": 600,
+    "Long (~1200 mots)": 1200
+}
+
+# Longueurs rédigées section par section en mode "auto" (ARTICLE_GENERATION_MODE)
+PARALLEL_LENGTHS = {"Long (~1200 mots)"}
+
+
+def format_outline(outline: Dict[str, Any]) -> str:
+    """
+    Met en forme le plan pour l'insérer dans un prompt.
+    """
+    outline_formatted = f"""
+    Titre: {outline['title']}
+
+    Introduction: {outline['introduction']}
+
+    """
+
+    for i, section in enumerate(outline['sections']):
+        outline_formatted += f"Section {i + 1}: {section['title']}\n"
+        for subsection in section['subsections']:
+            outline_formatted += f"- {subsection}\n"
+        outline_formatted += "\n"
+
+    outline_formatted += f"Conclusion: {outline['conclusion']}"
+    return outline_formatted
+
+
+def use_section_parallel_generation(length: str, mode: Optional[str] = None) -> bool:
+    """
+    Indique si l'article doit être rédigé section par section en parallèle.
+
+    Args:
+        length (str): Longueur choisie
+        mode (Optional[str]): "single", "parallel" ou "auto" (ARTICLE_GENERATION_MODE, "auto" par défaut :
+            parallèle pour les articles longs uniquement)
+    """
+    mode = (mode or os.environ.get("ARTICLE_GENERATION_MODE", "auto")).strip().lower()
+    if mode == "parallel":
+        return True
+    if mode == "single":
+        return False
+    return length in PARALLEL_LENGTHS
+
+
+def article_parts(outline: Dict[str, Any], word_count: int) -> List[Dict[str, Any]]:
+    """
+    Découpe le plan en parties rédigées séparément : introduction, chaque section, conclusion.
+
+    Chaque partie porte son titre (None pour l'introduction), sa consigne, la partie précédente
+    (pour la transition) et sa part de la longueur cible.
+    """
+    sections = outline['sections']
+    frame_words = max(60, word_count // 8)
+    section_words = max(100, (word_count - 2 * frame_words) // max(1, len(sections)))
+
+    parts = [{
+        "heading": None,
+        "brief": f"l'introduction ({outline['introduction']})",
+        "previous": None,
+        "words": frame_words,
+    }]
+    previous = "l'introduction"
+    for section in sections:
+        points = "\n".join(f"- {subsection}" for subsection in section['subsections'])
+        parts.append({
+            "heading": section['title'],
+            "brief": f"la section « {section['title']} », qui développe :\n{points}",
+            "previous": previous,
+            "words": section_words,
+        })
+        previous = f"la section « {section['title']} »"
+    parts.append({
+        "heading": "Conclusion",
+        "brief": f"la conclusion ({outline['conclusion']})",
+        "previous": previous,
+        "words": frame_words,
+    })
+    return parts
+
+
+def _section_prompt(part: Dict[str, Any], topic: str, angle: str, tone: str, style: str,
+                    outline_formatted: str, sources: str) -> str:
+    transition = (
+        f"Commence par une phrase de transition naturelle depuis {part['previous']}."
+        if part['previous'] else "Accroche le lecteur dès la première phrase."
+    )
+    return f"""
+    Tu rédiges un article sur le sujet "{topic}" avec l'angle "{angle}", une partie à la fois.
+    Plan complet de l'article (pour la cohérence d'ensemble):
+
+    {outline_formatted}
+
+    Les articles réel pour inspiration : 
+    {sources}
+
+    Rédige uniquement {part['brief']}
+
+    Consignes:
+    - {transition}
+    - Environ {part['words']} mots
+    - Ton: {tone}
+    - Style: {style}
+    - N'écris pas le titre de la partie ni celui de l'article, pas de conclusion générale hors de la conclusion
+    - Ne traite pas le contenu des autres parties du plan
+    """
+
+
+def _format_part(part: Dict[str, Any], text: str) -> str:
+    text = text.strip()
+    return f"## {part['heading']}\n\n{text}" if part['heading'] else text
+
+
+def generate_article_by_sections(outline: Dict[str, Any], topic: str, angle: str, tone: str, length: str,
+                                 style: str, processed_articles: List[Dict],
+                                 stream: bool = False,
+                                 max_workers: Optional[int] = None) -> Union[str, Iterator[str]]:
+    """
+    Rédige l'introduction, chaque section et la conclusion en requêtes simultanées,
+    puis les assemble dans l'ordre du plan.
+
+    Toutes les requêtes partagent le plan complet et le contexte des sources ; chaque partie
+    s'ouvre sur une transition depuis la précédente. La durée totale est ainsi proche de celle
+    de la partie la plus longue plutôt que de la somme des parties.
+
+    En mode `stream`, l'introduction est streamée pendant que les autres parties sont rédigées,
+    puis chaque partie est produite dès que les précédentes l'ont été.
+
+    Args:
+        max_workers (Optional[int]): Requêtes simultanées (ARTICLE_SECTION_WORKERS, 6 par défaut)
+
+    Returns:
+        Union[str, Iterator[str]]: Article assemblé, ou itérateur sur son texte
+    """
+    word_count = LENGTH_WORD_COUNTS.get(length, 600)
+    outline_formatted = format_outline(outline)
+    parts = article_parts(outline, word_count)
+
+    # Le même contexte de sources, calculé une fois, accompagne chaque partie
+    fixed_prompt = _section_prompt(parts[1] if len(parts) > 2 else parts[0], topic, angle, tone, style,
+                                   outline_formatted, "")
+    sources, _ = build_article_context(processed_articles, f"{topic} {angle} {outline_formatted}",
+                                       fixed_prompt=fixed_prompt)
+    prompts = [_section_prompt(part, topic, angle, tone, style, outline_formatted, sources) for part in parts]
+    max_tokens = [min(2000, part['words'] * 2 + 200) for part in parts]
+
+    max_workers = max_workers or env_int("ARTICLE_SECTION_WORKERS", 6)
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(parts))), thread_name_prefix="section")
+
+    def submit(i: int):
+        # Le contexte courant (étape "article") est propagé pour les métriques
+        return executor.submit(contextvars.copy_context().run, call_openai_api, prompts[i],
+                               max_tokens=max_tokens[i])
+
+    def text_of(future) -> str:
+        return future.result()["choices"][0]["message"]["content"]
+
+    header = f"# {outline['title']}\n\n"
+
+    if not stream:
+        try:
+            futures = [submit(i) for i in range(len(parts))]
+            texts = [_format_part(part, text_of(future)) for part, future in zip(parts, futures)]
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return header + "\n\n".join(texts)
+
+    # Les parties suivantes partent avant le flux de l'introduction
+    futures = [submit(i) for i in range(1, len(parts))]
+    try:
+        intro_stream = call_openai_api(prompts[0], max_tokens=max_tokens[0], stream=True)
+    except Exception:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+
+    def chunks() -> Iterator[str]:
+        try:
+            yield header
+            yield from intro_stream
+            for part, future in zip(parts[1:], futures):
+                yield "\n\n" + _format_part(part, text_of(future))
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    return chunks()
+
+
+@instrument_stage("article")
+@with_stage_budget("article")
+def generate_article(outline: Dict[str, Any], topic: str, angle: str, tone: str, length: str, style: str,
+                     recent_articles: Optional[List[Dict]] = None,
+                     processed_articles: Optional[List[Dict]] = None,
+                     stream: bool = False, mode: Optional[str] = None) -> Union[str, Iterator[str]]:
+    """
+    Génère l'article complet basé sur le plan, lss articles processesd et les paramètres.
+
+    Les articles sources (`recent_articles`) sont scrapés et résumés, sauf si leur version
+    traitée est déjà fournie via `processed_articles`.
+    En mode `stream`, les articles sources sont traités immédiatement puis la fonction
+    retourne un itérateur sur le texte de l'article au fil de sa génération.
+
+    Les sources sont insérées sous forme de résumés et d'extraits classés par pertinence,
+    dans la limite du budget de tokens du prompt (voir `build_article_context`).
+    Les articles longs sont rédigés section par section en parallèle
+    (voir `use_section_parallel_generation` et `generate_article_by_sections`).
+    """
+    if processed_articles is None:
+        processed_articles = process_articles_for_generation(recent_articles or [])
+    report_progress("writing")
+
+    # En mode Batch API, l'article est rédigé en une seule requête du lot (pas de sections simultanées)
+    if use_section_parallel_generation(length, mode) and current_batch.get() is None:
+        return generate_article_by_sections(outline, topic, angle, tone, length, style, processed_articles,
+                                            stream=stream)
+
+    # Déterminer la longueur approximative en mots
+    word_count = LENGTH_WORD_COUNTS.get(length, 600)
+
+    # Création du plan formaté pour le prompt
+    outline_formatted = format_outline(outline)
+
+    prompt = f"""
+    Rédige un article complet et professionnel sur le sujet "{topic}" avec l'angle "{angle}" 
+    en suivant précisément le plan ci-dessous:
+
+    {outline_formatted}
+
+    Les articles réel pour inspiration : 
+    {{sources}}
+    
+    Paramètres de rédaction:
+    - Ton: {tone}
+    - Longueur cible: environ {word_count} mots
+    - Style: {style}
+
+    L'article doit être cohérent, engageant, et respecter les meilleures pratiques SEO sans compromettre la qualité éditoriale.
+    Utilise des paragraphes clairs, des sous-titres pertinents, et une structure logique.
+    """
+
+    # Le plan et les consignes sont toujours envoyés : les sources se partagent le budget restant
+    sources, _ = build_article_context(
+        processed_articles, f"{topic} {angle} {outline_formatted}", fixed_prompt=prompt.replace("{sources}", "")
+    )
+    prompt = prompt.replace("{sources}", sources)
+
+    if stream:
+        return call_openai_api(prompt, max_tokens=2000, stream=True)
+
+    response = call_openai_api(prompt, max_tokens=2000)
+    article_text = response["choices"][0]["message"]["content"]
+
+    return article_text
+
+
+def run_workflow(sector: str, keywords: str, services: str = "", tone: str = "Professionnel",
+                 length: str = "Moyen (~600 mots)", style: str = "Blog", topic: Optional[str] = None,
+                 angle: Optional[str] = None,
+                 on_stage: Optional[Callable[[str, float], None]] = None,
+                 workflow_id: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Exécute le workflow complet sans interface : sujet, recherche, angle, plan, puis article.
+
+    Sans sujet ou angle imposé, la première proposition du modèle est retenue.
+
+    Args:
+        sector (str): Secteur d'activité
+        keywords (str): Mots-clés séparés par des virgules
+        services (str): Services/produits associés
+        tone (str): Ton de l'article
+        length (str): Longueur de l'article
+        style (str): Style de l'article
+        topic (Optional[str]): Sujet imposé (sinon généré)
+        angle (Optional[str]): Angle éditorial imposé (sinon généré)
+        on_stage (Optional[Callable]): Appelé avec (nom de l'étape, durée en secondes) à la fin de chaque étape
+        workflow_id (Optional[str]): Identifiant de reprise : les étapes déjà enregistrées sous cet
+            identifiant avec les mêmes entrées sont reprises sans nouvel appel
+
+    Returns:
+        Dict[str, Any]: Sujet, angle, articles sources, plan, article, durées par étape,
+        étapes reprises d'un point de reprise et modes dégradés faute de temps
+    """
+    timings = {}
+    resumed = []
+    degradations: List[Dict[str, Any]] = []
+    store = get_checkpoint_store() if workflow_id else None
+
+    def timed(stage: str, fn: Callable, *args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        inputs = [args, kwargs]
+        result = store.get(workflow_id, stage, inputs) if store is not None else None
+        if result is not None:
+            resumed.append(stage)
+        else:
+            degraded = len(degradations)
+            with collect_degradations(degradations):
+                result = fn(*args, **kwargs)
+            # Un résultat dégradé n'est pas enregistré : une reprise retentera l'étape complète
+            if store is not None and len(degradations) == degraded:
+                store.save(workflow_id, stage, inputs, result)
+        timings[stage] = time.perf_counter() - started
+        if on_stage is not None:
+            on_stage(stage, timings[stage])
+        return result
+
+    if not topic:
+        topic = timed("topic_ideas", generate_topic_ideas, sector, keywords, services)[0]
+
+    recent_articles = timed("search", search_recent_articles, topic, sector, keywords)
+
+    if not angle:
+        angle = timed("editorial_angles", generate_editorial_angles, topic, sector)[0]
+
+    outline = timed("outline", generate_article_outline, topic, angle, tone, length, style)
+    processed_articles = timed("scraping", process_articles_for_generation, recent_articles)
+    article = timed("article", generate_article, outline, topic, angle, tone, length, style,
+                    processed_articles=processed_articles)
+
+    return {
+        "topic": topic,
+        "angle": angle,
+        "recent_articles": recent_articles,
+        "outline": outline,
+        "article": article,
+        "timings": timings,
+        "resumed": resumed,
+        "degradations": [
+            {"stage": stage, "reason": reason, "count": count}
+            for (stage, reason), count in summarize_degradations(degradations).items()
+        ],
+    }
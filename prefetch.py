@@ -0,0 +1,160 @@
+import contextvars
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from rate_limiter import PRIORITY_BACKGROUND, with_priority
+from settings import env_int
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {
+    "started": 0,
+    "used": 0,
+    "cancelled": 0,
+    "discarded": 0,
+    "failed": 0,
+}
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def is_prefetch_enabled() -> bool:
+    """
+    Indique si le précalcul spéculatif est activé (variable PREFETCH_ENABLED, activé par défaut).
+    """
+    return os.environ.get("PREFETCH_ENABLED", "1").lower() not in ("0", "false", "no", "")
+
+
+def get_prefetch_executor() -> ThreadPoolExecutor:
+    """
+    Retourne le pool de workers de précalcul, partagé par toutes les sessions du processus.
+    """
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=env_int("PREFETCH_MAX_WORKERS", 4),
+                    thread_name_prefix="prefetch",
+                )
+    return _executor
+
+
+def prefetch_stats() -> Dict[str, int]:
+    with _stats_lock:
+        return dict(_stats)
+
+
+class Prefetcher:
+    """
+    Tâches de précalcul d'une session.
+
+    Chaque tâche est identifiée par un nom (ex: "editorial_angles") et par les entrées
+    qui l'ont produite. Relancer une tâche avec d'autres entrées annule la précédente,
+    devenue obsolète. Stocké dans `st.session_state`, l'objet disparaît avec la session.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, Tuple[Tuple, Future]] = {}
+        self._lock = threading.Lock()
+
+    def start(self, name: str, inputs: Tuple, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        """
+        Lance `fn(*args, **kwargs)` en arrière-plan, sauf si une tâche identique est déjà en cours.
+
+        Args:
+            name (str): Nom de la tâche
+            inputs (Tuple): Entrées identifiant le résultat attendu
+            fn (Callable): Fonction à exécuter
+        """
+        if not is_prefetch_enabled():
+            return
+
+        with self._lock:
+            existing = self._tasks.get(name)
+            if existing is not None:
+                if existing[0] == inputs:
+                    return
+                self._discard(existing[1])
+
+            # Le précalcul cède le passage aux appels interactifs auprès du limiteur de débit ;
+            # il hérite du contexte de la session (ex: collecte des dégradations)
+            future = get_prefetch_executor().submit(contextvars.copy_context().run, with_priority,
+                                                    PRIORITY_BACKGROUND, fn, *args, **kwargs)
+            self._tasks[name] = (inputs, future)
+        _count("started")
+
+    def _discard(self, future: Future) -> None:
+        # Une tâche pas encore démarrée est annulée, une tâche en cours est simplement ignorée
+        if future.cancel():
+            _count("cancelled")
+        else:
+            _count("discarded")
+
+    def take(self, name: str, inputs: Tuple, wait: bool = True, timeout: Optional[float] = None) -> Optional[Any]:
+        """
+        Récupère le résultat d'une tâche si elle correspond aux entrées courantes.
+
+        Args:
+            name (str): Nom de la tâche
+            inputs (Tuple): Entrées courantes ; une tâche lancée avec d'autres entrées est abandonnée
+            wait (bool): Attendre la fin d'une tâche en cours plutôt que de retourner None
+            timeout (Optional[float]): Attente maximale en secondes
+
+        Returns:
+            Optional[Any]: Résultat précalculé, ou None (l'appelant calcule alors lui-même)
+        """
+        with self._lock:
+            task = self._tasks.get(name)
+            if task is None:
+                return None
+
+            task_inputs, future = task
+            if task_inputs != inputs:
+                del self._tasks[name]
+                self._discard(future)
+                return None
+
+            if not wait and not future.done():
+                return None
+            del self._tasks[name]
+
+        try:
+            result = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            self._discard(future)
+            return None
+        except Exception as e:
+            # L'appelant recalcule l'étape au premier plan, où l'erreur est affichée
+            logger.warning("Précalcul %s en échec : %s", name, e)
+            _count("failed")
+            return None
+
+        if result is None:
+            _count("failed")
+            return None
+
+        _count("used")
+        return result
+
+    def cancel(self, name: Optional[str] = None) -> None:
+        """
+        Abandonne une tâche (ou toutes si `name` est None).
+        """
+        with self._lock:
+            names = [name] if name is not None else list(self._tasks)
+            for task_name in names:
+                task = self._tasks.pop(task_name, None)
+                if task is not None:
+                    self._discard(task[1])
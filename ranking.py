@@ -0,0 +1,112 @@
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from search_cache import fold_accents
+
+# Mots vides français (sans accents), ignorés par l'index
+STOP_WORDS = {
+    "les", "des", "une", "dans", "pour", "par", "sur", "qui", "que", "quoi", "dont", "comment", "est", "sont",
+    "aux", "avec", "ces", "ses", "son", "leur", "leurs", "nos", "vos", "mais", "plus", "pas", "ont", "etre",
+    "avoir", "cette", "cet", "tout", "tous", "entre", "sans", "sous", "vers", "chez", "apres", "avant", "the", "and",
+}
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Découpe un texte en termes d'index : minuscules, sans accents, sans mots vides ni mots d'une lettre.
+
+    Le « s » final des mots de plus de 3 lettres est retiré (« entreprises » et « entreprise »
+    donnent le même terme).
+    """
+    terms = []
+    for word in _WORD_RE.findall(fold_accents(text.lower())):
+        if len(word) < 2 or word in STOP_WORDS:
+            continue
+        if len(word) > 3 and word.endswith("s"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+class BM25Index:
+    """
+    Index BM25 en mémoire sur un petit corpus (les candidats d'une recherche).
+
+    Les poids terme/document sont précalculés dans une matrice (documents × vocabulaire) :
+    le score d'une requête est la somme des colonnes de ses termes, calculée en une opération
+    pour tous les documents.
+    """
+
+    def __init__(self, documents: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        tokens = [tokenize(document) for document in documents]
+        self.vocabulary: Dict[str, int] = {}
+        for terms in tokens:
+            for term in terms:
+                self.vocabulary.setdefault(term, len(self.vocabulary))
+
+        frequencies = np.zeros((len(tokens), len(self.vocabulary)), dtype=np.float64)
+        for i, terms in enumerate(tokens):
+            for term in terms:
+                frequencies[i, self.vocabulary[term]] += 1
+
+        lengths = frequencies.sum(axis=1)
+        average_length = lengths.mean() if len(tokens) and lengths.mean() > 0 else 1.0
+        document_frequency = (frequencies > 0).sum(axis=0)
+        idf = np.log(1 + (len(tokens) - document_frequency + 0.5) / (document_frequency + 0.5))
+        normalization = k1 * (1 - b + b * lengths / average_length)
+        self.weights = idf * frequencies * (k1 + 1) / (frequencies + normalization[:, None])
+
+    def __len__(self) -> int:
+        return self.weights.shape[0]
+
+    def scores(self, query: Union[str, Sequence[str]]) -> np.ndarray:
+        """
+        Score BM25 de chaque document pour la requête (texte ou liste de termes bruts).
+        """
+        text = query if isinstance(query, str) else " ".join(query)
+        columns = sorted({self.vocabulary[t] for t in tokenize(text) if t in self.vocabulary})
+        if not columns:
+            return np.zeros(len(self))
+        return self.weights[:, columns].sum(axis=1)
+
+    def search(self, query: Union[str, Sequence[str]], limit: Optional[int] = None,
+               min_score: float = 0.0) -> List[Tuple[int, float]]:
+        """
+        Documents dont le score dépasse `min_score`, du plus pertinent au moins pertinent.
+
+        Returns:
+            List[Tuple[int, float]]: (indice du document, score) ; l'ordre d'origine départage les ex æquo
+        """
+        scores = self.scores(query)
+        # Tri stable : à score égal, l'ordre des fournisseurs (leur propre pertinence) est conservé
+        order = np.argsort(-scores, kind="stable")
+        ranked = [(int(i), float(scores[i])) for i in order if scores[i] > min_score]
+        return ranked[:limit] if limit is not None else ranked
+
+
+def rank_search_results(articles: List[Dict[str, Any]], query: Union[str, Sequence[str]],
+                        limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Classe des résultats de recherche par pertinence BM25 sur leur titre et leur description,
+    et écarte ceux qui ne partagent aucun terme avec la requête.
+
+    Le titre est compté deux fois : un terme du titre pèse plus qu'un terme de la description.
+
+    Args:
+        articles (List[Dict]): Résultats de recherche (title, summary...)
+        query (Union[str, Sequence[str]]): Requête, ou termes de recherche
+        limit (Optional[int]): Nombre maximum de résultats
+
+    Returns:
+        List[Dict]: Résultats pertinents, du plus au moins pertinent
+    """
+    if not articles:
+        return []
+    index = BM25Index([
+        f"{article.get('title', '')} {article.get('title', '')} {article.get('summary', '')}" for article in articles
+    ])
+    return [articles[i] for i, _ in index.search(query, limit)]
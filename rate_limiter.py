@@ -0,0 +1,254 @@
+import contextvars
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from http_client import parse_retry_after
+from settings import env_float
+
+# Priorités des appels OpenAI : plus la valeur est basse, plus l'appel passe tôt
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+PRIORITY_BATCH = 2
+
+PRIORITY_NAMES = {
+    PRIORITY_INTERACTIVE: "interactive",
+    PRIORITY_BACKGROUND: "background",
+    PRIORITY_BATCH: "batch",
+}
+
+# Priorité des appels du contexte courant (interactif par défaut)
+current_priority: contextvars.ContextVar = contextvars.ContextVar("current_priority", default=PRIORITY_INTERACTIVE)
+
+
+class RateLimitTimeout(Exception):
+    """
+    L'appel n'a pas obtenu de créneau dans le délai imparti.
+    """
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """
+    Exécute le bloc avec la priorité donnée pour tous les appels OpenAI qu'il déclenche.
+    """
+    token = current_priority.set(priority)
+    try:
+        yield
+    finally:
+        current_priority.reset(token)
+
+
+def with_priority(priority: int, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Appelle `fn` avec la priorité donnée (pratique pour les tâches soumises à un executor).
+    """
+    with request_priority(priority):
+        return fn(*args, **kwargs)
+
+
+class TokenBucket:
+    """
+    Seau à jetons rechargé en continu à `per_minute / 60` jetons par seconde.
+
+    La capacité correspond à `burst_seconds` de débit : les appels sont libérés
+    régulièrement plutôt que tous en début de minute. Un débit nul signifie « illimité ».
+    """
+
+    def __init__(self, per_minute: float, burst_seconds: float = 10.0):
+        self.rate = max(0.0, per_minute) / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def unlimited(self) -> bool:
+        return self.rate <= 0
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """
+        Délai avant de pouvoir retirer `amount` jetons (borné à la capacité du seau).
+        """
+        if self.unlimited:
+            return 0.0
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float) -> None:
+        if not self.unlimited:
+            self.level -= min(amount, self.capacity)
+
+    def give(self, amount: float) -> None:
+        if not self.unlimited:
+            self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """
+    Ordonnanceur des appels OpenAI du processus, partagé par toutes les sessions.
+
+    Chaque appel réserve une requête et une estimation de ses tokens (prompt + max_tokens)
+    dans deux seaux à jetons (requêtes/minute et tokens/minute). Les appels en attente
+    sont servis par priorité puis par ordre d'arrivée ; l'estimation est ajustée une fois
+    l'usage réel connu, et un 429 suspend les envois pendant la durée indiquée par Retry-After.
+    """
+
+    def __init__(self, rpm: float = 500, tpm: float = 200_000, burst_seconds: float = 10.0):
+        self.requests = TokenBucket(rpm, burst_seconds)
+        self.tokens = TokenBucket(tpm, burst_seconds)
+        self._cond = threading.Condition()
+        self._queue: list = []
+        self._sequence = itertools.count()
+        self._blocked_until = 0.0
+        self._counters: Dict[str, Any] = {
+            "acquired": {name: 0 for name in PRIORITY_NAMES.values()},
+            "waited_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "throttled": 0,
+            "timeouts": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return not (self.requests.unlimited and self.tokens.unlimited)
+
+    def acquire(self, tokens: int, priority: Optional[int] = None, timeout: Optional[float] = None) -> float:
+        """
+        Attend un créneau pour un appel de `tokens` tokens estimés.
+
+        Args:
+            tokens (int): Tokens réservés (prompt + max_tokens)
+            priority (Optional[int]): Priorité (par défaut, celle du contexte courant)
+            timeout (Optional[float]): Attente maximale en secondes
+
+        Returns:
+            float: Temps d'attente en secondes
+
+        Raises:
+            RateLimitTimeout: Si aucun créneau n'a été obtenu à temps
+        """
+        priority = current_priority.get() if priority is None else priority
+        started = time.monotonic()
+        deadline = started + timeout if timeout is not None else None
+
+        with self._cond:
+            entry = (priority, next(self._sequence))
+            heapq.heappush(self._queue, entry)
+            # Un appel plus prioritaire peut devenir tête de file : réveiller l'ancienne tête
+            self._cond.notify_all()
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+                    if self._queue[0] == entry:
+                        self.requests.refill(now)
+                        self.tokens.refill(now)
+                        wait = max(self._blocked_until - now, self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                        if wait <= 0:
+                            self.requests.take(1)
+                            self.tokens.take(tokens)
+                            heapq.heappop(self._queue)
+                            self._cond.notify_all()
+                            waited = now - started
+                            name = PRIORITY_NAMES.get(priority, str(priority))
+                            self._counters["acquired"][name] = self._counters["acquired"].get(name, 0) + 1
+                            self._counters["waited_seconds"] += waited
+                            self._counters["max_wait_seconds"] = max(self._counters["max_wait_seconds"], waited)
+                            return waited
+
+                    if deadline is not None:
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            self._counters["timeouts"] += 1
+                            raise RateLimitTimeout(f"Aucun créneau d'appel OpenAI obtenu en {timeout:.0f} s")
+                        wait = remaining if wait is None else min(wait, remaining)
+                    self._cond.wait(wait)
+            except BaseException:
+                if entry in self._queue:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self._cond.notify_all()
+                raise
+
+    def settle(self, reserved: int, usage: Optional[Dict[str, Any]]) -> None:
+        """
+        Ajuste la réservation d'un appel terminé à son usage réel (bloc `usage` de la réponse).
+        """
+        if not usage or "total_tokens" not in usage:
+            return
+        with self._cond:
+            self.tokens.refill(time.monotonic())
+            difference = reserved - int(usage["total_tokens"])
+            if difference > 0:
+                self.tokens.give(difference)
+                self._cond.notify_all()
+            else:
+                self.tokens.take(-difference)
+
+    def refund(self, reserved: int) -> None:
+        """
+        Rend les tokens réservés par un appel en échec (aucun token facturé).
+        """
+        self.settle(reserved, {"total_tokens": 0})
+
+    def penalize(self, retry_after: Optional[float] = None) -> None:
+        """
+        Suspend les envois après un 429, pendant `retry_after` secondes (1 s par défaut).
+        """
+        with self._cond:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + (1.0 if retry_after is None else retry_after))
+            self._counters["throttled"] += 1
+            self._cond.notify_all()
+
+    def observe_response(self, response: Any, *args: Any, **kwargs: Any) -> Any:
+        """
+        Hook `requests` appelé sur chaque réponse, nouvelles tentatives comprises : un 429
+        suspend tous les appels du processus, pas seulement celui qui l'a reçu.
+        """
+        if response.status_code == 429:
+            self.penalize(parse_retry_after(response.headers.get("Retry-After")))
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            return {
+                **{f"acquired_{name}": count for name, count in self._counters["acquired"].items()},
+                "waited_seconds": round(self._counters["waited_seconds"], 3),
+                "max_wait_seconds": round(self._counters["max_wait_seconds"], 3),
+                "throttled": self._counters["throttled"],
+                "timeouts": self._counters["timeouts"],
+                "queued": len(self._queue),
+                "blocked_seconds": round(max(0.0, self._blocked_until - now), 3),
+            }
+
+
+_limiter: Optional[RateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Retourne l'ordonnanceur des appels OpenAI du processus, créé au premier appel.
+
+    Limites configurées par OPENAI_RPM_LIMIT (500) et OPENAI_TPM_LIMIT (200000) ; 0 désactive
+    la limite correspondante. OPENAI_RATE_BURST_SECONDS (10) fixe la rafale autorisée.
+    """
+    global _limiter
+
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter(
+                    rpm=env_float("OPENAI_RPM_LIMIT", 500),
+                    tpm=env_float("OPENAI_TPM_LIMIT", 200_000),
+                    burst_seconds=env_float("OPENAI_RATE_BURST_SECONDS", 10),
+                )
+    return _limiter
@@ -0,0 +1,193 @@
+import os
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from cache import TieredCache, cache_key
+from deadlines import DeadlineExceeded
+from http_client import get_http_client
+from metrics import record_external_call
+from settings import env_float, env_int
+
+# Paramètres de suivi qui ne changent pas le contenu de la page
+TRACKING_PARAMS = {"fbclid", "gclid", "dclid", "mc_cid", "mc_eid", "igshid", "ref", "ref_src", "xtor"}
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (compatible; GenerateurArticlesIA/1.0)",
+    "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8",
+}
+
+_scrape_cache: Optional[TieredCache] = None
+_scrape_cache_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_stats = {
+    "fresh_hits": 0,
+    "negative_hits": 0,
+    "revalidated": 0,
+    "downloads": 0,
+    "failures": 0,
+}
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalise une URL pour qu'une même page ait toujours la même clé de cache :
+    schéma et hôte en minuscules, port par défaut, fragment et paramètres de suivi retirés,
+    paramètres de requête triés.
+
+    Args:
+        url (str): URL brute
+
+    Returns:
+        str: URL canonique
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "http"
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+
+    path = parts.path or "/"
+    if len(path) > 1:
+        path = path.rstrip("/")
+
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def extract_text(html: bytes) -> Optional[str]:
+    """
+    Extrait le texte principal d'une page HTML avec trafilatura.
+
+    trafilatura (et lxml) est importé au premier scraping seulement : les étapes
+    qui ne scrapent rien ne paient pas son temps de chargement.
+    """
+    import trafilatura
+
+    return trafilatura.extract(html)
+
+
+def get_scrape_cache() -> TieredCache:
+    """
+    Retourne le cache des textes extraits, partagé par tout le processus.
+    """
+    global _scrape_cache
+
+    if _scrape_cache is None:
+        with _scrape_cache_lock:
+            if _scrape_cache is None:
+                _scrape_cache = TieredCache(
+                    directory=os.environ.get("SCRAPE_CACHE_DIR", os.path.join(".cache", "scrape")) or None,
+                    memory_entries=env_int("SCRAPE_CACHE_MEMORY_ENTRIES", 512),
+                    max_bytes=env_int("SCRAPE_CACHE_MAX_BYTES", 200 * 1024 * 1024),
+                    ttl=env_float("SCRAPE_CACHE_TTL", 6 * 3600),
+                )
+    return _scrape_cache
+
+
+def fetch_article_text(url: str, timeout: Optional[float] = None) -> Optional[str]:
+    """
+    Retourne le texte principal d'une page, depuis le cache si possible.
+
+    - Entrée fraîche : aucun accès réseau.
+    - Entrée périmée : GET conditionnel (If-None-Match / If-Modified-Since) ; un 304
+      prolonge l'entrée sans retélécharger ni réextraire la page. Un 304 sans requête
+      conditionnelle (rien à réutiliser) est compté comme un échec.
+    - Échec ou page sans contenu exploitable : mise en cache négative (SCRAPE_NEGATIVE_TTL)
+      pour ne pas retenter à chaque demande.
+
+    Lève `DeadlineExceeded` si le budget de l'étape en cours est épuisé (sans mise en cache négative).
+
+    Args:
+        url (str): URL de l'article
+        timeout (Optional[float]): Délai de lecture en secondes (SCRAPE_URL_TIMEOUT, 20 par défaut)
+
+    Returns:
+        Optional[str]: Texte extrait, ou None
+    """
+    cache = get_scrape_cache()
+    key = cache_key("scrape", normalize_url(url))
+    negative_ttl = env_float("SCRAPE_NEGATIVE_TTL", 30 * 60)
+
+    # Une seule consultation du cache : l'entrée, même périmée, sert à la revalidation
+    entry = cache.get_entry(key)
+    cached: Dict = entry["value"] if entry else {}
+
+    if entry and entry["expires"] >= time.time():
+        _count("fresh_hits" if cached.get("content") else "negative_hits")
+        record_external_call("article_page", 0.0, cache="fresh" if cached.get("content") else "negative")
+        return cached.get("content")
+
+    headers = dict(DEFAULT_HEADERS)
+    if cached.get("content"):
+        if cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+    client = get_http_client()
+    read_timeout = timeout or env_float("SCRAPE_URL_TIMEOUT", 20)
+
+    started = time.perf_counter()
+    try:
+        response = client.get(url, headers=headers, timeout=(client.connect_timeout, read_timeout))
+    except DeadlineExceeded:
+        # Budget de l'étape épuisé : la page n'est pas en cause, rien n'est mis en cache
+        record_external_call("article_page", time.perf_counter() - started, cache="miss", error="deadline")
+        raise
+    except Exception as e:
+        _count("failures")
+        record_external_call("article_page", time.perf_counter() - started, cache="miss", error=type(e).__name__)
+        cache.set(key, {"content": None}, ttl=negative_ttl)
+        return None
+
+    conditional = "If-None-Match" in headers or "If-Modified-Since" in headers
+    revalidated = response.status_code == 304 and conditional
+    failed = not response.ok or (response.status_code == 304 and not revalidated)
+    record_external_call("article_page", time.perf_counter() - started,
+                         cache="revalidated" if revalidated else "miss",
+                         error=f"http_{response.status_code}" if failed else None)
+
+    if revalidated:
+        _count("revalidated")
+        cache.set(key, cached)
+        return cached["content"]
+
+    if failed:
+        _count("failures")
+        # 304 sans requête conditionnelle : aucun corps à extraire, mais la page n'est pas en cause
+        if response.status_code != 304:
+            cache.set(key, {"content": None}, ttl=negative_ttl)
+        return None
+
+    _count("downloads")
+    content = extract_text(response.content)
+    if not content:
+        cache.set(key, {"content": None}, ttl=negative_ttl)
+        return None
+
+    cache.set(key, {
+        "content": content,
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    })
+    return content
+
+
+def scrape_stats() -> Dict[str, int]:
+    with _stats_lock:
+        return dict(_stats)
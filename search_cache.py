@@ -0,0 +1,90 @@
+import os
+import re
+import threading
+import unicodedata
+from typing import Iterable, List, Optional
+
+from cache import TieredCache
+from settings import env_float, env_int
+
+# Ponctuation retirée en bord de terme (« IA: », « (santé) »...)
+_EDGE_PUNCTUATION = " \t\n\"'«»“”‘’()[]{},;:!?.…"
+
+_search_cache: Optional[TieredCache] = None
+_search_cache_lock = threading.Lock()
+
+
+def fold_accents(text: str) -> str:
+    """
+    Retire les accents et diacritiques (« Santé » -> « Sante »).
+    """
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def normalize_term(term: str) -> str:
+    """
+    Met un terme de recherche sous forme canonique : minuscules, espaces réduits,
+    ponctuation de bord retirée. Les accents sont conservés pour la requête envoyée.
+    """
+    return re.sub(r"\s+", " ", term.lower()).strip(_EDGE_PUNCTUATION)
+
+
+def canonical_terms(terms: Iterable[str]) -> List[str]:
+    """
+    Normalise, déduplique et trie les termes de recherche.
+
+    Deux termes qui ne diffèrent que par leurs accents (« santé » et « sante ») sont
+    fusionnés ; la variante retenue et l'ordre ne dépendent que de l'ensemble des termes,
+    si bien qu'une même demande produit toujours la même requête, quel que soit le processus.
+
+    Args:
+        terms (Iterable[str]): Termes bruts (titre, secteur, mots-clés)
+
+    Returns:
+        List[str]: Termes canoniques, triés par leur forme sans accents
+    """
+    variants = {}
+    for term in terms:
+        term = normalize_term(term or "")
+        if not term:
+            continue
+        folded = fold_accents(term)
+        # max : à l'ordre des codes, la variante accentuée l'emporte (« santé » plutôt que « sante »)
+        variants[folded] = max(variants.get(folded, term), term)
+    return [variants[folded] for folded in sorted(variants)]
+
+
+def build_search_query(terms: Iterable[str]) -> str:
+    """
+    Construit la requête de recherche canonique à partir des termes bruts.
+    """
+    return " ".join(canonical_terms(terms))
+
+
+def search_query_key(query: str) -> str:
+    """
+    Forme de la requête utilisée dans les clés de cache (sans accents).
+    """
+    return fold_accents(query)
+
+
+def get_search_cache() -> TieredCache:
+    """
+    Retourne le cache des résultats de recherche d'articles, partagé par tout le processus.
+
+    Les résultats restent frais SEARCH_CACHE_TTL secondes (15 minutes par défaut) :
+    une recherche répétée dans cet intervalle n'appelle pas l'API.
+    """
+    global _search_cache
+
+    if _search_cache is None:
+        with _search_cache_lock:
+            if _search_cache is None:
+                _search_cache = TieredCache(
+                    directory=os.environ.get("SEARCH_CACHE_DIR", os.path.join(".cache", "search")) or None,
+                    memory_entries=env_int("SEARCH_CACHE_MEMORY_ENTRIES", 256),
+                    max_bytes=env_int("SEARCH_CACHE_MAX_BYTES", 20 * 1024 * 1024),
+                    ttl=env_float("SEARCH_CACHE_TTL", 15 * 60),
+                )
+    return _search_cache
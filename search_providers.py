@@ -0,0 +1,339 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cache import cache_key
+from http_client import get_http_client
+from metrics import record_external_call, registry
+from scrape_cache import normalize_url
+from search_cache import get_search_cache, search_query_key
+from settings import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+# URLs par défaut des API, surchargeables (par exemple pour pointer vers mock_server.py)
+DEFAULT_NEWSAPI_BASE_URL = "https://newsapi.org/v2"
+DEFAULT_BING_SEARCH_BASE_URL = "https://api.bing.microsoft.com"
+DEFAULT_SERPAPI_BASE_URL = "https://serpapi.com"
+
+# Délai global par défaut de la recherche, tous fournisseurs confondus (secondes)
+DEFAULT_SEARCH_DEADLINE = 6.0
+
+# Nombre maximum de pages demandées quand les candidats pertinents ne suffisent pas
+DEFAULT_SEARCH_MAX_PAGES = 3
+
+# Attente supplémentaire accordée aux autres fournisseurs une fois assez de résultats reçus (secondes)
+DEFAULT_SEARCH_GRACE = 0.3
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _article(title: Optional[str], url: Optional[str], summary: Optional[str], date: Optional[str],
+             provider: str) -> Dict[str, str]:
+    return {
+        "title": title or "Article sans titre",
+        "url": url or "#",
+        "summary": summary or "Pas de description disponible.",
+        "date": date or "",
+        "provider": provider,
+    }
+
+
+def search_newsapi(query: str, from_date: str, count: int, language: str, timeout: float,
+                   page: int = 1) -> List[Dict[str, str]]:
+    """
+    Recherche d'articles avec NewsAPI (`/v2/everything`).
+    """
+    url = f"{os.environ.get('NEWSAPI_BASE_URL', DEFAULT_NEWSAPI_BASE_URL).rstrip('/')}/everything"
+    params = {
+        "q": query,
+        "from": from_date,
+        "sortBy": "relevancy",
+        "apiKey": os.environ.get("NEWSAPI_KEY", ""),
+        "pageSize": count,
+        "page": page,
+        "language": language,
+    }
+    response = get_http_client().get(url, params=params, timeout=timeout)
+    response.raise_for_status()
+    data = response.json()
+    if data.get("status") != "ok":
+        raise ValueError(f"NewsAPI: {data.get('message', data.get('status'))}")
+
+    return [
+        _article(a.get("title"), a.get("url"), a.get("description"), (a.get("publishedAt") or "")[:10], "newsapi")
+        for a in data.get("articles", [])
+    ]
+
+
+def search_bing(query: str, from_date: str, count: int, language: str, timeout: float,
+                page: int = 1) -> List[Dict[str, str]]:
+    """
+    Recherche d'articles avec l'API Bing News Search.
+    """
+    # Bing ne connaît que trois fenêtres de fraîcheur : la plus petite qui couvre from_date, puis filtrage
+    age = datetime.now() - datetime.strptime(from_date, "%Y-%m-%d")
+    freshness = "Day" if age <= timedelta(days=1) else "Week" if age <= timedelta(days=7) else "Month"
+
+    url = f"{os.environ.get('BING_SEARCH_BASE_URL', DEFAULT_BING_SEARCH_BASE_URL).rstrip('/')}/v7.0/news/search"
+    params = {
+        "q": query,
+        "count": count,
+        "offset": (page - 1) * count,
+        "freshness": freshness,
+        "mkt": f"{language}-{language.upper()}",
+        "sortBy": "Relevance",
+    }
+    headers = {"Ocp-Apim-Subscription-Key": os.environ.get("BING_API_KEY", "")}
+    response = get_http_client().get(url, headers=headers, params=params, timeout=timeout)
+    response.raise_for_status()
+
+    articles = []
+    for result in response.json().get("value", []):
+        pub_date = (result.get("datePublished") or "").split("T")[0]
+        # Vérifier que l'article est assez récent
+        if pub_date and pub_date < from_date:
+            continue
+        articles.append(_article(result.get("name"), result.get("url"), result.get("description"), pub_date, "bing"))
+    return articles
+
+
+def search_serpapi(query: str, from_date: str, count: int, language: str, timeout: float,
+                   page: int = 1) -> List[Dict[str, str]]:
+    """
+    Recherche d'articles avec SerpAPI (Google Actualités).
+    """
+    url = f"{os.environ.get('SERPAPI_BASE_URL', DEFAULT_SERPAPI_BASE_URL).rstrip('/')}/search.json"
+    params = {
+        "q": query,
+        "api_key": os.environ.get("SERPAPI_KEY", ""),
+        "engine": "google",
+        "tbm": "nws",
+        "hl": language,
+        "gl": language,
+        "num": count,
+        "start": (page - 1) * count,
+    }
+    response = get_http_client().get(url, params=params, timeout=timeout)
+    response.raise_for_status()
+
+    articles = []
+    for result in response.json().get("news_results", []):
+        # SerpAPI ne donne pas toujours une date précise (« il y a 2 heures ») : seule une date ISO est filtrée
+        pub_date = result.get("date") or ""
+        if "T" in pub_date:
+            try:
+                published = datetime.fromisoformat(pub_date.replace("Z", "+00:00"))
+            except ValueError:
+                pass
+            else:
+                pub_date = published.astimezone(timezone.utc).strftime("%Y-%m-%d")
+                if pub_date < from_date:
+                    continue
+        else:
+            pub_date = datetime.now().strftime("%Y-%m-%d")
+        articles.append(_article(result.get("title"), result.get("link"), result.get("snippet"), pub_date, "serpapi"))
+    return articles
+
+
+# Fournisseurs connus : nom -> (variable de la clé API, fonction de recherche)
+PROVIDERS: Dict[str, Tuple[str, Callable[..., List[Dict[str, str]]]]] = {
+    "newsapi": ("NEWSAPI_KEY", search_newsapi),
+    "bing": ("BING_API_KEY", search_bing),
+    "serpapi": ("SERPAPI_KEY", search_serpapi),
+}
+
+
+def configured_providers() -> List[str]:
+    """
+    Fournisseurs interrogés : ceux de SEARCH_PROVIDERS (tous par défaut) dont la clé API est renseignée.
+    """
+    names = os.environ.get("SEARCH_PROVIDERS", ",".join(PROVIDERS))
+    return [
+        name for name in (n.strip() for n in names.split(","))
+        if name in PROVIDERS and os.environ.get(PROVIDERS[name][0])
+    ]
+
+
+def get_search_deadline() -> float:
+    return env_float("SEARCH_DEADLINE", DEFAULT_SEARCH_DEADLINE)
+
+
+def get_search_grace() -> float:
+    return env_float("SEARCH_GRACE", DEFAULT_SEARCH_GRACE)
+
+
+def get_search_max_pages() -> int:
+    return max(1, env_int("SEARCH_MAX_PAGES", DEFAULT_SEARCH_MAX_PAGES))
+
+
+def get_search_executor() -> ThreadPoolExecutor:
+    """
+    Retourne le pool des recherches, partagé par toutes les sessions du processus.
+
+    Une recherche qui dépasse le délai global n'est pas interrompue : elle se termine
+    en arrière-plan et son résultat alimente le cache pour la demande suivante.
+    """
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=env_int("SEARCH_MAX_WORKERS", 8),
+                    thread_name_prefix="search",
+                )
+    return _executor
+
+
+def search_provider(name: str, query: str, from_date: str, count: int, language: str = "fr",
+                    timeout: Optional[float] = None, page: int = 1) -> List[Dict[str, str]]:
+    """
+    Interroge un fournisseur, depuis le cache des recherches si le résultat est encore frais.
+
+    La clé de cache porte sur le fournisseur, la requête (sans accents), la fenêtre de dates,
+    la langue, le nombre de résultats demandés et la page.
+
+    Args:
+        name (str): Nom du fournisseur (clé de PROVIDERS)
+        query (str): Requête canonique
+        from_date (str): Date minimale (YYYY-MM-DD)
+        count (int): Nombre de résultats demandés
+        language (str): Langue des articles
+        timeout (Optional[float]): Délai de l'appel HTTP (SEARCH_DEADLINE par défaut)
+        page (int): Page de résultats (à partir de 1)
+
+    Returns:
+        List[Dict[str, str]]: Articles (title, url, summary, date, provider), dans l'ordre du fournisseur
+    """
+    cache = get_search_cache()
+    key = cache_key(name, search_query_key(query), from_date, language, count, page)
+    articles = cache.get(key)
+    if articles is not None:
+        record_external_call(name, 0.0, cache="fresh")
+        return articles
+
+    search = PROVIDERS[name][1]
+    started = time.perf_counter()
+    try:
+        articles = search(query, from_date, count, language, timeout or get_search_deadline(), page)
+    except Exception as e:
+        record_external_call(name, time.perf_counter() - started, cache="miss", error=type(e).__name__)
+        raise
+    record_external_call(name, time.perf_counter() - started, cache="miss")
+    cache.set(key, articles)
+    return articles
+
+
+def merge_results(results: List[List[Dict[str, str]]], limit: Optional[int] = None) -> List[Dict[str, str]]:
+    """
+    Fusionne les listes de plusieurs fournisseurs en les entrelaçant rang par rang
+    et en éliminant les doublons par URL canonique (la première occurrence est gardée).
+    """
+    merged: List[Dict[str, str]] = []
+    seen = set()
+    for rank in range(max((len(r) for r in results), default=0)):
+        for articles in results:
+            if rank >= len(articles):
+                continue
+            article = articles[rank]
+            url = normalize_url(article["url"]) if article.get("url", "#") != "#" else None
+            if url is not None:
+                if url in seen:
+                    continue
+                seen.add(url)
+            merged.append(article)
+            if limit is not None and len(merged) >= limit:
+                return merged
+    return merged
+
+
+def search_articles(query: str, max_age_hours: int = 72, count: int = 10, language: str = "fr", page: int = 1,
+                    deadline: Optional[float] = None, enough: Optional[int] = None,
+                    grace: Optional[float] = None) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+    """
+    Interroge simultanément tous les fournisseurs configurés et fusionne leurs résultats.
+
+    La recherche s'arrête au délai global. Dès que les fournisseurs déjà terminés ont fourni
+    `enough` articles distincts, les autres n'ont plus que `grace` secondes pour compléter
+    la fusion : la durée est celle du fournisseur utile le plus rapide, et non la somme
+    (ni le maximum) des fournisseurs.
+
+    Args:
+        query (str): Requête canonique
+        max_age_hours (int): Âge maximum des articles
+        count (int): Nombre de résultats demandés à chaque fournisseur
+        language (str): Langue des articles
+        page (int): Page de résultats demandée à chaque fournisseur (à partir de 1)
+        deadline (Optional[float]): Délai global en secondes (SEARCH_DEADLINE, 6 par défaut)
+        enough (Optional[int]): Nombre d'articles distincts suffisant (par défaut `count`)
+        grace (Optional[float]): Attente des autres fournisseurs une fois `enough` atteint
+            (SEARCH_GRACE, 0.3 s par défaut)
+
+    Returns:
+        Tuple[List[Dict[str, str]], Dict[str, Any]]: Articles fusionnés, et rapport : statut par
+        fournisseur ("ok", "error", "timeout" ou "skipped") et nombre de résultats reçus
+    """
+    providers = configured_providers()
+    if not providers:
+        return [], {"providers": {}, "results": {}, "seconds": 0.0}
+
+    deadline = get_search_deadline() if deadline is None else deadline
+    enough = count if enough is None else enough
+    grace = get_search_grace() if grace is None else grace
+    from_date = (datetime.now() - timedelta(hours=max_age_hours)).strftime("%Y-%m-%d")
+    started = time.monotonic()
+
+    executor = get_search_executor()
+    futures: Dict[Future, str] = {
+        executor.submit(contextvars.copy_context().run, search_provider, name, query, from_date, count, language,
+                        deadline, page): name
+        for name in providers
+    }
+    results: Dict[str, List[Dict[str, str]]] = {}
+    status: Dict[str, str] = {}
+    pending = set(futures)
+    cutoff = deadline
+    sufficient = False
+
+    while pending:
+        remaining = cutoff - (time.monotonic() - started)
+        if remaining <= 0:
+            break
+        done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            name = futures[future]
+            try:
+                results[name] = future.result()
+                status[name] = "ok"
+            except Exception as e:
+                logger.warning("Recherche %s en échec : %s", name, e)
+                status[name] = "error"
+        if not sufficient and len(merge_results([results[n] for n in providers if n in results], enough)) >= enough:
+            sufficient = True
+            cutoff = min(deadline, time.monotonic() - started + grace)
+
+    # Fournisseurs encore en cours : hors délai, ou inutiles si les autres ont suffi
+    timed_out = time.monotonic() - started >= deadline
+    for future in pending:
+        name = futures[future]
+        status[name] = "timeout" if timed_out else "skipped"
+        if timed_out:
+            registry.inc("search_provider_deadline_misses_total", help="Fournisseurs de recherche hors délai",
+                         provider=name)
+
+    articles = merge_results([results[name] for name in providers if name in results])
+    report = {
+        "providers": {name: status[name] for name in providers},
+        "results": {name: len(articles) for name, articles in results.items()},
+        "seconds": round(time.monotonic() - started, 3),
+    }
+    logger.info("Recherche « %s » : %d articles en %.2f s (%s)", query, len(articles), report["seconds"],
+                report["providers"])
+    return articles, report
@@ -0,0 +1,21 @@
+import os
+
+
+def env_float(name: str, default: float) -> float:
+    """
+    Valeur numérique d'une variable d'environnement, ou `default` si elle est absente, vide ou invalide.
+    """
+    try:
+        return float(os.environ.get(name) or default)
+    except ValueError:
+        return default
+
+
+def env_int(name: str, default: int) -> int:
+    """
+    Valeur entière d'une variable d'environnement, ou `default` si elle est absente, vide ou invalide.
+    """
+    try:
+        return int(os.environ.get(name) or default)
+    except ValueError:
+        return default
@@ -0,0 +1,139 @@
+import copy
+import functools
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from cache import cache_key
+from deadlines import DeadlineExceeded, collect_degradations, current_degradations, remaining
+from tasks import TaskCancelled
+
+# Échecs propres au meneur (son budget de temps, l'annulation de sa tâche) : ceux qui attendaient refont l'appel
+LEADER_ERRORS = (DeadlineExceeded, TaskCancelled)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.degradations: List[Dict[str, Any]] = []
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Regroupement des appels identiques simultanés.
+
+    Le premier appelant d'une clé exécute l'appel ; les appelants concurrents de la même clé
+    attendent son résultat (ou son exception) au lieu de lancer leur propre appel. Une fois
+    l'appel terminé, la clé est libérée : un appel ultérieur repart vers l'amont (ou le cache).
+
+    Un appelant en attente respecte son propre budget de temps (voir `deadlines.py`) et reçoit
+    les dégradations signalées pendant l'appel partagé, comme s'il l'avait exécuté lui-même.
+    Si le meneur échoue sur son propre délai ou sur l'annulation de sa tâche, les appelants en
+    attente n'héritent pas de l'erreur : ils refont l'appel, l'un d'eux devenant le nouveau meneur.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._counters = {"calls": 0, "upstream": 0, "coalesced": 0, "errors": 0, "retried": 0}
+
+    def do(self, key: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Exécute `fn(*args, **kwargs)` une seule fois pour tous les appels simultanés de `key`.
+
+        Args:
+            key (str): Clé identifiant la requête
+            fn (Callable): Appel à effectuer
+
+        Returns:
+            Any: Résultat de l'appel, partagé entre tous les appelants
+        """
+        retrying = False
+        while True:
+            with self._lock:
+                self._counters["retried" if retrying else "calls"] += 1
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                    self._counters["upstream"] += 1
+                else:
+                    call.waiters += 1
+                    self._counters["coalesced"] += 1
+            if leader:
+                break
+
+            if not call.done.wait(remaining()):
+                raise DeadlineExceeded()
+            if isinstance(call.error, LEADER_ERRORS):
+                retrying = True
+                continue
+            degradations = current_degradations.get()
+            if degradations is not None:
+                degradations.extend(dict(degradation) for degradation in call.degradations)
+            if call.error is not None:
+                raise call.error
+            # Copie : chaque appelant peut modifier son résultat sans affecter les autres
+            return copy.deepcopy(call.result)
+
+        outer_degradations = current_degradations.get()
+        try:
+            # Dégradations de l'appel partagé : transmises à l'appelant et rejouées pour ceux qui attendent
+            with collect_degradations(call.degradations):
+                call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            with self._lock:
+                self._counters["errors"] += 1
+            raise
+        finally:
+            if outer_degradations is not None:
+                outer_degradations.extend(call.degradations)
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self._counters, "in_flight": len(self._calls)}
+
+
+_groups: Dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def get_group(name: str) -> SingleFlight:
+    """
+    Retourne le groupe d'appels `name` du processus, créé au premier appel.
+    """
+    with _groups_lock:
+        if name not in _groups:
+            _groups[name] = SingleFlight(name)
+        return _groups[name]
+
+
+def coalesce(name: str) -> Callable:
+    """
+    Décorateur : les appels simultanés avec les mêmes arguments partagent un seul appel réel.
+    """
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            key = cache_key(fn.__qualname__, args, kwargs)
+            return get_group(name).do(key, fn, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def singleflight_stats() -> Dict[str, Dict[str, int]]:
+    """
+    Compteurs par groupe : appels reçus, appels réellement envoyés (`upstream`)
+    et appels économisés (`coalesced`).
+    """
+    with _groups_lock:
+        groups = dict(_groups)
+    return {name: group.stats() for name, group in groups.items()}
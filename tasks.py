@@ -0,0 +1,250 @@
+import contextvars
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from settings import env_float, env_int
+
+# Tâche en cours d'exécution dans le thread courant (None hors tâche)
+current_task: contextvars.ContextVar = contextvars.ContextVar("current_task", default=None)
+
+# États d'une tâche
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class TaskCancelled(Exception):
+    """
+    La tâche a été annulée pendant son exécution.
+    """
+
+
+class Task:
+    """
+    Exécution en arrière-plan d'une étape longue (ex: rédaction de l'article).
+
+    La tâche appartient au processus, pas au script Streamlit : un rerun ou une reconnexion
+    ne l'interrompt pas, et l'interface s'y rattache pour suivre sa progression.
+    Le texte d'un résultat en flux est accumulé au fil de l'eau dans `text`.
+    """
+
+    def __init__(self, owner: str, name: str, inputs: Tuple):
+        self.id = uuid.uuid4().hex
+        self.owner = owner
+        self.name = name
+        self.inputs = inputs
+        self.status = RUNNING
+        self.phase = ""
+        # Avancement par phase : {phase: {"done": int, "total": Optional[int]}}
+        self.steps: Dict[str, Dict[str, Optional[int]]] = {}
+        self.text = ""
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.started = time.time()
+        self.finished: Optional[float] = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self.status != RUNNING
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        """
+        Demande l'arrêt de la tâche ; elle s'arrête à sa prochaine étape (progression ou morceau de texte).
+        """
+        self._cancelled.set()
+
+    def report(self, phase: str, done: Optional[int] = None, total: Optional[int] = None, advance: int = 0) -> None:
+        if self.cancelled:
+            raise TaskCancelled(self.id)
+        with self._lock:
+            step = self.steps.setdefault(phase, {"done": 0, "total": None})
+            if total is not None:
+                step["total"] = total
+            if done is not None:
+                step["done"] = done
+            step["done"] += advance
+            self.phase = phase
+
+    def append(self, chunk: str) -> None:
+        if self.cancelled:
+            raise TaskCancelled(self.id)
+        with self._lock:
+            self.text += chunk
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        État courant de la tâche, cohérent même pendant son exécution.
+        """
+        with self._lock:
+            return {
+                "id": self.id,
+                "name": self.name,
+                "status": self.status,
+                "phase": self.phase,
+                "steps": {phase: dict(step) for phase, step in self.steps.items()},
+                "text": self.text,
+                "error": self.error,
+                "elapsed": (self.finished or time.time()) - self.started,
+            }
+
+    def _finish(self, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        with self._lock:
+            self.status = status
+            self.result = result
+            self.error = error
+            self.finished = time.time()
+
+
+def report_progress(phase: str, done: Optional[int] = None, total: Optional[int] = None, advance: int = 0) -> None:
+    """
+    Signale l'avancement de la tâche en cours (sans effet hors d'une tâche d'arrière-plan).
+
+    Lève `TaskCancelled` si la tâche a été annulée entre-temps.
+
+    Args:
+        phase (str): Phase en cours (ex: "scraping", "summarizing", "writing")
+        done (Optional[int]): Nombre d'éléments traités dans la phase
+        total (Optional[int]): Nombre total d'éléments de la phase
+        advance (int): Incrément du nombre d'éléments traités
+    """
+    task = current_task.get()
+    if task is not None:
+        task.report(phase, done=done, total=total, advance=advance)
+
+
+class TaskRegistry:
+    """
+    Tâches d'arrière-plan du processus, identifiées par leur propriétaire (le workflow)
+    et leur nom (ex: "article").
+
+    Une tâche terminée reste disponible `retention` secondes, le temps que l'interface
+    récupère son résultat, même après un rafraîchissement de la page.
+    """
+
+    def __init__(self, max_workers: int = 4, retention: float = 600):
+        self.retention = retention
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="task")
+        self._tasks: Dict[Tuple[str, str], Task] = {}
+        self._lock = threading.Lock()
+        self._stats = {"started": 0, "reattached": 0, "done": 0, "failed": 0, "cancelled": 0}
+
+    def _purge(self) -> None:
+        limit = time.time() - self.retention
+        for key, task in list(self._tasks.items()):
+            if task.finished is not None and task.finished < limit:
+                del self._tasks[key]
+
+    def start(self, owner: str, name: str, inputs: Tuple, fn: Callable[..., Any], *args: Any,
+              **kwargs: Any) -> Task:
+        """
+        Lance `fn(*args, **kwargs)` en arrière-plan, ou retourne la tâche déjà lancée avec les mêmes entrées.
+
+        Une tâche lancée avec d'autres entrées, ou qui a échoué, est remplacée. Si `fn` retourne
+        un itérateur de texte (mode stream), il est consommé par la tâche et son texte accumulé.
+
+        Args:
+            owner (str): Propriétaire de la tâche (identifiant du workflow)
+            name (str): Nom de la tâche
+            inputs (Tuple): Entrées identifiant le résultat attendu
+            fn (Callable): Fonction à exécuter
+
+        Returns:
+            Task: Tâche en cours ou terminée
+        """
+        with self._lock:
+            self._purge()
+            existing = self._tasks.get((owner, name))
+            if existing is not None and existing.inputs == inputs and existing.status in (RUNNING, DONE):
+                self._stats["reattached"] += 1
+                return existing
+            if existing is not None:
+                existing.cancel()
+
+            task = Task(owner, name, inputs)
+            self._tasks[(owner, name)] = task
+            self._stats["started"] += 1
+
+        context = contextvars.copy_context()
+        context.run(current_task.set, task)
+        self._executor.submit(context.run, self._run, task, fn, args, kwargs)
+        return task
+
+    def _run(self, task: Task, fn: Callable[..., Any], args: Tuple, kwargs: Dict[str, Any]) -> None:
+        try:
+            result = fn(*args, **kwargs)
+            if isinstance(result, Iterator):
+                try:
+                    for chunk in result:
+                        task.append(chunk)
+                finally:
+                    # Libère la requête en flux si la tâche est annulée en cours de route
+                    close = getattr(result, "close", None)
+                    if close is not None:
+                        close()
+                result = task.text
+            status, error = CANCELLED if task.cancelled else DONE, None
+        except TaskCancelled:
+            status, result, error = CANCELLED, None, None
+        except Exception as e:
+            status, result, error = FAILED, None, str(e) or type(e).__name__
+
+        task._finish(status, result, error)
+        with self._lock:
+            self._stats[status] += 1
+
+    def get(self, owner: str, name: str) -> Optional[Task]:
+        """
+        Retourne la tâche `name` du propriétaire, en cours ou récemment terminée.
+        """
+        with self._lock:
+            self._purge()
+            return self._tasks.get((owner, name))
+
+    def discard(self, owner: str, name: Optional[str] = None) -> None:
+        """
+        Annule et oublie une tâche (ou toutes celles du propriétaire si `name` est None).
+        """
+        with self._lock:
+            for key in [key for key in self._tasks if key[0] == owner and name in (None, key[1])]:
+                self._tasks.pop(key).cancel()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            running = sum(1 for task in self._tasks.values() if task.status == RUNNING)
+            return {**self._stats, "running": running}
+
+
+_registry: Optional[TaskRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_task_registry() -> TaskRegistry:
+    """
+    Retourne le registre des tâches d'arrière-plan, partagé par toutes les sessions du processus.
+
+    Workers : TASK_MAX_WORKERS (4) ; conservation des tâches terminées : TASK_RETENTION (600 secondes).
+    """
+    global _registry
+
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = TaskRegistry(
+                    max_workers=env_int("TASK_MAX_WORKERS", 4),
+                    retention=env_float("TASK_RETENTION", 600),
+                )
+    return _registry
+
+
+def task_stats() -> Dict[str, int]:
+    return get_task_registry().stats()
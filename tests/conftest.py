@@ -0,0 +1,11 @@
+import time
+
+
+def wait_until(condition, timeout=2.0):
+    """
+    Attend qu'une condition devienne vraie (tests avec des threads), en échouant après `timeout` secondes.
+    """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition non atteinte"
+        time.sleep(0.005)
@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+@pytest.fixture
+def app(monkeypatch):
+    # Aucun appel externe : précalcul désactivé, points de reprise en mémoire
+    monkeypatch.setenv("PREFETCH_ENABLED", "0")
+    monkeypatch.setenv("CHECKPOINT_DB", ":memory:")
+    return AppTest.from_file(APP_PATH, default_timeout=30).run()
+
+
+def workflow_in_url(at):
+    return at.query_params.get("wf", [""])[0]
+
+
+def test_restart_returns_to_stage_1_with_a_new_workflow(app):
+    app.session_state["sector"] = "santé"
+    app.session_state["keywords"] = "diagnostic"
+    app.session_state["topic_ideas"] = ["Sujet"]
+    app.session_state["stage"] = 2
+    app.run()
+    old_workflow = workflow_in_url(app)
+    assert old_workflow
+
+    next(button for button in app.button if button.label == "🔄 Recommencer").click().run()
+
+    assert not app.exception
+    assert app.session_state["stage"] == 1
+    assert app.session_state["sector"] == ""
+    assert workflow_in_url(app) not in ("", old_workflow)
+
+    # Rouvrir l'ancienne URL ne reprend plus l'ancien workflow
+    reopened = AppTest.from_file(APP_PATH, default_timeout=30)
+    reopened.query_params["wf"] = old_workflow
+    reopened.run()
+    assert reopened.session_state["stage"] == 1
+    assert workflow_in_url(reopened) != old_workflow
@@ -0,0 +1,76 @@
+import pytest
+
+from dedup import NearDuplicateIndex, dedupe_articles, minhash, shingles, similarity
+
+TEXT = (
+    "Les hôpitaux européens adoptent l'intelligence artificielle pour accélérer le diagnostic des cancers "
+    "du poumon. Les premiers résultats montrent une baisse des délais de prise en charge et une meilleure "
+    "détection des lésions précoces, selon une étude publiée cette semaine par un consortium de chercheurs."
+)
+# Même dépêche reprise par un autre site : quelques mots changés
+REWRITE = TEXT.replace("cette semaine", "lundi").replace("consortium de chercheurs", "groupe de chercheurs")
+OTHER = (
+    "La banque centrale a relevé ses taux directeurs d'un quart de point pour contenir l'inflation, "
+    "une décision attendue par les marchés après plusieurs mois de hausse des prix de l'énergie."
+)
+
+
+def test_shingles_ignore_case_and_accents():
+    assert shingles("Économie Française") == shingles("economie francaise") == {"economie francaise"}
+    assert shingles("IA") == {"ia"}
+
+
+def test_signature_is_deterministic():
+    assert minhash(TEXT) == minhash(TEXT)
+    assert minhash("") is None
+    assert minhash("!!! ...") is None
+
+
+def test_similarity_orders_texts():
+    original, rewrite, other = minhash(TEXT), minhash(REWRITE), minhash(OTHER)
+
+    assert similarity(original, original) == 1.0
+    assert similarity(original, rewrite) > 0.5
+    assert similarity(original, other) < 0.1
+
+
+def test_threshold_is_inclusive():
+    original, rewrite = minhash(TEXT), minhash(REWRITE)
+    estimate = similarity(original, rewrite)
+
+    at_threshold = NearDuplicateIndex(threshold=estimate)
+    assert at_threshold.add(original) is False
+    assert at_threshold.add(rewrite) is True
+
+    above_threshold = NearDuplicateIndex(threshold=estimate + 1 / len(original))
+    above_threshold.add(original)
+    assert above_threshold.add(rewrite) is False
+
+
+@pytest.mark.parametrize("threshold, duplicate", [(0.3, True), (0.99, False)])
+def test_index_threshold(threshold, duplicate):
+    index = NearDuplicateIndex(threshold)
+    index.add(minhash(TEXT))
+
+    assert index.add(minhash(REWRITE)) is duplicate
+    assert index.add(minhash(OTHER)) is False
+
+
+def test_empty_text_is_never_a_duplicate():
+    index = NearDuplicateIndex()
+
+    assert index.add(None) is False
+    assert index.add(None) is False
+
+
+def test_dedupe_articles_keeps_first_occurrence_in_order():
+    articles = [
+        {"title": "Diagnostic et IA", "summary": TEXT, "url": "https://a.example/1"},
+        {"title": "Taux directeurs", "summary": OTHER, "url": "https://b.example/2"},
+        {"title": "Diagnostic et IA", "summary": REWRITE, "url": "https://c.example/3"},
+    ]
+
+    unique, duplicates = dedupe_articles(articles, threshold=0.4)
+
+    assert [article["url"] for article in unique] == ["https://a.example/1", "https://b.example/2"]
+    assert [article["url"] for article in duplicates] == ["https://c.example/3"]
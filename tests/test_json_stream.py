@@ -0,0 +1,139 @@
+import json
+
+import pytest
+
+from json_stream import IncrementalJSONParser, parse_json_stream
+
+DOCUMENT = json.dumps({
+    "title": "L'IA au \"cœur\" du diagnostic",
+    "introduction": "Ligne 1\nLigne 2\t😀 \\ fin",
+    "sections": [
+        {"title": "Données", "subsections": ["Qualité", "Volume"]},
+        {"title": "Modèles", "subsections": []},
+    ],
+    "score": -12.5e3,
+    "published": True,
+    "source": None,
+}, ensure_ascii=True)
+
+
+def feed_all(chunks):
+    parser = IncrementalJSONParser()
+    values = []
+    for chunk in chunks:
+        if parser.feed(chunk):
+            values.append(parser.value)
+    return parser, values
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 64, len(DOCUMENT)])
+def test_chunk_boundaries_give_the_same_document(size):
+    chunks = [DOCUMENT[i:i + size] for i in range(0, len(DOCUMENT), size)]
+    parser, values = feed_all(chunks)
+
+    assert parser.close() == json.loads(DOCUMENT)
+    assert values[-1] == json.loads(DOCUMENT)
+
+
+def test_every_prefix_is_valid():
+    parser = IncrementalJSONParser()
+    for char in DOCUMENT:
+        parser.feed(char)
+        # Chaque valeur partielle est un objet JSON sérialisable, jamais une erreur
+        assert isinstance(parser.value, dict)
+        json.dumps(parser.value)
+
+
+def test_partial_string_value_is_included():
+    parser = IncrementalJSONParser()
+    parser.feed('{"title": "L\'IA", "sections": [{"title": "Par')
+
+    assert parser.value == {"title": "L'IA", "sections": [{"title": "Par"}]}
+
+
+def test_key_appears_as_soon_as_its_string_value_opens():
+    parser = IncrementalJSONParser()
+    parser.feed('{"title": "')
+
+    assert parser.value == {"title": ""}
+
+
+def test_partial_key_is_not_included():
+    parser = IncrementalJSONParser()
+    parser.feed('{"title": "Titre", "intro')
+
+    assert parser.value == {"title": "Titre"}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('"a\\', "a"),
+    ('"a\\"', 'a"'),
+    ('"a\\n', "a\n"),
+    ('"a\\\\', "a\\"),
+    ('"a\\/', "a/"),
+])
+def test_escapes(text, expected):
+    parser = IncrementalJSONParser()
+    parser.feed('{"title": ' + text)
+
+    assert parser.value == {"title": expected}
+
+
+@pytest.mark.parametrize("text, expected", [
+    ('"\\u', ""),
+    ('"\\u00', ""),
+    ('"caf\\', "caf"),
+    ('"caf\\u0', "caf"),
+    ('"caf\\u00e', "caf"),
+])
+def test_truncated_unicode_escape_keeps_the_key(text, expected):
+    parser = IncrementalJSONParser()
+    parser.feed('{"title": ' + text)
+
+    assert parser.value == {"title": expected}
+
+
+@pytest.mark.parametrize("split", range(1, len('"\\u00e9"')))
+def test_unicode_escape_across_chunks(split):
+    value = '"\\u00e9"'
+    parser, _ = feed_all(['{"title": ' + value[:split], value[split:] + "}"])
+
+    assert parser.close() == {"title": "é"}
+
+
+def test_surrogate_pair_is_not_split():
+    parser = IncrementalJSONParser()
+    parser.feed('{"title": "ok \\ud83d')
+    assert parser.value == {"title": "ok "}
+
+    parser.feed("\\ude00")
+    assert parser.value == {"title": "ok 😀"}
+
+
+def test_incomplete_number_and_literal_are_not_included():
+    parser = IncrementalJSONParser()
+    parser.feed('{"count": 12')
+    assert parser.value == {}
+
+    parser.feed(', "ok": tr')
+    assert parser.value == {"count": 12}
+
+
+def test_leading_markdown_fence_is_ignored():
+    parser, _ = feed_all(["```json\n", '{"title": "x"}', "\n```"])
+
+    assert parser.close() == {"title": "x"}
+
+
+def test_close_rejects_incomplete_document():
+    parser = IncrementalJSONParser()
+    parser.feed('{"title": "x"')
+
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_parse_json_stream_yields_each_change():
+    values = list(parse_json_stream(['{"sections": [', '"a"', ', "b"]}']))
+
+    assert values == [{"sections": []}, {"sections": ["a"]}, {"sections": ["a", "b"]}]
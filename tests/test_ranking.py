@@ -0,0 +1,72 @@
+from ranking import BM25Index, rank_search_results, tokenize
+
+
+def test_tokenize_folds_accents_and_drops_stop_words():
+    assert tokenize("Les Entreprises et l'Économie") == ["entreprise", "et", "economie"]
+
+
+def test_zero_overlap_documents_are_filtered_out():
+    index = BM25Index([
+        "intelligence artificielle et diagnostic",
+        "taux directeurs de la banque centrale",
+        "diagnostic médical assisté",
+    ])
+
+    ranked = index.search("diagnostic")
+
+    assert {i for i, _ in ranked} == {0, 2}
+    assert all(score > 0 for _, score in ranked)
+
+
+def test_query_without_known_terms_matches_nothing():
+    index = BM25Index(["intelligence artificielle", "diagnostic médical"])
+
+    assert index.search("football") == []
+    assert index.search("les des une") == []
+    assert index.scores("football").tolist() == [0.0, 0.0]
+
+
+def test_more_matching_terms_rank_higher():
+    # Documents de même longueur
+    index = BM25Index([
+        "diagnostic médical hôpital urgence",
+        "intelligence artificielle diagnostic médical",
+        "intelligence artificielle robot usine",
+    ])
+
+    ranked = index.search(["intelligence artificielle", "diagnostic"])
+
+    assert ranked[0][0] == 1
+    assert len(ranked) == 3
+
+
+def test_ties_keep_the_original_order():
+    index = BM25Index(["diagnostic rapide", "diagnostic rapide", "diagnostic rapide"])
+
+    assert [i for i, _ in index.search("diagnostic")] == [0, 1, 2]
+
+
+def test_search_limit_and_min_score():
+    index = BM25Index(["diagnostic", "diagnostic précoce", "diagnostic"])
+    ranked = index.search("diagnostic précoce")
+
+    assert index.search("diagnostic précoce", limit=1) == ranked[:1]
+    assert index.search("diagnostic précoce", min_score=ranked[1][1]) == ranked[:1]
+
+
+def test_empty_corpus():
+    assert BM25Index([]).search("diagnostic") == []
+    assert rank_search_results([], "diagnostic") == []
+
+
+def test_rank_search_results_drops_unrelated_articles():
+    articles = [
+        {"title": "Banque centrale : hausse des taux", "summary": "Les marchés réagissent."},
+        {"title": "L'IA au service du diagnostic", "summary": "Les hôpitaux s'équipent."},
+        {"title": "Hôpitaux", "summary": "Le diagnostic précoce progresse grâce à l'IA."},
+    ]
+
+    ranked = rank_search_results(articles, "diagnostic IA")
+
+    # Le titre compte double : l'article qui cite le diagnostic dans son titre passe devant
+    assert [article["title"] for article in ranked] == ["L'IA au service du diagnostic", "Hôpitaux"]
@@ -0,0 +1,94 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import wait_until
+from rate_limiter import (
+    PRIORITY_BATCH,
+    PRIORITY_INTERACTIVE,
+    RateLimiter,
+    RateLimitTimeout,
+    request_priority,
+)
+
+
+def test_higher_priority_is_served_first():
+    # 10 requêtes/s, rafale d'une requête : un seul appel par créneau
+    limiter = RateLimiter(rpm=600, tpm=0, burst_seconds=0.1)
+    limiter.penalize(0.3)
+    order = []
+
+    def call(priority, name):
+        limiter.acquire(1, priority=priority)
+        order.append(name)
+
+    batch = threading.Thread(target=call, args=(PRIORITY_BATCH, "batch"))
+    batch.start()
+    wait_until(lambda: limiter.stats()["queued"] == 1)
+    interactive = threading.Thread(target=call, args=(PRIORITY_INTERACTIVE, "interactive"))
+    interactive.start()
+    wait_until(lambda: limiter.stats()["queued"] == 2)
+    batch.join(2)
+    interactive.join(2)
+
+    assert order == ["interactive", "batch"]
+    assert limiter.stats()["acquired_interactive"] == 1
+    assert limiter.stats()["acquired_batch"] == 1
+
+
+def test_priority_defaults_to_the_context():
+    limiter = RateLimiter(rpm=600, tpm=0)
+    with request_priority(PRIORITY_BATCH):
+        limiter.acquire(1)
+
+    assert limiter.stats()["acquired_batch"] == 1
+
+
+def test_timeout_leaves_the_queue():
+    limiter = RateLimiter(rpm=60, tpm=0, burst_seconds=1)
+    limiter.acquire(1)
+
+    started = time.monotonic()
+    with pytest.raises(RateLimitTimeout):
+        limiter.acquire(1, timeout=0.05)
+
+    assert time.monotonic() - started < 0.5
+    assert limiter.stats()["timeouts"] == 1
+    assert limiter.stats()["queued"] == 0
+
+
+def test_429_pauses_every_call():
+    limiter = RateLimiter(rpm=0, tpm=0)
+    response = SimpleNamespace(status_code=429, headers={"Retry-After": "0.2"})
+
+    assert limiter.observe_response(response) is response
+    assert limiter.stats()["throttled"] == 1
+
+    waited = limiter.acquire(1)
+    assert 0.15 <= waited < 1.0
+
+
+def test_other_statuses_do_not_pause():
+    limiter = RateLimiter(rpm=0, tpm=0)
+    limiter.observe_response(SimpleNamespace(status_code=500, headers={"Retry-After": "5"}))
+
+    assert limiter.stats()["throttled"] == 0
+    assert limiter.acquire(1) < 0.1
+
+
+def test_settle_and_refund_adjust_reserved_tokens():
+    # 10 tokens/s, capacité 100
+    limiter = RateLimiter(rpm=0, tpm=600, burst_seconds=10)
+    limiter.acquire(80)
+    limiter.refund(80)
+    assert limiter.tokens.level == pytest.approx(100, abs=1)
+
+    limiter.acquire(80)
+    limiter.settle(80, {"total_tokens": 95})
+    assert limiter.tokens.level == pytest.approx(5, abs=1)
+
+    # Usage inconnu : la réservation est conservée
+    limiter.settle(80, None)
+    assert limiter.tokens.level == pytest.approx(5, abs=1)
@@ -0,0 +1,146 @@
+import threading
+import time
+
+import pytest
+
+from conftest import wait_until
+from deadlines import DeadlineExceeded, collect_degradations, deadline_scope, record_degradation
+from singleflight import SingleFlight
+from tasks import TaskCancelled
+
+
+class Upstream:
+    """
+    Appel amont lent, débloqué par le test.
+    """
+
+    def __init__(self, result=None, error=None, failures=None):
+        self.result = result
+        self.error = error
+        # Nombre d'appels qui échouent (tous par défaut)
+        self.failures = failures
+        self.calls = 0
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(2)
+        record_degradation("search", "pages_skipped")
+        if self.error is not None and (self.failures is None or self.calls <= self.failures):
+            raise self.error
+        return self.result
+
+
+def start(group, upstream, outcomes, deadline=None):
+    def run():
+        with collect_degradations() as degradations, deadline_scope(deadline):
+            try:
+                outcomes.append(("ok", group.do("key", upstream), degradations))
+            except Exception as e:
+                outcomes.append(("error", e, degradations))
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def wait_for_waiters(group, count):
+    wait_until(lambda: group.stats()["coalesced"] >= count)
+
+
+def test_concurrent_callers_share_one_call():
+    group = SingleFlight("test")
+    upstream = Upstream(result={"articles": [1, 2]})
+    outcomes = []
+    threads = [start(group, upstream, outcomes)]
+    wait_until(lambda: upstream.calls == 1)
+    threads += [start(group, upstream, outcomes) for _ in range(3)]
+    wait_for_waiters(group, 3)
+    upstream.release.set()
+    for thread in threads:
+        thread.join(2)
+
+    assert upstream.calls == 1
+    assert [status for status, _, _ in outcomes] == ["ok"] * 4
+    results = [result for _, result, _ in outcomes]
+    assert all(result == {"articles": [1, 2]} for result in results)
+    # Chaque appelant reçoit sa propre copie
+    assert len({id(result) for result in results}) == 4
+    assert group.stats()["upstream"] == 1
+
+
+def test_leader_error_is_raised_to_every_caller():
+    group = SingleFlight("test")
+    error = ValueError("amont indisponible")
+    upstream = Upstream(error=error)
+    outcomes = []
+    threads = [start(group, upstream, outcomes)]
+    wait_until(lambda: upstream.calls == 1)
+    threads += [start(group, upstream, outcomes) for _ in range(2)]
+    wait_for_waiters(group, 2)
+    upstream.release.set()
+    for thread in threads:
+        thread.join(2)
+
+    assert upstream.calls == 1
+    assert [(status, result) for status, result, _ in outcomes] == [("error", error)] * 3
+    assert group.stats()["errors"] == 1
+    # La clé est libérée : l'appel suivant repart vers l'amont
+    with pytest.raises(ValueError):
+        group.do("key", upstream)
+    assert upstream.calls == 2
+
+
+@pytest.mark.parametrize("error", [DeadlineExceeded(), TaskCancelled()])
+def test_waiter_retries_when_leader_fails_on_its_own_budget(error):
+    group = SingleFlight("test")
+    upstream = Upstream(result="ok", error=error, failures=1)
+    outcomes = []
+    threads = [start(group, upstream, outcomes)]
+    wait_until(lambda: upstream.calls == 1)
+    threads.append(start(group, upstream, outcomes))
+    wait_for_waiters(group, 1)
+    upstream.release.set()
+    for thread in threads:
+        thread.join(2)
+
+    # Le meneur reçoit son erreur, celui qui attendait relance l'appel et obtient le résultat
+    assert upstream.calls == 2
+    assert [result for status, result, _ in outcomes if status == "ok"] == ["ok"]
+    assert [result for status, result, _ in outcomes if status == "error"] == [error]
+    assert group.stats()["retried"] == 1
+    assert group.stats()["upstream"] == 2
+
+
+def test_waiter_gives_up_at_its_deadline():
+    group = SingleFlight("test")
+    upstream = Upstream(result="ok")
+    outcomes = []
+    leader = start(group, upstream, outcomes)
+    wait_until(lambda: upstream.calls == 1)
+    started = time.monotonic()
+    follower = start(group, upstream, outcomes, deadline=0.1)
+    follower.join(2)
+
+    assert time.monotonic() - started < 1
+    assert outcomes[0][0] == "error" and isinstance(outcomes[0][1], DeadlineExceeded)
+
+    upstream.release.set()
+    leader.join(2)
+    assert outcomes[1][:2] == ("ok", "ok")
+
+
+def test_leader_degradations_are_replayed_to_waiters():
+    group = SingleFlight("test")
+    upstream = Upstream(result="ok")
+    outcomes = []
+    threads = [start(group, upstream, outcomes)]
+    wait_until(lambda: upstream.calls == 1)
+    threads.append(start(group, upstream, outcomes))
+    wait_for_waiters(group, 1)
+    upstream.release.set()
+    for thread in threads:
+        thread.join(2)
+
+    expected = [{"stage": "search", "reason": "pages_skipped", "count": 1}]
+    assert [degradations for _, _, degradations in outcomes] == [expected, expected]
@@ -0,0 +1,135 @@
+import threading
+
+import pytest
+
+from conftest import wait_until
+from tasks import CANCELLED, DONE, FAILED, RUNNING, TaskRegistry, report_progress
+
+
+class Writer:
+    """
+    Rédaction en flux qui attend le feu vert du test avant chaque morceau.
+    """
+
+    def __init__(self, chunks=("Bonjour", " le", " monde")):
+        self.chunks = chunks
+        self.calls = 0
+        self.step = threading.Semaphore(0)
+        self.closed = False
+
+    def __call__(self):
+        self.calls += 1
+        report_progress("writing", total=len(self.chunks))
+        return self._stream()
+
+    def _stream(self):
+        try:
+            for chunk in self.chunks:
+                assert self.step.acquire(timeout=2)
+                yield chunk
+                report_progress("writing", advance=1)
+        finally:
+            self.closed = True
+
+    def release(self, count=None):
+        for _ in range(count or len(self.chunks)):
+            self.step.release()
+
+
+@pytest.fixture
+def registry():
+    return TaskRegistry(max_workers=2)
+
+
+def test_stream_result_is_accumulated(registry):
+    writer = Writer()
+    task = registry.start("workflow", "article", ("inputs",), writer)
+    writer.release()
+    wait_until(lambda: task.done)
+
+    assert task.status == DONE
+    assert task.result == "Bonjour le monde"
+    assert task.snapshot()["steps"]["writing"] == {"done": 3, "total": 3}
+
+
+def test_same_inputs_reattach_to_the_running_task(registry):
+    writer = Writer()
+    task = registry.start("workflow", "article", ("inputs",), writer)
+    wait_until(lambda: task.phase == "writing")
+
+    again = registry.start("workflow", "article", ("inputs",), writer)
+    writer.release()
+    wait_until(lambda: task.done)
+
+    assert again is task
+    assert writer.calls == 1
+    assert registry.get("workflow", "article") is task
+    assert registry.stats()["reattached"] == 1
+    # Tâche terminée : toujours récupérable avec les mêmes entrées
+    assert registry.start("workflow", "article", ("inputs",), writer) is task
+
+
+def test_other_inputs_cancel_and_replace_the_task(registry):
+    first_writer, second_writer = Writer(), Writer()
+    first = registry.start("workflow", "article", ("plan 1",), first_writer)
+    wait_until(lambda: first.phase == "writing")
+
+    second = registry.start("workflow", "article", ("plan 2",), second_writer)
+    first_writer.release(1)
+    second_writer.release()
+    wait_until(lambda: first.done and second.done)
+
+    assert second is not first
+    assert first.status == CANCELLED
+    assert first_writer.closed
+    assert second.status == DONE
+    assert registry.get("workflow", "article") is second
+
+
+def test_discard_cancels_at_the_next_chunk(registry):
+    writer = Writer()
+    task = registry.start("workflow", "article", ("inputs",), writer)
+    writer.release(1)
+    wait_until(lambda: task.snapshot()["text"] == "Bonjour")
+
+    registry.discard("workflow")
+    writer.release(1)
+    wait_until(lambda: task.done)
+
+    assert task.status == CANCELLED
+    assert task.result is None
+    assert writer.closed
+    assert registry.get("workflow", "article") is None
+    assert registry.stats()["cancelled"] == 1
+
+
+def test_failed_task_is_replaced(registry):
+    def fail():
+        raise RuntimeError("API indisponible")
+
+    failed = registry.start("workflow", "article", ("inputs",), fail)
+    wait_until(lambda: failed.done)
+    assert failed.status == FAILED
+    assert failed.error == "API indisponible"
+
+    retried = registry.start("workflow", "article", ("inputs",), lambda: "article")
+    wait_until(lambda: retried.done)
+    assert retried is not failed
+    assert retried.result == "article"
+
+
+def test_tasks_are_isolated_by_owner(registry):
+    writer = Writer()
+    task = registry.start("workflow-1", "article", ("inputs",), writer)
+
+    registry.discard("workflow-2")
+    assert registry.get("workflow-1", "article") is task
+    assert task.status == RUNNING
+
+    writer.release()
+    wait_until(lambda: task.done)
+    assert task.status == DONE
+
+
+def test_report_progress_outside_a_task_is_ignored():
+    report_progress("writing", advance=1)